@@ -12,11 +12,8 @@
 # =============================================================================
 # >> IMPORTS
 # =============================================================================
-# Python
-from configobj import ConfigObj
-
 # Source.Python
-from engines.trace import engine_trace, Ray, ContentMasks, TraceFilterSimple, GameTrace
+from entities.entity import Entity
 from engines.server import server
 from entities.helpers import index_from_edict
 from mathlib import Vector, NULL_VECTOR, QAngle, NULL_QANGLE
@@ -33,12 +30,8 @@ from ..helpers import (
     closest_point_on_line,
     get_closest_lane,
 )
-from ..constants import CFG_PATH
-
-# =============================================================================
-# >> GLOBAL VARIABLES
-# =============================================================================
-bot_config = ConfigObj(CFG_PATH + "/bot_settings.ini")
+from ..config import ConfigManager
+from ..targeting.targetmanager import TargetManager
 
 # =============================================================================
 # >> CLASSES
@@ -94,18 +87,12 @@ class Bot:
         self.bot.team = self.team
         self.bot.name = f"{'Blu' if team == Team.BLU else 'Red'} {'melee' if bot_type == BotType.MELEE else 'ranged'} bot"
 
-        self.config = (
-            bot_config["bot_melee"]
-            if self.bot_type == BotType.MELEE
-            else bot_config["bot_ranged"]
-        )
-        self.move_speed = self.config.as_float("move_speed")
+        self.config = ConfigManager.instance().config.bots[self.bot_type]
+        self.move_speed = self.config.move_speed
 
+        self.bot.set_property_uchar("m_PlayerClass.m_iClass", self.config.player_class)
         self.bot.set_property_uchar(
-            "m_PlayerClass.m_iClass", self.config.as_int("class")
-        )
-        self.bot.set_property_uchar(
-            "m_Shared.m_iDesiredPlayerClass", self.config.as_int("class")
+            "m_Shared.m_iDesiredPlayerClass", self.config.player_class
         )
 
         self.bot.spawn(force=True)
@@ -114,18 +101,16 @@ class Bot:
         # These will need to be applied after spawning
         self.bot.set_noblock(True)
 
-        self.bot.call_input("SetCustomModel", self.config["model"])
+        self.bot.call_input("SetCustomModel", self.config.model)
 
         # TODO: move props to .ini ?
         self.bot.set_property_bool("m_PlayerClass.m_bUseClassAnimations", True)
-        self.bot.set_property_float(
-            "m_flModelScale", float(self.config.as_float("model_scale"))
-        )
-        self.bot.set_property_int("m_iHealth", self.config.as_int("health"))
+        self.bot.set_property_float("m_flModelScale", self.config.model_scale)
+        self.bot.set_property_int("m_iHealth", self.config.health)
 
         self.ammo_type = None
         for weapon in self.bot.weapons():
-            if weapon.weapon_name != self.config["weapon"]:
+            if weapon.weapon_name != self.config.weapon:
                 weapon.remove()
             else:
                 self.ammo_type = weapon.get_property_int("m_iPrimaryAmmoType")
@@ -147,7 +132,7 @@ class Bot:
             self.controller = None
 
     def get_max_health(self):
-        return self.config.as_int("health")
+        return self.config.health
 
     def tick(self, player_list):
         self.cached_origin = None
@@ -163,9 +148,9 @@ class Bot:
         self.controller.run_player_move(bcmd)
 
         # Refill ammo
-        if self.config.as_int("ammo") > 0 and self.ammo_type != None:
+        if self.config.ammo > 0 and self.ammo_type != None:
             self.bot.set_property_int(
-                f"localdata.m_iAmmo.00{self.ammo_type}", self.config.as_int("ammo")
+                f"localdata.m_iAmmo.00{self.ammo_type}", self.config.ammo
             )
 
         # Don't allow overheal from medics
@@ -196,7 +181,7 @@ class Bot:
 
         bcmd.view_angles = view_angles
 
-        for index in self.bot.weapon_indexes(classname=self.config["weapon"]):
+        for index in self.bot.weapon_indexes(classname=self.config.weapon):
             bcmd.weaponselect = index
 
         return bcmd
@@ -230,8 +215,6 @@ class Bot:
 
         # TODO:
         # - figure out de-aggro from players
-        # - visibility check, dont aggro through walls
-        #   - check if any friendly has vision
         # - prio players over buildings
 
         """
@@ -241,7 +224,7 @@ class Bot:
                 self.aggro_target = None
             elif (
                 self.aggro_target.origin.get_distance(self.get_origin())
-                > self.config.as_float("aggro_range")
+                > self.config.aggro_range
             ):
                 self.aggro_target = None
 
@@ -254,46 +237,28 @@ class Bot:
                     dist = p.origin.get_distance(self.get_origin())
                     if dist < closest_dist:
                         closest_dist = dist
-                        if dist <= self.config.as_float("aggro_range"):
+                        if dist <= self.config.aggro_range:
                             self.aggro_target = p
-                            Logger.instance().log_debug(f"{self.bot.name} aggro to {p.name}")
+                            Logger.instance().log_debug(
+                                "%s aggro to %s", self.bot.name, p.name
+                            )
         """
+        # Closest enemy any friendly has vision of
         self.aggro_target = None
-        closest_dist = float("inf")
+        target = TargetManager.instance().find_target(
+            self.bot.team, self.get_origin(), self.config.aggro_range
+        )
+        if target is not None:
+            self.aggro_target = Entity(target)
+
         closest_friendly = None
         closest_friendly_dist = float("inf")
         for p in player_list:
             if p.dead:
                 continue
 
-            dist = p.origin.get_distance(self.get_origin())
-            if p.team != self.bot.team:
-                if dist < closest_dist:
-                    closest_dist = dist
-                    if dist <= self.config.as_float("aggro_range"):
-                        # Close enough to aggro, check visibility
-                        trace = GameTrace()
-                        engine_trace.trace_ray(
-                            Ray(
-                                self.get_eye_pos(),
-                                p.origin
-                                + Vector(
-                                    0,
-                                    0,
-                                    p.get_property_vector("m_Collision.m_vecMaxs").z,
-                                ),
-                            ),
-                            ContentMasks.PLAYER_SOLID,
-                            TraceFilterSimple(player_list),
-                            trace,
-                        )
-                        if trace.did_hit() and trace.entity.index == 0:
-                            # hit world
-                            pass
-                        else:
-                            self.aggro_target = p
-
-            else:
+            if p.team == self.bot.team:
+                dist = p.origin.get_distance(self.get_origin())
                 if p != self.bot:
                     if dist < 24.0 and dist < closest_friendly_dist:
                         closest_friendly_dist = dist
@@ -315,12 +280,12 @@ class Bot:
         # If have aggro, move towards aggro target if not in range, otherwise attack
         if self.aggro_target != None:
             dist = self.aggro_target.origin.get_distance(self.get_origin())
-            if dist < self.config.as_float("attack_range"):
+            if dist < self.config.attack_range:
                 attack_action = 1
                 forward_move = 0
                 # TODO: this stops working if target is too close,
                 # something wrong with get_distance?
-                if dist < self.config.as_float("attack_range_min"):
+                if dist < self.config.attack_range_min:
                     forward_move = -1
             else:
                 attack_action = 0
@@ -338,6 +303,8 @@ class Bot:
 
         # If no aggro, navigate along lane, or back to the lane if not on it
         start, end = get_closest_lane(self.get_origin(), self.team)
+        if start is None:
+            return forward_move, side_move, attack_action, view_angles
         line = end - start
 
         # Are we on the line?
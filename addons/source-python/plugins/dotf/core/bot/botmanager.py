@@ -12,6 +12,9 @@
 # =============================================================================
 # >> IMPORTS
 # =============================================================================
+# Python
+import time
+
 # Source.Python
 from engines.server import queue_command_string
 from filters.players import PlayerIter
@@ -19,8 +22,17 @@ from mathlib import NULL_VECTOR
 
 # dotf
 from .bot import Bot
+from .scheduler import BotScheduler
 from ..nextbot import NextBotCombatCharacter
 from ..log import Logger
+from ..config import ConfigManager
+from ..helpers import Team, BotType
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Parked bots created per tick to replace killed ones
+POOL_REFILL_PER_TICK = 2
 
 
 class BotManager:
@@ -36,42 +48,144 @@ class BotManager:
         if BotManager.__instance is not None:
             raise Exception("This class is a singleton, use .instance() access method.")
 
-        self.bots = []
+        # index -> bot, in the order they were added
+        self.bots = {}
+        self.bot_handles = {}
+        # Parked bots ready to spawn
+        self.pool = []
+        # Where parked bots are created, None until prewarmed
+        self.pool_origin = None
         self.max_bots = 60
+        scheduler_config = ConfigManager.instance().config.scheduler
+        self.scheduler = BotScheduler(
+            scheduler_config.think_buckets, scheduler_config.think_budget_ms
+        )
+
+        self.reset_stats()
 
         BotManager.__instance = self
 
+    def reset_stats(self):
+        self.pool_hits = 0
+        self.pool_misses = 0
+        # Time spent spawning bots this tick
+        self.spawn_time_ms = 0.0
+        self.last_spawn_tick_ms = 0.0
+        self.max_spawn_tick_ms = 0.0
+
     def add_bot(self):
-        if len(self.bots) >= self.max_bots:
-            Logger.instance().log_debug("ERR: out of bots!")
-            return None
+        """Get a bot to spawn, from the pool if there are parked bots."""
+        if self.pool:
+            bot = self.pool.pop()
+            self.pool_hits += 1
+        else:
+            if len(self.bots) >= self.max_bots:
+                Logger.instance().log_debug("ERR: out of bots!")
+                return None
+            bot = self.create_bot()
+            self.pool_misses += 1
 
-        bot = NextBotCombatCharacter.create()
         # Logger.instance().log_debug(f"Register bot {bot.name}")
-        self.bots.append(bot)
+        self.bots[bot.index] = bot
+        self.bot_handles[bot.inthandle] = bot
+        self.scheduler.add(bot)
+        return bot
+
+    def create_bot(self):
+        bot = NextBotCombatCharacter.create()
+        bot.on_killed = self.on_bot_killed
+        return bot
+
+    def spawn_bot(self, origin, angles, team, bot_type):
+        start = time.perf_counter()
+        bot = self.add_bot()
+        if bot is not None:
+            bot.spawn(origin, angles, team, bot_type)
+        self.spawn_time_ms += (time.perf_counter() - start) * 1000.0
         return bot
 
+    def prewarm(self, origin):
+        """Create parked bots at origin until there are max_bots,
+        so waves don't have to create entities."""
+        start = time.perf_counter()
+        self.pool_origin = origin
+        count = self.refill_pool(self.max_bots)
+        Logger.instance().log_debug(
+            f"Prewarmed {count} bots in {(time.perf_counter() - start) * 1000.0:.3f}ms"
+        )
+
+    def refill_pool(self, limit):
+        """Create up to limit parked bots, until there are max_bots.
+        Returns the number of bots created."""
+        count = 0
+        while count < limit and len(self.bots) + len(self.pool) < self.max_bots:
+            bot = self.create_bot()
+            bot.spawn(self.pool_origin, None, Team.RED, BotType.MELEE)
+            bot.park()
+            self.pool.append(bot)
+            count += 1
+        return count
+
+    def on_bot_killed(self, bot):
+        """Unregister a killed bot, the engine removes it after Event_Killed
+        so it can't go back to the pool. tick() creates a replacement."""
+        if self.bots.get(bot.index) is bot:
+            self.remove_bot_index(bot.index)
+
     def remove_bot(self, bot, kill=False):
         # Logger.instance().log_debug(f"Unregister bot {bot.name}")
-        self.bots.remove(bot)
+        self.remove_bot_index(bot.index)
 
     def remove_bot_index(self, index):
-        for bot in self.bots:
-            if bot.index == index:
-                self.bots.remove(bot)
+        bot = self.bots.pop(index, None)
+        if bot is None:
+            # Parked bot removed by the engine
+            self.pool = [bot for bot in self.pool if bot.index != index]
+            return
+        self.bot_handles.pop(bot.inthandle, None)
+        self.scheduler.remove(bot)
 
     def clear(self):
         Logger.instance().log_debug("Clear bots")
-        for bot in self.bots:
+        for bot in self.bots.values():
+            bot.remove_hooks()
+        for bot in self.pool:
             bot.remove_hooks()
         self.bots.clear()
+        self.bot_handles.clear()
+        self.pool.clear()
+        self.pool_origin = None
+        self.scheduler.clear()
         queue_command_string("nb_delete_all")
 
+    def apply_config(self, config):
+        self.scheduler.set_buckets(config.scheduler.think_buckets)
+        self.scheduler.budget_ms = config.scheduler.think_budget_ms
+        for bot in self.bots.values():
+            bot.apply_config(config.bots[bot.bot_type])
+
     def bot_from_index(self, index):
-        for bot in self.bots:
-            if bot.index == index:
-                return bot
-        return None
+        return self.bots.get(index)
+
+    def bot_from_inthandle(self, inthandle):
+        return self.bot_handles.get(inthandle)
 
     def tick(self):
-        pass
+        if self.spawn_time_ms > 0.0:
+            self.last_spawn_tick_ms = self.spawn_time_ms
+            self.max_spawn_tick_ms = max(self.max_spawn_tick_ms, self.spawn_time_ms)
+            self.spawn_time_ms = 0.0
+        elif self.pool_origin is not None:
+            # Not on ticks a wave is spawning on
+            self.refill_pool(POOL_REFILL_PER_TICK)
+        self.scheduler.tick()
+
+    def get_pool_stats(self):
+        return {
+            "active": len(self.bots),
+            "parked": len(self.pool),
+            "hits": self.pool_hits,
+            "misses": self.pool_misses,
+            "last_spawn_tick_ms": self.last_spawn_tick_ms,
+            "max_spawn_tick_ms": self.max_spawn_tick_ms,
+        }
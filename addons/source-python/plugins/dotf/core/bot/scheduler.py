@@ -0,0 +1,147 @@
+"""
+================================================================
+    * core/bot/scheduler.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Batched bot thinking with a per-tick time budget
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import time
+
+
+class BotScheduler:
+    """Runs bot.think() for all bots from a single place once per tick.
+
+    Bots are split round-robin into buckets and one bucket thinks per tick,
+    so every bot thinks once every `bucket_count` ticks. Bots that don't fit
+    in the tick's time budget are deferred to the start of the next tick."""
+
+    def __init__(self, bucket_count=1, budget_ms=0.0):
+        self.bucket_count = max(1, bucket_count)
+        # 0 for unlimited
+        self.budget_ms = budget_ms
+        self.buckets = [[] for _ in range(self.bucket_count)]
+        self.bots = {}
+        self.bot_buckets = {}
+        self.deferred = []
+        self.deferred_indexes = set()
+        self.next_bucket = 0
+        self.tick_count = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.last_processed = 0
+        self.last_deferred = 0
+        self.last_time_ms = 0.0
+        self.max_time_ms = 0.0
+        self.total_processed = 0
+        self.total_deferred = 0
+        self.total_time_ms = 0.0
+        self.stat_ticks = 0
+
+    def add(self, bot):
+        bucket = self.next_bucket
+        self.next_bucket = (self.next_bucket + 1) % self.bucket_count
+        self.bots[bot.index] = bot
+        self.bot_buckets[bot.index] = bucket
+        self.buckets[bucket].append(bot)
+
+    def remove(self, bot):
+        if self.bots.get(bot.index) is not bot:
+            return
+        del self.bots[bot.index]
+        self.buckets[self.bot_buckets.pop(bot.index)].remove(bot)
+        # Deferred entries are skipped when they're no longer registered
+        self.deferred_indexes.discard(bot.index)
+
+    def set_buckets(self, bucket_count):
+        """Change the bucket count, spreading current bots over the new buckets."""
+        bucket_count = max(1, bucket_count)
+        if bucket_count == self.bucket_count:
+            return
+        bots = list(self.bots.values())
+        self.bucket_count = bucket_count
+        self.buckets = [[] for _ in range(self.bucket_count)]
+        self.bots.clear()
+        self.bot_buckets.clear()
+        self.next_bucket = 0
+        for bot in bots:
+            self.add(bot)
+
+    def clear(self):
+        for bucket in self.buckets:
+            bucket.clear()
+        self.bots.clear()
+        self.bot_buckets.clear()
+        self.deferred.clear()
+        self.deferred_indexes.clear()
+        self.next_bucket = 0
+
+    def tick(self):
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000.0 if self.budget_ms > 0 else None
+
+        self.tick_count += 1
+        bucket = self.buckets[self.tick_count % self.bucket_count]
+
+        # Bots left over from the last tick go first
+        work = self.deferred
+        deferred_indexes = self.deferred_indexes
+        for bot in bucket:
+            if bot.index not in deferred_indexes:
+                work.append(bot)
+        self.deferred = []
+        self.deferred_indexes = set()
+
+        processed = 0
+        for i, bot in enumerate(work):
+            if self.bots.get(bot.index) is not bot:
+                # Removed while deferred
+                continue
+
+            # Always let at least one bot think so nothing starves
+            if (
+                deadline is not None
+                and processed > 0
+                and time.perf_counter() > deadline
+            ):
+                for deferred in work[i:]:
+                    if self.bots.get(deferred.index) is deferred:
+                        self.deferred.append(deferred)
+                        self.deferred_indexes.add(deferred.index)
+                break
+
+            bot.think()
+            processed += 1
+
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.last_processed = processed
+        self.last_deferred = len(self.deferred)
+        self.last_time_ms = elapsed_ms
+        self.max_time_ms = max(self.max_time_ms, elapsed_ms)
+        self.total_processed += processed
+        self.total_deferred += self.last_deferred
+        self.total_time_ms += elapsed_ms
+        self.stat_ticks += 1
+
+    def get_stats(self):
+        ticks = max(1, self.stat_ticks)
+        return {
+            "bots": len(self.bots),
+            "buckets": self.bucket_count,
+            "budget_ms": self.budget_ms,
+            "last_processed": self.last_processed,
+            "last_deferred": self.last_deferred,
+            "last_time_ms": self.last_time_ms,
+            "max_time_ms": self.max_time_ms,
+            "avg_processed": self.total_processed / ticks,
+            "avg_deferred": self.total_deferred / ticks,
+            "avg_time_ms": self.total_time_ms / ticks,
+        }
@@ -27,7 +27,7 @@ SENTRY_TARGETNAME = "dotf_sentrygun"
 class BuildingManager:
     __instance = None
 
-    sentries = []
+    sentries = {}
 
     def instance():
         """Singleton instance"""
@@ -39,21 +39,39 @@ class BuildingManager:
         if BuildingManager.__instance is not None:
             raise Exception("This class is a singleton, use .instance() access method.")
 
-        self.sentries = []
+        # index -> sentry, in the order they were added
+        self.sentries = {}
+        self.sentry_handles = {}
 
         BuildingManager.__instance = self
 
     def spawn_sentry(self, origin, angles, team, lane, tier):
         sentry = Sentry.create()
         sentry.spawn(origin, angles, team, lane, tier)
-        print(
-            f"[dotf] Spawn sentry - team: {team}, lane: {lane}, tier: {tier}, origin: {origin}, angles: {angles}"
+        Logger.instance().log_debug(
+            "Spawn sentry - team: %s, lane: %s, tier: %s, origin: %s, angles: %s",
+            team,
+            lane,
+            tier,
+            origin,
+            angles,
         )
-        self.sentries.append(sentry)
+        self.sentries[sentry.index] = sentry
+        self.sentry_handles[sentry.inthandle] = sentry
+
+    def apply_config(self, config):
+        for sentry in self.sentries.values():
+            sentry.apply_config(config.sentry_tiers[sentry.tier])
 
     def remove_sentry(self, sentry):
-        Logger.instance().log_debug(f"Unregister sentry {sentry.entity.target_name}")
-        self.sentries.remove(sentry)
+        Logger.instance().log_debug("Unregister sentry %s", sentry.target_name)
+        self.remove_sentry_index(sentry.index)
+
+    def remove_sentry_index(self, index):
+        sentry = self.sentries.pop(index, None)
+        if sentry is None:
+            return
+        self.sentry_handles.pop(sentry.inthandle, None)
 
     def destroy_all(self):
         for entity in EntityIter():
@@ -65,16 +83,17 @@ class BuildingManager:
     def clear(self):
         Logger.instance().log_debug("Clear buildings")
         self.sentries.clear()
+        self.sentry_handles.clear()
         self.destroy_all()
 
     def sentry_from_index(self, index):
-        for sentry in self.sentries:
-            if sentry.index == index:
-                return sentry
-        return None
+        return self.sentries.get(index)
+
+    def sentry_from_inthandle(self, inthandle):
+        return self.sentry_handles.get(inthandle)
 
     def tick(self):
-        for sentry in self.sentries:
+        for sentry in self.sentries.values():
             sentry.tick()
         pass
 
@@ -13,7 +13,6 @@
 # >> IMPORTS
 # =============================================================================
 # Python
-from configobj import ConfigObj
 from inspect import stack
 from pprint import pprint
 from engines.trace import engine_trace, Ray, ContentMasks, TraceFilterSimple, GameTrace
@@ -38,13 +37,14 @@ from filters.players import PlayerIter
 # dotf
 from ..log import Logger
 from ..helpers import get_closest_lane, closest_point_on_line_segment, Team
-from ..constants.paths import CFG_PATH
+from ..helpers.functiontable import FunctionTable
+from ..helpers.membertable import MemberTable
+from ..helpers.hookdispatcher import HookDispatcher
+from ..config import ConfigManager
 
 # =============================================================================
 # >> GLOBAL VARIABLES
 # =============================================================================
-building_config = ConfigObj(CFG_PATH + "/building_settings.ini")
-
 SENTRY_CLASSNAME = "obj_sentrygun"
 SENTRY_TARGET_NAME = "dotf_sentrygun"
 SENTRY_SERVER_CLASS = "CObjectSentrygun"
@@ -100,6 +100,8 @@ SENTRY_VIRTUALS = (
     },
 )
 
+SENTRY_FUNCTIONS = FunctionTable("Sentry", SENTRY_VIRTUALS)
+
 SENTRY_MEMBERS = (
     {
         "name": "m_flSentryRange",
@@ -117,8 +119,13 @@ SENTRY_MEMBERS = (
     },
 )
 
+SENTRY_MEMBER_TABLE = MemberTable(SENTRY_SERVER_CLASS, SENTRY_MEMBERS)
+SENTRY_KILLED_HOOK = HookDispatcher("Sentry Event_Killed")
+
 
 class Sentry(Entity):
+    m_flSentryRange = SENTRY_MEMBER_TABLE.property("m_flSentryRange")
+
     @staticmethod
     def create():
         # Logger.instance().log_debug("Sentry create")
@@ -129,51 +136,14 @@ class Sentry(Entity):
     def __init__(self, index, caching=True):
         # Logger.instance().log_debug("Sentry __init__")
         super().__init__(index, caching)
-        self.virtuals = []
+        self.functions = SENTRY_FUNCTIONS.get(get_object_pointer(self))
+        SENTRY_MEMBER_TABLE.resolve(self)
 
     def get_member_pointer(self, name):
-        for member in SENTRY_MEMBERS:
-            if member["name"] == name:
-                for networked in self.server_class.find_server_class(
-                    SENTRY_SERVER_CLASS
-                ).table:
-                    if networked.name == member["relative"]:
-                        if member["reverse"] != None:
-                            return Pointer(
-                                self.pointer + networked.offset - member["offset"]
-                            )
-                        return Pointer(
-                            self.pointer + networked.offset + member["offset"]
-                        )
-
-        return None
+        return SENTRY_MEMBER_TABLE.get_pointer(self, name)
 
     def get_virtual(self, name):
-        # Already created?
-        for virtual in self.virtuals:
-            if virtual["name"] == name:
-                return virtual["func"]
-
-        # Create
-        for virtual in SENTRY_VIRTUALS:
-            if virtual["name"] == name:
-                # Logger.instance().log_debug(f"Sentry create virtual {name}")
-                func = get_object_pointer(self).make_virtual_function(
-                    virtual["index"],
-                    virtual["convention"],
-                    virtual["args"],
-                    virtual["return"],
-                )
-                self.virtuals.append(
-                    {
-                        "name": name,
-                        "func": func,
-                    }
-                )
-                return func
-
-        # Invalid
-        return None
+        return self.functions.get(name)
 
     # =============================================================================
     # >> VIRTUALS
@@ -199,7 +169,7 @@ class Sentry(Entity):
         self.lane = lane
         self.tier = tier
         self.team = team
-        self.config = building_config["sentry"][f"{self.tier}"]
+        self.config = ConfigManager.instance().config.sentry_tiers[self.tier]
 
         # Spawn!
         self.get_virtual("Spawn").__call__(self)
@@ -209,9 +179,9 @@ class Sentry(Entity):
         self.get_virtual("Activate").__call__(self)
 
         # health gets reset in Spawn
-        self.set_property_int("m_iMaxHealth", self.config.as_int("health"))
+        self.set_property_int("m_iMaxHealth", self.config.health)
         self.call_input(
-            "SetHealth", self.config.as_int("health")
+            "SetHealth", self.config.health
         )  # Buildings do weird stuff with health
 
         # set level and prevent upgrades
@@ -222,12 +192,13 @@ class Sentry(Entity):
         self.set_property_bool("m_bDisposableBuilding", True)
 
         # Setup hooks
-        self.get_virtual("Event_Killed").add_pre_hook(self.pre_killed)
+        SENTRY_KILLED_HOOK.add(
+            self.get_virtual("Event_Killed"),
+            get_object_pointer(self).address,
+            self.pre_killed,
+        )
 
     def pre_killed(self, stack_data):
-        if stack_data[0].address != get_object_pointer(self).address:
-            return
-
         # For some reason this gets called when
         # the sentry takes damage for the first time.
         if self.get_property_int("m_iHealth") > 0:
@@ -235,17 +206,25 @@ class Sentry(Entity):
 
         self.remove_hooks()
 
+    def apply_config(self, config):
+        """Switch to new tier settings while alive, keeping the health fraction."""
+        max_health = self.get_property_int("m_iMaxHealth")
+        health = self.get_property_int("m_iHealth")
+        self.config = config
+        self.set_property_int("m_iMaxHealth", config.health)
+        if max_health > 0 and health > 0:
+            self.call_input("SetHealth", max(1, health * config.health // max_health))
+        self.set_range()
+
     def set_range(self):
-        self.get_member_pointer("m_flSentryRange").set_float(
-            self.config.as_float("range")
-        )
+        self.m_flSentryRange = self.config.range
 
     def remove_hooks(self):
         # Logger.instance().log_debug(f"Sentry remove_hooks")
-        self.get_virtual("Event_Killed").remove_pre_hook(self.pre_killed)
+        SENTRY_KILLED_HOOK.remove(get_object_pointer(self).address)
 
     def get_damage(self):
-        return self.config.as_float("damage")
+        return self.config.damage
 
     def tick(self):
         # Refill ammo
@@ -34,7 +34,9 @@ class CommandHandler:
             raise Exception("This class is a singleton, use .instance() access method.")
 
         self.command_list = []
-        self.prefix = ["/", "!"]
+        # name or alias -> Command
+        self.commands = {}
+        self.prefix = {"/", "!"}
 
         CommandHandler.__instance = self
 
@@ -67,28 +69,24 @@ class CommandHandler:
             visibility,
         )
         self.command_list.append(command)
-        Logger.instance().log_debug(f"Registered command: '{command.name}'")
+        for name in (command.name, *command.alias):
+            self.commands[name] = command
+        Logger.instance().log_debug("Registered command: '%s'", command.name)
 
     def execute_command(self, command, user, args):
         """Execute command if player has permissions."""
 
-        required_args = 0
-        for arg in command.args:
-            if arg.required:
-                required_args += 1
-
-        if len(args) < required_args:
+        if len(args) < command.required_args:
             return "Usage: " + command.usage
 
-        for i in range(0, len(command.args)):
+        # Parsed per call, callbacks get their own values
+        values = []
+        for i, argument in enumerate(command.args):
+            arg = args[i] if i < len(args) else None
             try:
-                arg = args[i]
-            except IndexError:
-                arg = None
-            if not command.args[i].validate(arg):
-                return (
-                    f"Invalid argument {arg}, must be type {command.args[i].arg_type}"
-                )
+                values.append(argument.parse(arg))
+            except ValueError:
+                return f"Invalid argument {arg}, must be type {argument.arg_type}"
 
         if not user:
             return
@@ -99,34 +97,27 @@ class CommandHandler:
         # if player.State in command.disallowed_states:
         #    return "State not allowed"
 
-        # Starting a new message before ending previous
-        # will crash the server if this is called from SayText2 hook.
-        user.player.delay(0.0, command.callback, (user, command))
-        # command.callback(user, command)
+        # Run after the say command, callbacks send messages of their own
+        user.player.delay(0.0, command.callback, (user, command, values))
+        # command.callback(user, command, values)
 
-    def check_command(self, message, player):
-        # Message should be "<prefix><command> *args"
-        message = message.split()
-        command = message[0]
-        try:
-            args = message[1:]
-        except IndexError:
-            args = []
+    def parse_command(self, text):
+        """Command and args of chat text, (None, None) if it isn't a command."""
+        # Text should be "<prefix><command> *args"
+        if len(text) < 2 or text[0] not in self.prefix:
+            return None, None
 
-        command = self.get_command(command)
-        if command is None:
-            return
+        message = text[1:].split()
+        if not message:
+            return None, None
 
-        return self.execute_command(command, player, args)
+        command = self.commands.get(message[0])
+        if command is None:
+            return None, None
+        return command, message[1:]
 
-    def get_command(self, message):
-        for cmd in self.command_list:
-            if cmd.name == message:
-                return cmd
-            for alias in cmd.alias:
-                if alias == message:
-                    return cmd
-        return None
+    def get_command(self, name):
+        return self.commands.get(name)
 
 
 # =============================================================================
@@ -158,6 +149,7 @@ class Command:
 
         # Arguments
         self.args = args
+        self.required_args = sum(1 for arg in args if arg.required)
 
         # To restrict commands based on player state (alive, spectate etc.)
         self.disallowed_states = disallowed_states
@@ -188,14 +180,18 @@ class Argument:
         assert arg_type in [str, bool, int, float]
         self.arg_type = arg_type
         self.required = required
-        self.value = default
+        self.default = default
 
-    def validate(self, arg):
-        """Validate passed argument"""
+    def parse(self, arg):
+        """Value of passed argument, default if it's missing.
+        Raises ValueError if it's invalid or a required one is missing."""
 
-        try:
-            self.value = self.arg_type(arg)
-        except (ValueError, TypeError):
-            self.value = None
+        if arg is None:
+            if self.required:
+                raise ValueError("missing required argument")
+            return self.default
 
-        return not (self.value is None and self.required)
+        try:
+            return self.arg_type(arg)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"invalid argument {arg!r}") from e
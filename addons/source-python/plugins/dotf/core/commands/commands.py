@@ -21,27 +21,28 @@ from filters.players import PlayerIter
 from .clientcommands import CommandHandler, Argument
 from ..chat.messages import message_help, message_start
 from ..game.gamemanager import GameManager
-from ..nextbot.nextbot import NextBotCombatCharacter
+from ..bot.botmanager import BotManager
 from ..helpers import Team
 
 
 # =============================================================================
 # >> COMMAND CALLBACK HANDLERS
 # =============================================================================
-def _help_handler(user, command):
+def _help_handler(user, command, args):
     """Called when player uses /r command."""
 
     message_help.send(user.player.index)
 
 
-def _start_handler(user, command):
+def _start_handler(user, command, args):
     """Start game"""
     GameManager.instance().start_game()
     message_start.send(user.player.index)
 
 
-def _test_handler(user, command):
-    if command.args[0].value != Team.BLU and command.args[0].value != Team.RED:
+def _test_handler(user, command, args):
+    team = args[0]
+    if team != Team.BLU and team != Team.RED:
         return
     trace = GameTrace()
     engine_trace.trace_ray(
@@ -54,8 +55,10 @@ def _test_handler(user, command):
         trace,
     )
     if trace.did_hit() and trace.entity.index == 0:
-        bot = NextBotCombatCharacter.create()
-        bot.spawn(trace.end_position, user.player.angles, command.args[0].value)
+        bot = BotManager.instance().add_bot()
+        if bot is None:
+            return
+        bot.spawn(trace.end_position, user.player.angles, team)
 
 
 # =============================================================================
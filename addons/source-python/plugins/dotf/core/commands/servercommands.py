@@ -0,0 +1,143 @@
+"""
+================================================================
+    * core/commands/servercommands.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Server console commands
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Source.Python
+from commands.server import ServerCommand
+from core import echo_console
+
+# dotf
+from ..bot.botmanager import BotManager
+from ..config import ConfigManager
+from ..game.gamemanager import GameManager
+from ..perf import Profiler
+from ..sounds import SoundFilter
+from ..targeting import TargetManager
+from ..tempentities import TempEntityGovernor
+
+
+# =============================================================================
+# >> SERVER COMMANDS
+# =============================================================================
+@ServerCommand("dotf_bot_stats")
+def _bot_stats_command(command):
+    """Print bot scheduler and pool stats."""
+    stats = BotManager.instance().scheduler.get_stats()
+    echo_console(
+        f"[dotf] bots: {stats['bots']}, buckets: {stats['buckets']}, "
+        f"budget: {stats['budget_ms']:.2f}ms"
+    )
+    echo_console(
+        f"[dotf]   last tick: {stats['last_processed']} processed, "
+        f"{stats['last_deferred']} deferred, {stats['last_time_ms']:.3f}ms"
+    )
+    echo_console(
+        f"[dotf]   average:   {stats['avg_processed']:.1f} processed, "
+        f"{stats['avg_deferred']:.1f} deferred, {stats['avg_time_ms']:.3f}ms "
+        f"(max {stats['max_time_ms']:.3f}ms)"
+    )
+    pool = BotManager.instance().get_pool_stats()
+    echo_console(
+        f"[dotf]   pool: {pool['active']} active, {pool['parked']} parked, "
+        f"{pool['hits']} hits, {pool['misses']} misses"
+    )
+    echo_console(
+        f"[dotf]   spawn tick: {pool['last_spawn_tick_ms']:.3f}ms "
+        f"(max {pool['max_spawn_tick_ms']:.3f}ms)"
+    )
+
+
+@ServerCommand("dotf_reload_config")
+def _reload_config_command(command):
+    """Reload the config files and apply them to everything that's alive."""
+    if ConfigManager.instance().reload():
+        GameManager.instance().apply_config()
+        echo_console("[dotf] config reloaded")
+    else:
+        echo_console("[dotf] config is invalid, see the log")
+
+
+@ServerCommand("dotf_target_stats")
+def _target_stats_command(command):
+    """Print targeting stats of the last tick."""
+    stats = TargetManager.instance().get_stats()
+    echo_console(
+        f"[dotf] units: {stats['units']} in {stats['cells']} cells, "
+        f"queries: {stats['queries']}"
+    )
+    echo_console(
+        f"[dotf]   sight: {stats['traces']} traces, {stats['cache_hits']} cached, "
+        f"{stats['budget_misses']} over budget, {stats['cached_pairs']} pairs"
+    )
+    visible = ", ".join(
+        f"team {team}: {count}" for team, count in stats["visible"].items()
+    )
+    echo_console(
+        f"[dotf]   vision: {stats['vision_checks']} checks, visible {visible or '-'}"
+    )
+
+
+@ServerCommand("dotf_perf")
+def _perf_command(command):
+    """Print subsystem timings of the latest calls, "dotf_perf reset" to reset."""
+    if len(command) > 1 and command[1] == "reset":
+        Profiler.instance().reset()
+        echo_console("[dotf] timings reset")
+        return
+
+    echo_console(
+        f"[dotf] {'subsystem':32} {'calls':>9} {'p50':>9} {'p95':>9} {'max':>9}"
+    )
+    for name, stats in Profiler.instance().get_stats().items():
+        if stats["calls"] == 0:
+            continue
+        echo_console(
+            f"[dotf] {name:32} {stats['calls']:9} {stats['p50']:7.3f}ms "
+            f"{stats['p95']:7.3f}ms {stats['max']:7.3f}ms"
+        )
+
+
+@ServerCommand("dotf_sound_stats")
+def _sound_stats_command(command):
+    """Print sound rule hits, "dotf_sound_stats reset" to reset."""
+    if len(command) > 1 and command[1] == "reset":
+        SoundFilter.instance().reset()
+        echo_console("[dotf] sound stats reset")
+        return
+
+    stats = SoundFilter.instance().get_stats()
+    echo_console(
+        f"[dotf] sound rules: {stats['rules']}, cached files: {stats['cached']}, "
+        f"{stats['cache_hits']} hits, {stats['cache_misses']} misses"
+    )
+    for name, hits in stats["hits"].items():
+        echo_console(f"[dotf]   {name:32} {hits:9}")
+
+
+@ServerCommand("dotf_te_stats")
+def _te_stats_command(command):
+    """Print temp entities sent and dropped, "dotf_te_stats reset" to reset."""
+    if len(command) > 1 and command[1] == "reset":
+        TempEntityGovernor.instance().reset()
+        echo_console("[dotf] temp entity stats reset")
+        return
+
+    echo_console(
+        f"[dotf] {'temp entity':24} {'sent':>9} {'blocked':>9} "
+        f"{'limited':>9} {'culled':>9}"
+    )
+    stats = TempEntityGovernor.instance().get_stats()
+    for name, (sent, blocked, limited, culled) in stats.items():
+        echo_console(
+            f"[dotf] {name:24} {sent:9} {blocked:9} {limited:9} {culled:9}"
+        )
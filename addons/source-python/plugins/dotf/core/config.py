@@ -0,0 +1,529 @@
+"""
+================================================================
+    * core/config.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Typed, read-only snapshot of the dotf .ini files.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import os
+import re
+from dataclasses import dataclass, fields
+from threading import Event, Lock, Thread
+from types import MappingProxyType
+from configobj import ConfigObj
+
+# dotf
+from .helpers.enums import BotType
+from .constants import CFG_PATH
+from .log import Logger
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+CONFIG_FILES = (
+    "bot_settings.ini",
+    "building_settings.ini",
+    "game_settings.ini",
+    "player_settings.ini",
+)
+
+# Seconds between config file mtime checks
+CONFIG_POLL_INTERVAL = 1.0
+
+BOT_PROFILE_SECTIONS = {
+    BotType.MELEE: "bot_melee",
+    BotType.RANGED: "bot_ranged",
+}
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class ConfigError(ValueError):
+    """Raised when a config file is missing values or has invalid ones."""
+
+
+@dataclass(frozen=True)
+class BotProfile:
+    __slots__ = (
+        "health",
+        "damage",
+        "attack_range",
+        "attack_range_min",
+        "aggro_range",
+        "player_class",
+        "model",
+        "model_scale",
+        "model_skin_blu",
+        "model_skin_red",
+        "model_anim_move",
+        "model_anim_attack",
+        "weapon",
+        "ammo",
+        "move_speed",
+        "pose_param_epsilon",
+        "lane_cursor_range",
+    )
+    health: int
+    damage: float
+    attack_range: float
+    attack_range_min: float
+    aggro_range: float
+    player_class: int
+    model: str
+    model_scale: float
+    model_skin_blu: int
+    model_skin_red: int
+    model_anim_move: str
+    model_anim_attack: str
+    weapon: str
+    ammo: int
+    move_speed: float
+    pose_param_epsilon: float
+    lane_cursor_range: float
+
+
+@dataclass(frozen=True)
+class SchedulerSettings:
+    __slots__ = ("think_buckets", "think_budget_ms")
+    think_buckets: int
+    think_budget_ms: float
+
+
+@dataclass(frozen=True)
+class TargetingSettings:
+    __slots__ = (
+        "cell_size",
+        "los_ttl",
+        "trace_budget",
+        "vision_range",
+        "vision_interval",
+    )
+    cell_size: float
+    los_ttl: int
+    trace_budget: int
+    vision_range: float
+    vision_interval: int
+
+
+@dataclass(frozen=True)
+class SentryTier:
+    __slots__ = ("health", "range", "damage")
+    health: int
+    range: float
+    damage: float
+
+
+@dataclass(frozen=True)
+class GameTiming:
+    __slots__ = ("bot_wave_interval", "wave_spawns_per_tick")
+    bot_wave_interval: int
+    wave_spawns_per_tick: int
+
+
+@dataclass(frozen=True)
+class ClassSettings:
+    __slots__ = (
+        "health",
+        "damage_deal_mult",
+        "damage_take_mult",
+        "heal_deal_mult",
+        "heal_take_mult",
+        "regen",
+        "regen_interval",
+    )
+    health: int
+    damage_deal_mult: float
+    damage_take_mult: float
+    heal_deal_mult: float
+    heal_take_mult: float
+    regen: int
+    regen_interval: int
+
+
+@dataclass(frozen=True)
+class SoundRule:
+    __slots__ = ("name", "pattern", "replacement")
+    name: str
+    pattern: str
+    # Sound file played instead, None to block the sound
+    replacement: str
+
+
+@dataclass(frozen=True)
+class TempEntitySettings:
+    __slots__ = ("blocked", "cosmetic", "cull_range", "rate_limits")
+    blocked: frozenset
+    # Dropped with no living human player in cull_range, 0 to disable
+    cosmetic: frozenset
+    cull_range: float
+    # name -> max sent per tick
+    rate_limits: MappingProxyType
+
+
+@dataclass(frozen=True)
+class Config:
+    __slots__ = (
+        "bots",
+        "scheduler",
+        "targeting",
+        "sentry_tiers",
+        "time",
+        "classes",
+        "banned_classes",
+        "sound_rules",
+        "temp_entities",
+    )
+    # BotType -> BotProfile
+    bots: MappingProxyType
+    scheduler: SchedulerSettings
+    targeting: TargetingSettings
+    # tier -> SentryTier
+    sentry_tiers: MappingProxyType
+    time: GameTiming
+    # player class -> ClassSettings
+    classes: MappingProxyType
+    banned_classes: frozenset
+    # SoundRules, block rules first
+    sound_rules: tuple
+    temp_entities: TempEntitySettings
+
+
+class ConfigManager:
+    """Holds the current Config. reload() replaces it as a whole,
+    so readers never see a partially loaded config.
+
+    While watching, a background thread polls the config files and
+    loads them again when they change. The result is only swapped in
+    by apply_pending() on the main thread, between ticks."""
+
+    __instance = None
+
+    def instance():
+        """Singleton instance"""
+        if ConfigManager.__instance is None:
+            ConfigManager()
+        return ConfigManager.__instance
+
+    def __init__(self):
+        if ConfigManager.__instance is not None:
+            raise Exception("This class is a singleton, use .instance() access method.")
+
+        # Fail plugin load on a broken config
+        self.config = load_config()
+
+        # (Config or None, error or None) from the watcher thread
+        self.pending = None
+        self.pending_lock = Lock()
+        self.watcher = None
+        self.watcher_stop = Event()
+
+        ConfigManager.__instance = self
+
+    def reload(self):
+        """Load the config files again. Returns False and keeps
+        the current config if they are invalid."""
+        try:
+            config = load_config(self.config)
+        except ConfigError as e:
+            Logger.instance().log_warning(f"Config not reloaded: {e}")
+            return False
+
+        self.config = config
+        Logger.instance().log_info("Config reloaded")
+        return True
+
+    def start_watching(self, interval=CONFIG_POLL_INTERVAL):
+        if self.watcher is not None:
+            return
+        self.watcher_stop.clear()
+        self.watcher = Thread(
+            target=self._watch, args=(interval,), name="dotf config", daemon=True
+        )
+        self.watcher.start()
+
+    def stop_watching(self):
+        if self.watcher is None:
+            return
+        self.watcher_stop.set()
+        self.watcher.join()
+        self.watcher = None
+
+    def apply_pending(self):
+        """Swap in a config loaded by the watcher, call on the main thread.
+        Returns True if the config changed."""
+        if self.pending is None:
+            return False
+
+        with self.pending_lock:
+            config, error = self.pending
+            self.pending = None
+
+        if error is not None:
+            Logger.instance().log_warning(f"Config not reloaded: {error}")
+            return False
+
+        self.config = config
+        Logger.instance().log_info("Config files changed, reloaded")
+        return True
+
+    def _watch(self, interval):
+        """Watcher thread. Doesn't touch the engine or the logger."""
+        loaded = get_config_mtimes()
+        previous = loaded
+        while not self.watcher_stop.wait(interval):
+            mtimes = get_config_mtimes()
+            # Wait for the files to stay the same for one interval
+            # so we don't load half written files.
+            if mtimes != previous:
+                previous = mtimes
+                continue
+            if mtimes == loaded:
+                continue
+
+            loaded = mtimes
+            try:
+                pending = (load_config(self.config), None)
+            except ConfigError as e:
+                pending = (None, str(e))
+            with self.pending_lock:
+                self.pending = pending
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def _parse_section(cls, section, path, errors, keys=None):
+    """Build a cls from a ConfigObj section, appending problems to errors.
+    keys maps field names to ini keys where they differ."""
+    if keys is None:
+        keys = {}
+    values = {}
+    for field in fields(cls):
+        key = keys.get(field.name, field.name)
+        if key not in section:
+            errors.append(f"{path}: missing '{key}'")
+            continue
+        try:
+            values[field.name] = field.type(section[key])
+        except (TypeError, ValueError):
+            errors.append(
+                f"{path}.{key}: expected {field.type.__name__}, got {section[key]!r}"
+            )
+
+    if len(values) != len(fields(cls)):
+        return None
+    return cls(**values)
+
+
+def _parse_key(key, path, errors):
+    """Numbered subsections, i.e. sentry tiers and player classes."""
+    try:
+        return int(key)
+    except ValueError:
+        errors.append(f"{path}: [[{key}]] is not a number")
+        return None
+
+
+def _get_section(config, name, path, errors):
+    if name not in config.sections:
+        errors.append(f"{path}: missing section [{name}]")
+        return None
+    return config[name]
+
+
+def _parse_sound_rules(section, path, errors):
+    """Block rules are name = pattern,
+    replace rules name = pattern, replacement."""
+    rules = []
+    for kind in ("block", "replace"):
+        if kind not in section.sections:
+            continue
+        for name, value in section[kind].items():
+            rule_path = f"{path}[{kind}].{name}"
+            if kind == "block":
+                replacement = None
+                pattern = value
+            elif isinstance(value, list) and len(value) == 2:
+                pattern, replacement = value
+            else:
+                errors.append(f"{rule_path}: expected pattern, replacement")
+                continue
+            if not isinstance(pattern, str):
+                errors.append(f"{rule_path}: expected a pattern, got {pattern!r}")
+                continue
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                errors.append(f"{rule_path}: invalid pattern: {e}")
+                continue
+            rules.append(SoundRule(name, pattern, replacement))
+    return tuple(rules)
+
+
+def _parse_temp_entities(section, path, errors):
+    names = {}
+    for key in ("blocked", "cosmetic"):
+        try:
+            names[key] = frozenset(name for name in section.as_list(key) if name)
+        except KeyError:
+            errors.append(f"{path}: missing '{key}'")
+            names[key] = frozenset()
+
+    cull_range = 0.0
+    try:
+        cull_range = float(section["cull_range"])
+    except KeyError:
+        errors.append(f"{path}: missing 'cull_range'")
+    except (TypeError, ValueError):
+        errors.append(
+            f"{path}.cull_range: expected float, got {section['cull_range']!r}"
+        )
+
+    rate_limits = {}
+    if "rate_limits" in section.sections:
+        for name, limit in section["rate_limits"].items():
+            try:
+                rate_limits[name] = int(limit)
+            except (TypeError, ValueError):
+                errors.append(
+                    f"{path}[rate_limits].{name}: expected int, got {limit!r}"
+                )
+
+    return TempEntitySettings(
+        blocked=names["blocked"],
+        cosmetic=names["cosmetic"],
+        cull_range=cull_range,
+        rate_limits=MappingProxyType(rate_limits),
+    )
+
+
+def _check_removed(sentry_tiers, classes, current, errors):
+    """Sentries and players keep their tier and class over a reload,
+    so none of the current ones can be removed.
+    Bot types can't be, every one in BOT_PROFILE_SECTIONS is required."""
+    for path, new, old in (
+        ("building_settings.ini [sentry]", sentry_tiers, current.sentry_tiers),
+        ("player_settings.ini [class_settings]", classes, current.classes),
+    ):
+        for key in sorted(old.keys() - new.keys()):
+            errors.append(f"{path}: [[{key}]] is in use and can't be removed")
+
+
+def get_config_mtimes():
+    mtimes = []
+    for file in CONFIG_FILES:
+        try:
+            mtimes.append(os.stat(CFG_PATH + f"/{file}").st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def load_config(current=None):
+    """Load and validate all dotf config files into a Config.
+    When reloading, current is the Config in use."""
+    errors = []
+    files = {}
+    for file in CONFIG_FILES:
+        try:
+            files[file] = ConfigObj(CFG_PATH + f"/{file}", file_error=True)
+        except (IOError, SyntaxError) as e:
+            errors.append(f"{file}: {e}")
+    if errors:
+        raise ConfigError("; ".join(errors))
+
+    bot_config = files["bot_settings.ini"]
+    bots = {}
+    for bot_type, name in BOT_PROFILE_SECTIONS.items():
+        path = f"bot_settings.ini [{name}]"
+        section = _get_section(bot_config, name, path, errors)
+        if section is not None:
+            bots[bot_type] = _parse_section(
+                BotProfile, section, path, errors, {"player_class": "class"}
+            )
+
+    scheduler = None
+    path = "bot_settings.ini [scheduler]"
+    section = _get_section(bot_config, "scheduler", path, errors)
+    if section is not None:
+        scheduler = _parse_section(SchedulerSettings, section, path, errors)
+
+    targeting = None
+    path = "bot_settings.ini [targeting]"
+    section = _get_section(bot_config, "targeting", path, errors)
+    if section is not None:
+        targeting = _parse_section(TargetingSettings, section, path, errors)
+
+    sentry_tiers = {}
+    path = "building_settings.ini [sentry]"
+    section = _get_section(files["building_settings.ini"], "sentry", path, errors)
+    if section is not None:
+        for tier in section.sections:
+            index = _parse_key(tier, path, errors)
+            sentry_tiers[index] = _parse_section(
+                SentryTier, section[tier], f"{path}[{tier}]", errors
+            )
+
+    time = None
+    path = "game_settings.ini [time]"
+    section = _get_section(files["game_settings.ini"], "time", path, errors)
+    if section is not None:
+        time = _parse_section(GameTiming, section, path, errors)
+
+    sound_rules = ()
+    path = "game_settings.ini [sounds]"
+    section = _get_section(files["game_settings.ini"], "sounds", path, errors)
+    if section is not None:
+        sound_rules = _parse_sound_rules(section, path, errors)
+
+    temp_entities = None
+    path = "game_settings.ini [temp_entities]"
+    section = _get_section(files["game_settings.ini"], "temp_entities", path, errors)
+    if section is not None:
+        temp_entities = _parse_temp_entities(section, path, errors)
+
+    classes = {}
+    banned_classes = frozenset()
+    path = "player_settings.ini [class_settings]"
+    section = _get_section(
+        files["player_settings.ini"], "class_settings", path, errors
+    )
+    if section is not None:
+        for player_class in section.sections:
+            index = _parse_key(player_class, path, errors)
+            classes[index] = _parse_section(
+                ClassSettings, section[player_class], f"{path}[{player_class}]", errors
+            )
+        try:
+            banned_classes = frozenset(
+                int(ban) for ban in section.as_list("banned_classes") if ban
+            )
+        except (KeyError, ValueError):
+            errors.append(f"{path}.banned_classes: expected a list of class numbers")
+
+    if current is not None and not errors:
+        _check_removed(sentry_tiers, classes, current, errors)
+
+    if errors:
+        raise ConfigError("; ".join(errors))
+
+    return Config(
+        bots=MappingProxyType(bots),
+        scheduler=scheduler,
+        targeting=targeting,
+        sentry_tiers=MappingProxyType(sentry_tiers),
+        time=time,
+        classes=MappingProxyType(classes),
+        banned_classes=banned_classes,
+        sound_rules=sound_rules,
+        temp_entities=temp_entities,
+    )
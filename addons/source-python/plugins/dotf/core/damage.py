@@ -0,0 +1,188 @@
+"""
+================================================================
+    * core/damage.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Damage and heal multipliers compiled from the dotf configs.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Source.Python
+from entities.entity import Entity
+
+# dotf
+from .bot.botmanager import BotManager
+from .player.usermanager import UserManager
+from .buildings.buildingmanager import BuildingManager
+from .config import ConfigManager
+from .log import Logger
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Unit kinds
+UNIT_OTHER = 0
+UNIT_PLAYER = 1
+UNIT_BOT = 2
+UNIT_SENTRY = 3
+
+UNIT_OTHER_KEY = (UNIT_OTHER, 0)
+
+# Damage and heal multiplier if we don't know what to do
+DEFAULT_MULT = 0.2
+
+
+class DamageManager:
+    """Flat damage and heal rule tables, keyed by
+    (attacker kind, attacker class, victim kind, victim class).
+
+    Class is the player class for players, BotType for bots
+    and tier for sentries."""
+
+    __instance = None
+
+    def instance():
+        """Singleton instance"""
+        if DamageManager.__instance is None:
+            DamageManager()
+        return DamageManager.__instance
+
+    def __init__(self):
+        if DamageManager.__instance is not None:
+            raise Exception("This class is a singleton, use .instance() access method.")
+
+        # (kind, class, kind, class) -> (fixed damage or None, multiplier)
+        self.damage_rules = {}
+        # (kind, class, kind, class) -> multiplier
+        self.heal_rules = {}
+        # inflictor index -> attacker index, None if the inflictor is the attacker
+        self.inflictor_owners = {}
+        # owner index -> inflictor indices using it
+        self.owner_inflictors = {}
+
+        DamageManager.__instance = self
+
+        self.load()
+
+    def load(self):
+        """Compile rules from the current config."""
+        config = ConfigManager.instance().config
+        players = {
+            (UNIT_PLAYER, player_class): settings
+            for player_class, settings in config.classes.items()
+        }
+
+        # Bots and sentries don't scale damage or heals they deal or take
+        units = {UNIT_OTHER_KEY: 1.0}
+        for bot_type in config.bots:
+            units[(UNIT_BOT, bot_type)] = 1.0
+        for tier in config.sentry_tiers:
+            units[(UNIT_SENTRY, tier)] = 1.0
+
+        # Attackers that set damage to a fixed value
+        fixed = {UNIT_OTHER_KEY: None}
+        for bot_type, profile in config.bots.items():
+            fixed[(UNIT_BOT, bot_type)] = profile.damage
+        for tier, settings in config.sentry_tiers.items():
+            fixed[(UNIT_SENTRY, tier)] = settings.damage
+
+        # Attackers that scale damage
+        deal = {key: settings.damage_deal_mult for key, settings in players.items()}
+        victims = {key: settings.damage_take_mult for key, settings in players.items()}
+        victims.update(units)
+
+        self.damage_rules.clear()
+        for victim, take_mult in victims.items():
+            for attacker, damage in fixed.items():
+                self.damage_rules[attacker + victim] = (damage, take_mult)
+            for attacker, deal_mult in deal.items():
+                self.damage_rules[attacker + victim] = (None, deal_mult * take_mult)
+
+        heal_deal = {key: settings.heal_deal_mult for key, settings in players.items()}
+        heal_deal.update(units)
+        heal_take = {key: settings.heal_take_mult for key, settings in players.items()}
+        heal_take.update(units)
+
+        self.heal_rules.clear()
+        for healer, deal_mult in heal_deal.items():
+            for patient, take_mult in heal_take.items():
+                self.heal_rules[healer + patient] = deal_mult * take_mult
+
+        Logger.instance().log_debug(
+            f"damage rules: {len(self.damage_rules)}, "
+            f"heal rules: {len(self.heal_rules)}"
+        )
+
+    def get_unit_key(self, index):
+        """Get (kind, class) of the unit with index."""
+        bot = BotManager.instance().bots.get(index)
+        if bot is not None:
+            return UNIT_BOT, bot.bot_type
+        user = UserManager.instance().users.get(index)
+        if user is not None:
+            return UNIT_PLAYER, user.player_class
+        sentry = BuildingManager.instance().sentries.get(index)
+        if sentry is not None:
+            return UNIT_SENTRY, sentry.tier
+        return UNIT_OTHER_KEY
+
+    def get_damage_rule(self, attacker_index, victim_index):
+        """Get (fixed damage or None, multiplier) for attacker hitting victim."""
+        return self.damage_rules.get(
+            self.get_unit_key(attacker_index) + self.get_unit_key(victim_index),
+            (None, 1.0),
+        )
+
+    def get_heal_multiplier(self, healer_index, patient_index):
+        return self.heal_rules.get(
+            self.get_unit_key(healer_index) + self.get_unit_key(patient_index), 1.0
+        )
+
+    def get_inflictor_owner(self, inflictor):
+        """Get the index of the entity responsible for damage from inflictor,
+        None if the inflictor has no owner."""
+        try:
+            return self.inflictor_owners[inflictor]
+        except KeyError:
+            pass
+
+        owner = None
+        try:
+            # Owner
+            owner_handle = Entity(inflictor).owner_handle
+
+            # Level 3 sentry rockets need to get owner twice
+            # rocket -> sentry -> player
+            try:
+                second_owner_handle = Entity.from_inthandle(owner_handle).owner_handle
+                owner_handle = second_owner_handle
+            except (ValueError, OverflowError):
+                pass
+
+            owner = Entity.from_inthandle(owner_handle).index
+        except (ValueError, OverflowError):
+            pass
+
+        self.inflictor_owners[inflictor] = owner
+        if owner is not None:
+            self.owner_inflictors.setdefault(owner, set()).add(inflictor)
+        return owner
+
+    def on_entity_deleted(self, index):
+        """Forget cached owners of and by a deleted entity."""
+        owner = self.inflictor_owners.pop(index, None)
+        if owner is not None:
+            inflictors = self.owner_inflictors.get(owner)
+            if inflictors is not None:
+                inflictors.discard(index)
+        for inflictor in self.owner_inflictors.pop(index, ()):
+            self.inflictor_owners.pop(inflictor, None)
+
+    def clear(self):
+        self.inflictor_owners.clear()
+        self.owner_inflictors.clear()
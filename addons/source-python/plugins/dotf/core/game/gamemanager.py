@@ -12,24 +12,21 @@
 # =============================================================================
 # >> IMPORTS
 # =============================================================================
-# Python
-from configobj import ConfigObj
-
 # Source.Python
 
 # dotf
 from .gamestate import GameState
+from .spawnqueue import SpawnQueue
 from ..bot import BotManager
 from ..map import MapManager
 from ..buildings import BuildingManager
 from ..player import UserManager
+from ..damage import DamageManager
+from ..sounds import SoundFilter
+from ..tempentities import TempEntityGovernor
+from ..targeting import TargetManager
 from ..helpers import Team
-from ..constants.paths import CFG_PATH
-
-# =============================================================================
-# >> GLOBAL VARIABLES
-# =============================================================================
-game_settings = ConfigObj(CFG_PATH + "/game_settings.ini")
+from ..config import ConfigManager
 
 
 class GameManager:
@@ -48,24 +45,43 @@ class GameManager:
             raise Exception("This class is a singleton, use .instance() access method.")
 
         self.state = GameState()
+        self.spawn_queue = SpawnQueue()
 
         GameManager.__instance = self
 
     def load(self):
+        DamageManager.instance().load()
+        SoundFilter.instance().load()
+        TempEntityGovernor.instance().load()
         BuildingManager.instance().clear()
         UserManager.instance().add_all()
         MapManager.instance().on_load_map()
 
     def reset(self):
+        self.spawn_queue.clear()
+        DamageManager.instance().clear()
+        TargetManager.instance().clear()
         BuildingManager.instance().clear()
         UserManager.instance().clear()
         BotManager.instance().clear()
 
+    def apply_config(self):
+        """Push the current config to everything that's alive."""
+        config = ConfigManager.instance().config
+        DamageManager.instance().load()
+        SoundFilter.instance().load()
+        TempEntityGovernor.instance().load()
+        TargetManager.instance().apply_config(config)
+        BotManager.instance().apply_config(config)
+        BuildingManager.instance().apply_config(config)
+        UserManager.instance().apply_config(config)
+
     def start_game(self):
         if self.state.started:
             return
 
         self.spawn_sentries()
+        self.prewarm_bots()
         self.spawn_bot_wave()
 
         self.state.started = True
@@ -80,29 +96,36 @@ class GameManager:
                 point["tier"],
             )
 
+    def prewarm_bots(self):
+        for team in (Team.BLU, Team.RED):
+            for lane_index in range(MapManager.instance().lane_count):
+                points = MapManager.instance().get_bot_spawn_points(team, lane_index)
+                if points:
+                    BotManager.instance().prewarm(points[0]["origin"])
+                    return
+
     def spawn_bot_wave(self):
+        """Queue a wave, it's spawned over the next ticks in _tick_game."""
+        lanes = []
         for lane_index in range(MapManager.instance().lane_count):
-            blu_bot_spawns = MapManager.instance().get_bot_spawn_points(
-                Team.BLU, lane_index
-            )
-            for point in blu_bot_spawns:
-                bot = BotManager.instance().add_bot()
-                if bot != None:
-                    bot.spawn(
-                        point["origin"], point["rotation"], Team.BLU, point["bot_type"]
-                    )
-
-            red_bot_spawns = MapManager.instance().get_bot_spawn_points(
-                Team.RED, lane_index
-            )
-            for point in red_bot_spawns:
-                bot = BotManager.instance().add_bot()
-                if bot != None:
-                    bot.spawn(
-                        point["origin"], point["rotation"], Team.RED, point["bot_type"]
-                    )
+            teams = []
+            for team in (Team.BLU, Team.RED):
+                points = MapManager.instance().get_bot_spawn_points(team, lane_index)
+                teams.append([(point, team) for point in points])
+            lanes.append(teams)
+        self.spawn_queue.add_wave(lanes)
+
+    def _spawn_queued(self, spawn):
+        point, team = spawn
+        BotManager.instance().spawn_bot(
+            point["origin"], point["rotation"], team, point["bot_type"]
+        )
 
     def tick(self):
+        # Config changes land here, before anything else thinks this tick
+        if ConfigManager.instance().apply_pending():
+            self.apply_config()
+
         if self.state.started:
             self._tick_game()
             pass
@@ -112,8 +135,14 @@ class GameManager:
     def _tick_game(self):
         self.state.tick += 1
 
-        if (self.state.tick % game_settings["time"].as_int("bot_wave_interval")) == 0:
+        bot_wave_interval = ConfigManager.instance().config.time.bot_wave_interval
+        if (self.state.tick % bot_wave_interval) == 0:
             self.spawn_bot_wave()
 
+        self.spawn_queue.tick(
+            self._spawn_queued,
+            ConfigManager.instance().config.time.wave_spawns_per_tick,
+        )
+
     def _tick_wait(self):
         pass
@@ -0,0 +1,63 @@
+"""
+================================================================
+    * core/game/spawnqueue.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Bot wave spawns spread over several ticks
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+from collections import deque
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class SpawnQueue:
+    """Spawns waiting for their tick, in the order they'll be spawned."""
+
+    def __init__(self):
+        self.queue = deque()
+
+    def __len__(self):
+        return len(self.queue)
+
+    def add_wave(self, lanes):
+        """Queue a wave. lanes is a list of spawns per team for each lane.
+
+        Spawns are interleaved by lane, then by team, so every lane
+        and team gets its bots out at the same rate no matter how
+        many spawns are done per tick."""
+        self.queue.extend(interleave([interleave(teams) for teams in lanes]))
+
+    def tick(self, spawn, max_spawns):
+        """Call spawn for up to max_spawns queued spawns, all of them
+        if max_spawns is 0. Returns how many were spawned."""
+        count = len(self.queue)
+        if max_spawns > 0:
+            count = min(count, max_spawns)
+        for _ in range(count):
+            spawn(self.queue.popleft())
+        return count
+
+    def clear(self):
+        self.queue.clear()
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def interleave(lists):
+    """Round-robin the items of lists, i.e. [[1, 2, 3], [4]] -> [1, 4, 2, 3]."""
+    result = []
+    for i in range(max((len(items) for items in lists), default=0)):
+        for items in lists:
+            if i < len(items):
+                result.append(items[i])
+    return result
@@ -13,37 +13,19 @@ from engines.server import server
 # =============================================================================
 # >> FUNCTIONS
 # =============================================================================
-def ticks_to_timestamp(ticks):
-    """Convert ticks to a timestamp."""
+def ticks_to_timestamp(ticks, hundredths=True):
+    """Convert ticks to a timestamp, [hh:]mm:ss.cc or without hundredths."""
     ticks = abs(ticks)
 
-    milliseconds, seconds = math.modf(ticks * server.tick_interval)
-    minutes = math.floor(seconds / 60)
-    hours = math.floor(minutes / 60)
+    # Nudged up so float error doesn't round down whole hundredths
+    centiseconds = math.floor(ticks * server.tick_interval * 100.0 + 1e-6)
+    seconds, centiseconds = divmod(centiseconds, 100)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
 
-    seconds -= minutes * 60
-    minutes -= hours * 60
-
-    timestamp = ""
-
-    if 0 < hours < 10:
-        timestamp += f"0{hours}:"
-    elif hours >= 10:
-        timestamp += f"{hours}:"
-
-    if minutes == 0 or 0 < minutes < 10:
-        timestamp += f"0{minutes}:"
-    elif minutes >= 10:
-        timestamp += f"{minutes}:"
-
-    if seconds == 0 or 0 < seconds < 10:
-        timestamp += f"0{str(seconds)[0]}."
-    elif seconds >= 10:
-        timestamp += f"{str(seconds)[:2]}."
-
-    if milliseconds == 0:
-        timestamp += f"00"
-    elif milliseconds > 0:
-        timestamp += str(milliseconds)[2:4]
+    timestamp = f"{hours:02}:" if hours > 0 else ""
+    timestamp += f"{minutes:02}:{seconds:02}"
+    if hundredths:
+        timestamp += f".{centiseconds:02}"
 
     return timestamp
@@ -0,0 +1,114 @@
+"""
+================================================================
+    * core/helpers/functiontable.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Functions of a C++ class, resolved once and shared by every
+    instance of the class.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import time
+
+# Source.Python
+from memory import find_binary
+
+# dotf
+from ..log import Logger
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+function_tables = []
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class FunctionTable:
+    """Virtual and signature functions of a class, keyed by name.
+
+    Definitions are dicts with "name", "convention", "args", "return"
+    and either a vtable "index" or a "signature" in server_srv.
+    Signature functions are found once in load(), virtuals once per
+    vtable the first time an instance with that vtable is seen."""
+
+    def __init__(self, name, definitions):
+        self.name = name
+        self.definitions = {
+            definition["name"]: definition for definition in definitions
+        }
+        self.functions = {}
+        self.vtables = {}
+        function_tables.append(self)
+
+    def load(self):
+        """Find signature functions. Returns time taken in ms."""
+        start = time.perf_counter()
+        binary = None
+        for name, definition in self.definitions.items():
+            if "signature" not in definition or name in self.functions:
+                continue
+            if not definition["signature"]:
+                Logger.instance().log_warning(
+                    f"{self.name} function {name} has no signature on this platform"
+                )
+                continue
+            if binary is None:
+                binary = find_binary("server_srv", False)
+            self.functions[name] = binary.find_address(
+                definition["signature"]
+            ).make_function(
+                definition["convention"],
+                definition["args"],
+                definition["return"],
+            )
+        return (time.perf_counter() - start) * 1000.0
+
+    def get(self, pointer):
+        """Get all functions for the class of the object at pointer, by name."""
+        vtable = pointer.get_pointer().address
+        functions = self.vtables.get(vtable)
+        if functions is None:
+            functions = self._resolve_vtable(pointer, vtable)
+        return functions
+
+    def _resolve_vtable(self, pointer, vtable):
+        start = time.perf_counter()
+        functions = dict(self.functions)
+        for name, definition in self.definitions.items():
+            if "index" in definition:
+                functions[name] = pointer.make_virtual_function(
+                    definition["index"],
+                    definition["convention"],
+                    definition["args"],
+                    definition["return"],
+                )
+        self.vtables[vtable] = functions
+        Logger.instance().log_debug(
+            f"{self.name} vtable {vtable:#x} resolved in "
+            f"{(time.perf_counter() - start) * 1000.0:.3f}ms"
+        )
+        return functions
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def load_function_tables():
+    """Find signature functions of all tables, called on plugin load."""
+    total = 0.0
+    for table in function_tables:
+        elapsed = table.load()
+        total += elapsed
+        Logger.instance().log_info(
+            f"{table.name} functions: {len(table.functions)} signatures "
+            f"resolved in {elapsed:.3f}ms"
+        )
+    Logger.instance().log_info(f"function tables loaded in {total:.3f}ms")
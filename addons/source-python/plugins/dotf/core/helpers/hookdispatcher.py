@@ -0,0 +1,82 @@
+"""
+================================================================
+    * core/helpers/hookdispatcher.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    One pre-hook per function, shared by every instance.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import time
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+hook_dispatchers = []
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class HookDispatcher:
+    """Pre-hooks a function once and calls the callback registered
+    for the `this` pointer it was called with, if any.
+
+    Instances register and unregister callbacks with add and remove,
+    the hook itself stays until remove_hook_dispatchers on unload.
+    Whatever the callback returns is returned from the hook, so it
+    can still block the original function."""
+
+    def __init__(self, name):
+        self.name = name
+        # this address -> callback(stack_data)
+        self.callbacks = {}
+        # function address -> hooked Function
+        self.functions = {}
+        # Timings of callbacks, set by Profiler while profiling
+        self.timings = None
+        hook_dispatchers.append(self)
+
+    def add(self, function, this, callback):
+        """Call callback(stack_data) when function is called on this.
+        function is hooked the first time it's seen."""
+        if function.address not in self.functions:
+            function.add_pre_hook(self.dispatch)
+            self.functions[function.address] = function
+        self.callbacks[this] = callback
+
+    def remove(self, this):
+        self.callbacks.pop(this, None)
+
+    def dispatch(self, stack_data):
+        callback = self.callbacks.get(stack_data[0].address)
+        if callback is None:
+            return None
+        if self.timings is None:
+            return callback(stack_data)
+        start = time.perf_counter_ns()
+        try:
+            return callback(stack_data)
+        finally:
+            self.timings.add(time.perf_counter_ns() - start)
+
+    def remove_hooks(self):
+        for function in self.functions.values():
+            function.remove_pre_hook(self.dispatch)
+        self.functions.clear()
+        self.callbacks.clear()
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def remove_hook_dispatchers():
+    """Remove the hooks of all dispatchers, called on plugin unload."""
+    for dispatcher in hook_dispatchers:
+        dispatcher.remove_hooks()
@@ -0,0 +1,90 @@
+"""
+================================================================
+    * core/helpers/membertable.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Offsets of non-networked members, resolved once per class.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Source.Python
+from memory import Pointer
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class MemberTable:
+    """Flat name-to-offset map for members found relative to a networked property.
+
+    Definitions are dicts with "name", "type" (float, int, bool, pointer...),
+    "relative" networked property name and "offset" from it. Optional
+    "server_class" overrides the table's server class and "reverse"
+    subtracts the offset instead of adding it."""
+
+    def __init__(self, server_class, definitions):
+        self.server_class = server_class
+        self.definitions = {
+            definition["name"]: definition for definition in definitions
+        }
+        # Filled in place by resolve, properties keep a reference to this
+        self.offsets = {}
+        # Members whose relative property wasn't found
+        self.missing = []
+
+    def resolve(self, entity):
+        """Resolve all offsets from the server class tables of entity.
+        Only does work the first time."""
+        if self.offsets or self.missing:
+            return
+
+        tables = {}
+        offsets = {}
+        for name, definition in self.definitions.items():
+            server_class = definition.get("server_class", self.server_class)
+            if server_class not in tables:
+                tables[server_class] = {
+                    prop.name: prop.offset
+                    for prop in entity.server_class.find_server_class(
+                        server_class
+                    ).table
+                }
+            relative = tables[server_class].get(definition["relative"])
+            if relative is None:
+                # Left out, get_pointer returns None for it
+                self.missing.append(name)
+                continue
+            if definition.get("reverse", False):
+                offsets[name] = relative - definition["offset"]
+            else:
+                offsets[name] = relative + definition["offset"]
+
+        self.offsets.update(offsets)
+
+    def get_pointer(self, entity, name):
+        """Get a Pointer to a member of entity, None if unknown."""
+        offset = self.offsets.get(name)
+        if offset is None:
+            return None
+        return Pointer(entity.pointer + offset)
+
+    def property(self, name):
+        """Typed property reading and writing a member of an entity directly.
+        resolve() must be called before it's used."""
+        member_type = self.definitions[name]["type"]
+        getter = getattr(Pointer, f"get_{member_type}")
+        setter = getattr(Pointer, f"set_{member_type}")
+        offsets = self.offsets
+
+        def fget(entity):
+            return getter(entity.pointer, offsets[name])
+
+        def fset(entity, value):
+            setter(entity.pointer, value, offsets[name])
+
+        return property(fget, fset, doc=f"{name} ({member_type})")
@@ -15,8 +15,6 @@
 # Python
 import os
 from threading import Thread
-import re
-from configobj import ConfigObj
 
 # Source.Python
 from core import PLATFORM
@@ -43,7 +41,8 @@ from players.helpers import playerinfo_from_index, userid_from_index
 from players.entity import Player
 from steam import SteamID
 from cvars import ConVar
-from effects.base import TempEntity
+from commands import CommandReturn
+from commands.say import SayFilter
 from engines.server import server, engine_server
 from engines.sound import engine_sound
 from memory import (
@@ -56,7 +55,7 @@ from memory import (
     find_binary,
 )
 from memory.hooks import PreHook
-from messages.hooks import HookUserMessage
+from messages import SayText2
 from filters.recipients import RecipientFilter
 from weapons.entity import Weapon
 
@@ -66,18 +65,22 @@ from .bot.botmanager import BotManager
 from .player.usermanager import UserManager
 from .map.mapmanager import MapManager
 from .buildings.buildingmanager import BuildingManager
+from .targeting.targetmanager import TargetManager
+from .nextbot import NextBotCombatCharacter
 from .player.user import User
 from .commands.clientcommands import CommandHandler
-from .commands.clientcommands import CommandHandler
-from .constants import CFG_PATH
+from .config import ConfigManager
+from .hud import HudManager
 from .chat.messages import message_class_banned
+from .damage import DamageManager, DEFAULT_MULT
 from .log import Logger
+from .perf import Profiler, timed
+from .sounds import SoundFilter
+from .tempentities import TempEntityGovernor
 
 # =============================================================================
 # >> GLOBAL VARIABLES
 # =============================================================================
-player_config = ConfigObj(CFG_PATH + "/player_settings.ini")
-
 server_binary = find_binary("tf/bin/server")
 
 if PLATFORM == "windows":
@@ -139,10 +142,6 @@ EMIT_SOUND_FUNC = get_object_pointer(engine_sound).make_virtual_function(
     DataType.VOID,
 )
 
-blocked_sounds = []
-
-blocked_temp_entities = []
-
 engine_sound.precache_sound("vo/null.wav")
 
 
@@ -177,15 +176,33 @@ def on_level_init(level):
 def on_level_end():
     """Called when a map is unloaded."""
     GameManager.instance().reset()
+    NextBotCombatCharacter.clear_model_cache()
 
 
 @OnTick
 def on_tick():
     """Called every engine tick."""
+    profiler = Profiler.instance()
+    profiler.begin_tick()
     GameManager.instance().tick()
+    profiler.lap("tick game")
+    TargetManager.instance().tick(
+        UserManager.instance().users.values(),
+        BotManager.instance().bots.values(),
+        BuildingManager.instance().sentries.values(),
+    )
+    profiler.lap("tick targeting")
     BotManager.instance().tick()
+    profiler.lap("tick bots")
     UserManager.instance().tick()
+    profiler.lap("tick users")
     BuildingManager.instance().tick()
+    profiler.lap("tick buildings")
+    HudManager.instance().tick()
+    profiler.lap("tick hud")
+    Logger.instance().tick()
+    profiler.lap("tick log")
+    profiler.end_tick()
 
 
 @OnClientActive
@@ -216,8 +233,11 @@ def on_client_disconnect(index):
 
 
 @OnEntityDeleted
+@timed("listener entity deleted")
 def on_entity_deleted(entity):
     # Logger.instance().log_debug(f"entity_deleted: {entity.classname}")
+    DamageManager.instance().on_entity_deleted(entity.index)
+    TargetManager.instance().on_entity_deleted(entity.index)
     if entity.classname == "base_boss":
         BotManager.instance().remove_bot_index(entity.index)
 
@@ -246,23 +266,22 @@ def pre_building_healed(event):
 
 
 @PreEvent("object_destroyed")
+@timed("event object_destroyed")
 def pre_object_destroyed(event):
     if event["was_building"]:
         BuildingManager.instance().on_building_destroy(event["index"])
 
 
 @PreEvent("player_healed")
+@timed("event player_healed")
 def on_player_healed(event):
     patient = Player.from_userid(event["patient"])
     healer_idx = event["healer"]
     healer = None
 
-    # Default heal multiplier if we don't know what to do
-    default_mult = 0.2
-
     if healer_idx == 0:
         # World or server
-        event["amount"] = int(event["amount"] * default_mult)
+        event["amount"] = int(event["amount"] * DEFAULT_MULT)
         return EventAction.CONTINUE
     else:
         # Some other entity
@@ -275,31 +294,12 @@ def on_player_healed(event):
                 healer = Player.from_inthandle(owner_handle)
             except (ValueError, OverflowError):
                 # Not a player or invalid handle
-                event["amount"] = int(event["amount"] * default_mult)
+                event["amount"] = int(event["amount"] * DEFAULT_MULT)
                 return EventAction.CONTINUE
 
-    heal_multiplier = 1.0
-
-    if healer != None:
-        # Handle player healer
-        player_healer = UserManager.instance().user_from_index(healer.index)
-        if player_healer != None:
-            heal_multiplier *= player_healer.class_settings.as_float("heal_deal_mult")
-
-        # Handle bot healer
-        bot_healer = BotManager.instance().bot_from_index(healer.index)
-        if bot_healer != None:
-            heal_multiplier *= 1.0
-
-    # Handle player patient
-    player_patient = UserManager.instance().user_from_index(patient.index)
-    if player_patient != None:
-        heal_multiplier *= player_patient.class_settings.as_float("heal_take_mult")
-
-    # Handle bot patient
-    bot_patient = BotManager.instance().bot_from_index(patient.index)
-    if bot_patient != None:
-        heal_multiplier *= 1.0
+    heal_multiplier = DamageManager.instance().get_heal_multiplier(
+        healer.index, patient.index
+    )
 
     if heal_multiplier != 1.0:
         event["amount"] = int(event["amount"] * heal_multiplier)
@@ -308,16 +308,16 @@ def on_player_healed(event):
 
 
 @PreEvent("player_changeclass")
+@timed("event player_changeclass")
 def pre_player_changeclass(event):
     player = Player.from_userid(event["userid"])
     human_player = UserManager.instance().user_from_index(player.index)
     if human_player != None:
-        for ban in player_config["class_settings"].as_list("banned_classes"):
-            if f"{event['class']}" == ban:
-                player.set_property_uchar("m_PlayerClass.m_iClass", 1)
-                player.set_property_uchar("m_Shared.m_iDesiredPlayerClass", 1)
-                message_class_banned.send(player.index)
-                return EventAction.BLOCK
+        if event["class"] in ConfigManager.instance().config.banned_classes:
+            player.set_property_uchar("m_PlayerClass.m_iClass", 1)
+            player.set_property_uchar("m_Shared.m_iDesiredPlayerClass", 1)
+            message_class_banned.send(player.index)
+            return EventAction.BLOCK
 
 
 @EntityPreHook(lambda ent: ent.classname == "base_boss", "on_take_damage")
@@ -336,62 +336,32 @@ def pre_take_damage_sentry(args):
     lambda ent: ent.classname == "player",
     "on_take_damage",
 )
+@timed("hook damage")
 def pre_take_damage(args):
     victim = make_object(Entity, args[0])
     info = make_object(TakeDamageInfo, args[1])
 
-    # Default damage multiplier if we don't know what to do
-    default_mult = 0.2
-
     # Get attacker
     if info.attacker == 0:
         # World
-        info.base_damage *= default_mult
-        info.damage *= default_mult
+        info.base_damage *= DEFAULT_MULT
+        info.damage *= DEFAULT_MULT
         return
     elif info.inflictor > 0:
-        try:
-            # Owner
-            owner_handle = Entity(info.inflictor).owner_handle
+        owner = DamageManager.instance().get_inflictor_owner(info.inflictor)
+        if owner is not None:
+            info.attacker = owner
 
-            # Level 3 sentry rockets need to get owner twice
-            # rocket -> sentry -> player
-            try:
-                second_owner_handle = Entity.from_inthandle(owner_handle).owner_handle
-                owner_handle = second_owner_handle
-            except (ValueError, OverflowError):
-                pass
-
-            attacker = Entity.from_inthandle(owner_handle)
-            info.attacker = attacker.index
-        except (ValueError, OverflowError):
-            pass
-
-    # Handle attacker
-    attacker_bot = BotManager.instance().bot_from_index(info.attacker)
-    attacker_player = UserManager.instance().user_from_index(info.attacker)
-    attacker_sentry = BuildingManager.instance().sentry_from_index(info.attacker)
-
-    if attacker_bot != None:
-        info.base_damage = attacker_bot.config.as_float("damage")
-        info.damage = attacker_bot.config.as_float("damage")
-    elif attacker_player != None:
-        info.base_damage *= attacker_player.class_settings.as_float("damage_deal_mult")
-        info.damage *= attacker_player.class_settings.as_float("damage_deal_mult")
-    elif attacker_sentry != None:
-        info.base_damage = attacker_sentry.get_damage()
-        info.damage = attacker_sentry.get_damage()
-
-    # Handle victim
-    victim_player = UserManager.instance().user_from_index(victim.index)
-
-    if victim_player != None:
-        info.base_damage *= victim_player.class_settings.as_float("damage_take_mult")
-        info.damage *= victim_player.class_settings.as_float("damage_take_mult")
+    fixed_damage, multiplier = DamageManager.instance().get_damage_rule(
+        info.attacker, victim.index
+    )
 
-    # print(
-    #     f"ab: {attacker_bot}, ap: {attacker_player}, as: {attacker_sentry}, vp: {victim_player}"
-    # )
+    if fixed_damage is not None:
+        info.base_damage = fixed_damage * multiplier
+        info.damage = fixed_damage * multiplier
+    elif multiplier != 1.0:
+        info.base_damage *= multiplier
+        info.damage *= multiplier
 
 
 @EntityPreHook(
@@ -403,6 +373,7 @@ def pre_take_damage(args):
         DataType.INT,
     ),
 )
+@timed("hook max health")
 def pre_get_max_health_player(args):
     player = make_object(Player, args[0])
 
@@ -416,6 +387,7 @@ def pre_get_max_health_player(args):
 
 
 @PreHook(sentrygun_find_target)
+@timed("hook sentry find target")
 def pre_sentrygun_find_target(args):
     # FIXME
     # entity = make_object(Entity, int(args[0]))
@@ -423,7 +395,7 @@ def pre_sentrygun_find_target(args):
     # sentry = BuildingManager.instance().sentry_from_index(entity.index)
     # if sentry != None:
     #     sentry.set_range()
-    for sentry in BuildingManager.instance().sentries:
+    for sentry in BuildingManager.instance().sentries.values():
         sentry.set_range()
 
 
@@ -431,6 +403,7 @@ def pre_sentrygun_find_target(args):
 # >> HOOKS
 # =============================================================================
 @Event("player_spawn")
+@timed("event player_spawn")
 def on_player_spawn(event):
     """Called when a player spawns."""
     cancel_wait = ConVar(name="mp_waitingforplayers_cancel")
@@ -449,65 +422,64 @@ def on_player_spawn(event):
 
 
 @Event("entity_killed")
+@timed("event entity_killed")
 def on_entity_killed(event):
     Logger.instance().log_debug("on_entity_killed")
     entity = baseentity_from_index(event["entindex_killed"])
-    Logger.instance().log_debug(f"  classname: {entity.classname}")
+    Logger.instance().log_debug("  classname: %s", entity.classname)
 
 
 # =============================================================================
 # >> VIRTUAL FUNCTIONS
 # =============================================================================
 @PreHook(EMIT_SOUND_FUNC)
+@timed("hook emit sound")
 def pre_emit_sound(args):
     """Called before a sound is emitted."""
 
-    sound_file = args[4]
+    rule = SoundFilter.instance().get_rule(args[4])
+    if rule is None:
+        return
 
-    for sound in blocked_sounds:
-        regex = re.compile(sound)
-        if re.match(regex, sound_file):
-            return 0
+    if rule.replacement is None:
+        return 0
+    args[4] = rule.replacement
 
 
 @PreHook(get_virtual_function(engine_server, "PlaybackTempEntity"))
+@timed("hook temp entity")
 def pre_playback_temp_entity(args):
     """Called before a temp entity is created."""
 
-    te = TempEntity(args[3])
-
-    if te.name in blocked_temp_entities:
+    if not TempEntityGovernor.instance().allow(args[3]):
         return 0
 
 
 # =============================================================================
-# >> USER MESSAGE HOOKS
+# >> SAY FILTERS
 # =============================================================================
-@HookUserMessage("SayText2")
-def saytext2_hook(recipient, data):
-    """Hook SayText2 for commands and hidechat.
-    This is called once for every recipient."""
+@SayFilter
+@timed("say filter")
+def say_filter(command, index, team_only):
+    """Handle chat commands, called once per chat message.
+    Commands are hidden from chat, the response goes to the sender."""
 
     # Server
-    if data["index"] == 0:
-        return
-
-    # TODO:
-    # get index from RecipientList?
-    receiving_player = list(recipient)[0]
-    sending_player = data["index"]
-
-    # Handle commands
-    if (
-        receiving_player == sending_player
-        and len(data["param2"]) > 1
-        and data["param2"][0] in CommandHandler.instance().prefix
-    ):
-        recipient.update([])
-        command_response = CommandHandler.instance().check_command(
-            data["param2"][1:], UserManager.instance().user_from_index(sending_player)
-        )
-        if command_response:
-            data["message"] = command_response
-            data["index"] = 0
-            recipient.update([sending_player])
+    if not index:
+        return CommandReturn.CONTINUE
+
+    text = command.arg_string
+    if len(text) > 1 and text[0] == '"' and text[-1] == '"':
+        text = text[1:-1]
+
+    handler = CommandHandler.instance()
+    chat_command, args = handler.parse_command(text)
+    if chat_command is None:
+        return CommandReturn.CONTINUE
+
+    response = handler.execute_command(
+        chat_command, UserManager.instance().user_from_index(index), args
+    )
+    if response:
+        SayText2(response).send(index)
+    return CommandReturn.BLOCK
@@ -13,18 +13,140 @@
 # >> IMPORTS
 # =============================================================================
 # Source.Python
+from cvars import ConVar
 from messages import HintText
 from engines.server import server
 
+# dotf
+from .buildings.buildingmanager import BuildingManager
+from .config import ConfigManager
+from .game.gamemanager import GameManager
+from .helpers import Team, ticks_to_timestamp
+from .map.mapmanager import MapManager
+from .player.usermanager import UserManager
+
+# =============================================================================
+# >> CVARS
+# =============================================================================
+dotf_hud_interval = ConVar(
+    "dotf_hud_interval", "33", "Ticks between dotf hud updates, 0 to disable"
+)
+
 # =============================================================================
 # >> GLOBAL VARIABLES
 # =============================================================================
+# Unchanged huds are sent again after this many ticks so they don't fade
+HUD_REFRESH_TICKS = 300
+
+TEAM_NAMES = {Team.RED: "RED", Team.BLU: "BLU"}
 
 
 # =============================================================================
-# >> FUNCTIONS
+# >> CLASSES
 # =============================================================================
-def draw_hud(player):
-    """Draw hud to players."""
-    hint_text = HintText(f"test {server.tick}")
-    hint_text.send(player)
+class HudManager:
+    """Hint text hud of each player, made of fragments shared
+    by all players or a team and rendered once per update.
+
+    Updates run every dotf_hud_interval ticks for everyone at once.
+    A player only gets the hud when its text changed, or to refresh it,
+    and players with the same text get it in one message."""
+
+    __instance = None
+
+    def instance():
+        """Singleton instance"""
+        if HudManager.__instance is None:
+            HudManager()
+        return HudManager.__instance
+
+    def __init__(self):
+        if HudManager.__instance is not None:
+            raise Exception("This class is a singleton, use .instance() access method.")
+
+        # key -> text, cleared every update
+        self.fragments = {}
+        # index -> (user, text, tick) last sent
+        self.sent = {}
+
+        HudManager.__instance = self
+
+    def tick(self):
+        interval = dotf_hud_interval.get_int()
+        if interval <= 0 or server.tick % interval != 0:
+            return
+
+        users = UserManager.instance().users
+        if len(self.sent) > len(users):
+            self.sent = {
+                index: sent for index, sent in self.sent.items() if index in users
+            }
+
+        self.fragments.clear()
+        # text -> indexes
+        updates = {}
+        for index, user in users.items():
+            text = self.get_hud(user.player.team)
+            sent = self.sent.get(index)
+            if (
+                sent is not None
+                and sent[0] is user
+                and sent[1] == text
+                and server.tick - sent[2] < HUD_REFRESH_TICKS
+            ):
+                continue
+            self.sent[index] = (user, text, server.tick)
+            updates.setdefault(text, []).append(index)
+
+        for text, indexes in updates.items():
+            HintText(text).send(*indexes)
+
+    def get_hud(self, team):
+        """Hud text for a player on team."""
+        key = ("hud", team)
+        hud = self.fragments.get(key)
+        if hud is None:
+            lines = [self.get_wave_fragment()]
+            if team in TEAM_NAMES:
+                enemy = Team.BLU if team == Team.RED else Team.RED
+                lines.append(self.get_towers_fragment(team))
+                lines.append(self.get_towers_fragment(enemy))
+            else:
+                lines.extend(self.get_towers_fragment(t) for t in TEAM_NAMES)
+            hud = self.fragments[key] = "\n".join(lines)
+        return hud
+
+    def get_wave_fragment(self):
+        wave = self.fragments.get("wave")
+        if wave is None:
+            state = GameManager.instance().state
+            if state.started:
+                interval = ConfigManager.instance().config.time.bot_wave_interval
+                ticks = interval - state.tick % interval
+                wave = f"Next wave {ticks_to_timestamp(ticks, hundredths=False)}"
+            else:
+                wave = "Type !start to start"
+            self.fragments["wave"] = wave
+        return wave
+
+    def get_towers_fragment(self, team):
+        """Sentries alive per lane of team."""
+        key = ("towers", team)
+        towers = self.fragments.get(key)
+        if towers is None:
+            self._count_towers()
+            towers = self.fragments[key]
+        return towers
+
+    def _count_towers(self):
+        lane_count = MapManager.instance().lane_count
+        counts = {team: [0] * lane_count for team in TEAM_NAMES}
+        for sentry in BuildingManager.instance().sentries.values():
+            lanes = counts.get(sentry.team)
+            if lanes is not None and 0 <= sentry.lane < lane_count:
+                lanes[sentry.lane] += 1
+
+        for team, lanes in counts.items():
+            self.fragments[("towers", team)] = (
+                f"{TEAM_NAMES[team]} towers " + " | ".join(str(c) for c in lanes)
+            )
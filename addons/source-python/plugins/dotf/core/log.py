@@ -13,12 +13,19 @@
 # >> IMPORTS
 # =============================================================================
 # Python
+import os
+import time
+from collections import deque
 from datetime import datetime
 
 # Source.Python
+from core import echo_console
 from loggers import LogManager
 from cvars import ConVar
 
+# dotf
+from .constants.paths import LOG_PATH
+
 # =============================================================================
 # >> CVARS
 # =============================================================================
@@ -34,9 +41,147 @@ dotf_logging_level = ConVar("dotf_logging_level", "5", "dotf logging level")
 # SP log     = 4
 # Script log = 8
 dotf_logging_areas = ConVar("dotf_logging_areas", "15", "dotf logging areas")
+# Write log files in batches every tick instead of on every message.
+# Main and SP log messages go to the dotf log file instead.
+dotf_logging_async = ConVar(
+    "dotf_logging_async", "1", "Write dotf log files in batches every tick"
+)
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+CRITICAL = 0
+EXCEPTION = 1
+WARNING = 2
+INFO = 3
+DEBUG = 4
+MESSAGE = 5
+
+LEVEL_NAMES = ("CRITICAL", "EXCEPTION", "WARNING", "INFO", "DEBUG", "MESSAGE")
+
+AREA_CONSOLE = 1
+AREA_FILES = 2 | 4 | 8
+
+# Messages waiting for the writer, more are dropped
+LOG_QUEUE_SIZE = 4096
+# Seconds between file flushes
+LOG_FLUSH_INTERVAL = 0.25
+# Time spent writing log messages per tick
+LOG_WRITE_BUDGET_MS = 0.5
+
+# Log args passed to the writer as is, anything else is passed as str
+PLAIN_ARG_TYPES = (str, int, float, type(None))
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class LogWriter:
+    """Writes log messages to a file in batches, from Logger.tick.
+
+    put only appends to a deque, so logging never waits for the disk.
+    Messages are formatted when written, args should be plain values
+    that don't change after logging. Messages that don't fit in the
+    queue are counted in dropped and reported in the file.
+    A batch that fails to be written is dropped and reported
+    to the console."""
+
+    def __init__(self, path, size=LOG_QUEUE_SIZE, interval=LOG_FLUSH_INTERVAL):
+        self.path = path
+        self.size = size
+        self.interval = interval
+        # (time, level, msg, args)
+        self.queue = deque()
+        self.dropped = 0
+        self.reported_dropped = 0
+        self.file = None
+        self.unflushed = False
+        self.last_flush = 0.0
+
+    def put(self, level, msg, args):
+        if len(self.queue) >= self.size:
+            self.dropped += 1
+            return
+        self.queue.append((time.time(), level, msg, args))
+
+    def write(self, budget_ms=None):
+        """Write queued messages, stopping after about budget_ms if given.
+        The file is flushed every interval seconds, or now without a budget."""
+        try:
+            lines = self._get_lines(budget_ms)
+            if lines:
+                if self.file is None:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self.file = open(self.path, "a", encoding="utf-8")
+                self.file.write("".join(lines))
+                self.unflushed = True
+
+            now = time.monotonic()
+            if self.unflushed and (
+                budget_ms is None or now - self.last_flush >= self.interval
+            ):
+                self.file.flush()
+                self.unflushed = False
+                self.last_flush = now
+        except Exception as e:
+            echo_console(f"[dotf] Log writer failed, batch dropped: {e!r}")
+            # Open it again for the next batch
+            self._close_file()
+
+    def close(self):
+        """Write what's left and close the file."""
+        self.write()
+        self._close_file()
+
+    def _close_file(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+            self.file = None
+        self.unflushed = False
+
+    def _get_lines(self, budget_ms):
+        lines = []
+        queue = self.queue
+        deadline = None
+        if budget_ms is not None:
+            deadline = time.perf_counter() + budget_ms / 1000.0
+        while queue:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            created, level, msg, args = queue.popleft()
+            msg = format_message(msg, args)
+            lines.append(self._format(created, LEVEL_NAMES[level], msg))
+
+        dropped = self.dropped - self.reported_dropped
+        if dropped:
+            self.reported_dropped += dropped
+            lines.append(
+                self._format(
+                    time.time(),
+                    "WARNING",
+                    f"[dotf] {dropped} log messages dropped, queue full",
+                )
+            )
+        return lines
+
+    def _format(self, created, level_name, msg):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created))
+        return f"{timestamp} {level_name}\t{msg}\n"
 
 
 class Logger:
+    """dotf logging, messages can be %-format strings with args,
+    formatted only if the level is logged.
+
+    With dotf_logging_async, console messages are echoed right away
+    and file messages are queued for a LogWriter, written to LOG_PATH
+    by tick(). Otherwise everything goes through Source.Python's
+    LogManager. tick() also switches between the two when the cvar
+    changes, the dotf cfg only runs after the plugin has loaded."""
+
     __instance = None
 
     def instance():
@@ -49,34 +194,108 @@ class Logger:
         if Logger.__instance is not None:
             raise Exception("This class is a singleton, use .instance() access method.")
 
+        self.manager = None
+        self.writer = None
+        self.file = None
+        self.closed = True
         self.set_log_file(datetime.now().strftime("dotf-%Y%m%d_%H%M%S"))
 
         Logger.__instance = self
 
     def set_log_file(self, file):
-        self.manager = LogManager(
-            "dotf",
-            dotf_logging_level,
-            dotf_logging_areas,
-            file,
-            "%(asctime)s %(levelname)s\t%(message)s",
-            "%Y-%m-%d %H:%M:%S",
-        )
+        self.close()
+        self.manager = None
+        self.file = file
+        self.closed = False
+        self.apply_async()
+
+    def apply_async(self):
+        """Use a LogWriter or LogManager, depending on dotf_logging_async."""
+        if dotf_logging_async.get_bool():
+            if self.writer is None:
+                self.writer = LogWriter(LOG_PATH / f"{self.file}.log")
+            return
+
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.manager is None:
+            self.manager = LogManager(
+                "dotf",
+                dotf_logging_level,
+                dotf_logging_areas,
+                self.file,
+                "%(asctime)s %(levelname)s\t%(message)s",
+                "%Y-%m-%d %H:%M:%S",
+            )
+
+    def tick(self):
+        if self.closed:
+            return
+        if dotf_logging_async.get_bool() != (self.writer is not None):
+            self.apply_async()
+        if self.writer is not None:
+            self.writer.write(LOG_WRITE_BUDGET_MS)
 
-    def log_message(self, msg, *args, **kwargs):
-        self.manager.log_message(f"[dotf] {msg}", *args, **kwargs)
+    def close(self):
+        """Write what's queued, nothing is logged after this."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.closed = True
 
-    def log_debug(self, msg, *args, **kwargs):
-        self.manager.log_debug(f"[dotf] {msg}", *args, **kwargs)
+    def get_dropped(self):
+        return self.writer.dropped if self.writer is not None else 0
 
-    def log_info(self, msg, *args, **kwargs):
-        self.manager.log_info(f"[dotf] {msg}", *args, **kwargs)
+    def _log(self, level, msg, args):
+        if self.closed or level > dotf_logging_level.get_int():
+            return
 
-    def log_warning(self, msg, *args, **kwargs):
-        self.manager.log_warning(f"[dotf] {msg}", *args, **kwargs)
+        msg = f"[dotf] {msg}"
+        if self.writer is None:
+            msg = format_message(msg, args)
+            getattr(self.manager, f"log_{LEVEL_NAMES[level].lower()}")(msg)
+            return
 
-    def log_exception(self, msg, *args, **kwargs):
-        self.manager.log_exception(f"[dotf] {msg}", *args, **kwargs)
+        areas = dotf_logging_areas.get_int()
+        if areas & AREA_FILES:
+            # Engine objects like Vector could change before they're written
+            if not all(isinstance(arg, PLAIN_ARG_TYPES) for arg in args):
+                args = tuple(
+                    arg if isinstance(arg, PLAIN_ARG_TYPES) else str(arg)
+                    for arg in args
+                )
+            self.writer.put(level, msg, args)
+        if areas & AREA_CONSOLE:
+            echo_console(format_message(msg, args))
 
-    def log_critical(self, msg, *args, **kwargs):
-        self.manager.log_critical(f"[dotf] {msg}", *args, **kwargs)
+    def log_message(self, msg, *args):
+        self._log(MESSAGE, msg, args)
+
+    def log_debug(self, msg, *args):
+        self._log(DEBUG, msg, args)
+
+    def log_info(self, msg, *args):
+        self._log(INFO, msg, args)
+
+    def log_warning(self, msg, *args):
+        self._log(WARNING, msg, args)
+
+    def log_exception(self, msg, *args):
+        self._log(EXCEPTION, msg, args)
+
+    def log_critical(self, msg, *args):
+        self._log(CRITICAL, msg, args)
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def format_message(msg, args):
+    """msg % args, or msg followed by args if they don't fit."""
+    if not args:
+        return msg
+    try:
+        return msg % args
+    except (TypeError, ValueError):
+        return f"{msg} {args}"
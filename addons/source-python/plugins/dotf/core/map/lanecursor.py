@@ -0,0 +1,105 @@
+"""
+================================================================
+    * core/map/lanecursor.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Per-bot position along a lane. Follows the bot from segment
+    to segment and only searches the whole LaneGraph when the bot
+    strays too far from its current segment.
+================================================================
+"""
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Max segments to step through in a single update
+LANE_CURSOR_MAX_STEPS = 4
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class LaneCursor:
+    """Lane, segment and parametric t of a bot on a LaneGraph.
+
+    direction is 1 when walking lanes in increasing node index order
+    (blu) and -1 when walking them in decreasing order (red)."""
+
+    __slots__ = ("direction", "max_distance", "graph", "segment", "t", "searches")
+
+    def __init__(self, direction, max_distance):
+        self.direction = direction
+        self.max_distance = max_distance
+        self.graph = None
+        self.segment = -1
+        self.t = 0.0
+        # Full graph searches done, for diagnostics
+        self.searches = 0
+
+    def reset(self):
+        self.graph = None
+        self.segment = -1
+        self.t = 0.0
+
+    @property
+    def lane(self):
+        if self.segment < 0:
+            return -1
+        return self.graph.segment_lane(self.segment)
+
+    def update(self, graph, x, y, z):
+        """Move the cursor to the closest point to (x, y, z).
+        Returns False if graph has no lanes."""
+        segment = self.segment
+        if segment >= 0 and graph is self.graph:
+            t, dist = graph.project(segment, x, y, z)
+
+            # Walk to a neighbouring segment while it's closer
+            lane = graph.segment_lane(segment)
+            for _ in range(LANE_CURSOR_MAX_STEPS):
+                node = graph.segment_node(segment)
+                closer = -1
+                for neighbour in (
+                    graph.lane_segment(lane, node + 1),
+                    graph.lane_segment(lane, node - 1),
+                ):
+                    if neighbour < 0:
+                        continue
+                    neighbour_t, neighbour_dist = graph.project(neighbour, x, y, z)
+                    if neighbour_dist < dist:
+                        closer, t, dist = neighbour, neighbour_t, neighbour_dist
+                if closer < 0:
+                    break
+                segment = closer
+
+            if dist <= self.max_distance * self.max_distance:
+                self.segment = segment
+                self.t = t
+                return True
+
+        # No segment yet, new map, or strayed off the lane
+        self.searches += 1
+        self.graph = graph
+        self.segment, self.t, _ = graph.closest_segment(x, y, z)
+        return self.segment >= 0
+
+    def segment_nodes(self):
+        """Get the (start, end) node origins of the current segment,
+        ordered in the walking direction."""
+        start, end = self.graph.segment_nodes(self.segment)
+        if self.direction > 0:
+            return start, end
+        return end, start
+
+    def progress(self):
+        """Fraction of the lane walked so far, from 0.0 to 1.0."""
+        if self.segment < 0:
+            return 0.0
+        graph = self.graph
+        length = graph.lane_lengths[graph.segment_lane(self.segment)]
+        if length <= 0:
+            return 0.0
+        walked = graph.lane_distance(self.segment, self.t) / length
+        return walked if self.direction > 0 else 1.0 - walked
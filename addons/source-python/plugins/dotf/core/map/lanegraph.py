@@ -0,0 +1,250 @@
+"""
+================================================================
+    * core/map/lanegraph.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Precompiled lane segments with a uniform grid for closest
+    segment lookups. Has no Source.Python dependencies so it can
+    be benchmarked outside the server.
+================================================================
+"""
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Grid cell size in hammer units
+LANE_GRID_CELL_SIZE = 256.0
+
+INF = float("inf")
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class LaneGraph:
+    """Immutable graph of lane nodes, built once per map.
+
+    Node `i` and `i + 1` of a lane form segment `lane_segment(lane, i)`.
+    Segments are stored as flat tuples of floats and bucketed into
+    an XY grid so lookups only touch nearby segments."""
+
+    __slots__ = (
+        "lanes",
+        "lane_count",
+        "lane_lengths",
+        "segment_count",
+        "_segments",
+        "_segment_lane",
+        "_segment_node",
+        "_segment_offset",
+        "_lane_first_segment",
+        "_cell_size",
+        "_min_x",
+        "_min_y",
+        "_nx",
+        "_ny",
+        "_cells",
+    )
+
+    def __init__(self, nodes=(), cell_size=LANE_GRID_CELL_SIZE):
+        """Build from lane node dicts ({"origin", "lane", "index"})."""
+        by_lane = {}
+        for node in nodes:
+            by_lane.setdefault(node["lane"], []).append(node)
+
+        # Lane indices start from 0
+        self.lane_count = max(by_lane) + 1 if by_lane else 0
+        self.lanes = tuple(
+            tuple(
+                node["origin"]
+                for node in sorted(by_lane.get(lane, ()), key=lambda n: n["index"])
+            )
+            for lane in range(self.lane_count)
+        )
+
+        segments = []
+        segment_lane = []
+        segment_node = []
+        segment_offset = []
+        lane_first_segment = []
+        lane_lengths = []
+        for lane, origins in enumerate(self.lanes):
+            lane_first_segment.append(len(segments))
+            lane_length = 0.0
+            for i in range(len(origins) - 1):
+                start = origins[i]
+                end = origins[i + 1]
+                dx = end.x - start.x
+                dy = end.y - start.y
+                dz = end.z - start.z
+                length = (dx * dx + dy * dy + dz * dz) ** 0.5
+                if length > 0:
+                    dx /= length
+                    dy /= length
+                    dz /= length
+                segments.append((start.x, start.y, start.z, dx, dy, dz, length))
+                segment_lane.append(lane)
+                segment_node.append(i)
+                segment_offset.append(lane_length)
+                lane_length += length
+            lane_lengths.append(lane_length)
+
+        self._segments = tuple(segments)
+        self._segment_lane = tuple(segment_lane)
+        self._segment_node = tuple(segment_node)
+        self._segment_offset = tuple(segment_offset)
+        self.lane_lengths = tuple(lane_lengths)
+        self._lane_first_segment = tuple(lane_first_segment)
+        self.segment_count = len(segments)
+        self._cell_size = float(cell_size)
+        self._build_grid()
+
+    def _build_grid(self):
+        cell_size = self._cell_size
+        bounds = []
+        for sx, sy, _, dx, dy, _, length in self._segments:
+            ex = sx + dx * length
+            ey = sy + dy * length
+            bounds.append((min(sx, ex), min(sy, ey), max(sx, ex), max(sy, ey)))
+
+        if not bounds:
+            self._min_x = self._min_y = 0.0
+            self._nx = self._ny = 0
+            self._cells = ()
+            return
+
+        self._min_x = min(b[0] for b in bounds)
+        self._min_y = min(b[1] for b in bounds)
+        self._nx = int((max(b[2] for b in bounds) - self._min_x) // cell_size) + 1
+        self._ny = int((max(b[3] for b in bounds) - self._min_y) // cell_size) + 1
+
+        cells = [[] for _ in range(self._nx * self._ny)]
+        for segment, (x0, y0, x1, y1) in enumerate(bounds):
+            for ix in range(
+                int((x0 - self._min_x) // cell_size),
+                int((x1 - self._min_x) // cell_size) + 1,
+            ):
+                for iy in range(
+                    int((y0 - self._min_y) // cell_size),
+                    int((y1 - self._min_y) // cell_size) + 1,
+                ):
+                    cells[ix * self._ny + iy].append(segment)
+
+        self._cells = tuple(tuple(cell) for cell in cells)
+
+    @property
+    def cell_count(self):
+        return len(self._cells)
+
+    def segment_lane(self, segment):
+        return self._segment_lane[segment]
+
+    def segment_node(self, segment):
+        """Index of the segment's start node within its lane."""
+        return self._segment_node[segment]
+
+    def segment_length(self, segment):
+        return self._segments[segment][6]
+
+    def segment_nodes(self, segment):
+        """Get the (start, end) node origins of a segment, in lane index order.
+        These are shared, don't modify them."""
+        origins = self.lanes[self._segment_lane[segment]]
+        node = self._segment_node[segment]
+        return origins[node], origins[node + 1]
+
+    def lane_distance(self, segment, t):
+        """Distance along the lane from its first node to t on segment."""
+        return self._segment_offset[segment] + self._segments[segment][6] * t
+
+    def lane_segment(self, lane, node):
+        """Get the segment starting at node of lane, or -1 if there is none."""
+        if lane < 0 or lane >= self.lane_count:
+            return -1
+        if node < 0 or node >= len(self.lanes[lane]) - 1:
+            return -1
+        return self._lane_first_segment[lane] + node
+
+    def project(self, segment, x, y, z):
+        """Project a point onto a segment.
+        Returns (t, distance squared), where t is in [0, 1] from start to end."""
+        sx, sy, sz, dx, dy, dz, length = self._segments[segment]
+        px = x - sx
+        py = y - sy
+        pz = z - sz
+        along = px * dx + py * dy + pz * dz
+        if along < 0.0:
+            along = 0.0
+        elif along > length:
+            along = length
+        px -= dx * along
+        py -= dy * along
+        pz -= dz * along
+        return (along / length if length > 0 else 0.0), px * px + py * py + pz * pz
+
+    def closest_segment(self, x, y, z):
+        """Get (segment, t, distance squared) of the segment closest to a point.
+        Segment is -1 if the graph has no segments."""
+        if not self._cells:
+            return -1, 0.0, INF
+
+        segments = self._segments
+        cells = self._cells
+        cell_size = self._cell_size
+        nx = self._nx
+        ny = self._ny
+        cx = int((x - self._min_x) // cell_size)
+        cy = int((y - self._min_y) // cell_size)
+        # Distance from the point to the closest edge of its own cell
+        fx = x - self._min_x - cx * cell_size
+        fy = y - self._min_y - cy * cell_size
+        edge = min(fx, cell_size - fx, fy, cell_size - fy)
+
+        best = -1
+        best_along = 0.0
+        best_dist = INF
+
+        # Search rings of cells around the point until nothing
+        # outside the searched area can be closer than the best hit.
+        max_ring = max(cx, nx - 1 - cx, cy, ny - 1 - cy)
+        ring = 0
+        while ring <= max_ring:
+            for ix in range(max(cx - ring, 0), min(cx + ring, nx - 1) + 1):
+                if ring == 0 or ix == cx - ring or ix == cx + ring:
+                    step = 1
+                else:
+                    # Only the top and bottom rows of the ring
+                    step = 2 * ring
+                row = ix * ny
+                for iy in range(cy - ring, cy + ring + 1, step):
+                    if iy < 0 or iy >= ny:
+                        continue
+                    for segment in cells[row + iy]:
+                        sx, sy, sz, dx, dy, dz, length = segments[segment]
+                        px = x - sx
+                        py = y - sy
+                        pz = z - sz
+                        along = px * dx + py * dy + pz * dz
+                        if along < 0.0:
+                            along = 0.0
+                        elif along > length:
+                            along = length
+                        px -= dx * along
+                        py -= dy * along
+                        pz -= dz * along
+                        dist = px * px + py * py + pz * pz
+                        if dist < best_dist:
+                            best = segment
+                            best_along = along
+                            best_dist = dist
+
+            if best != -1:
+                reach = ring * cell_size + edge
+                if best_dist <= reach * reach:
+                    break
+            ring += 1
+
+        length = segments[best][6]
+        return best, (best_along / length if length > 0 else 0.0), best_dist
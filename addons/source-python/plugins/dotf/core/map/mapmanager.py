@@ -12,11 +12,15 @@
 # =============================================================================
 # >> IMPORTS
 # =============================================================================
+# Python
+import time
+
 # Source.Python
 from filters.entities import EntityIter
 from mathlib import Vector, QAngle
 
 # dotf
+from .lanegraph import LaneGraph
 from ..log import Logger
 
 
@@ -37,6 +41,7 @@ class MapManager:
         self.bot_spawn_points = []
         self.lane_nodes = []
         self.lane_count = 0
+        self.lane_graph = LaneGraph()
 
         MapManager.__instance = self
 
@@ -97,6 +102,10 @@ class MapManager:
 
         self.lane_nodes.sort(key=lambda node: node["index"])
 
+        build_start = time.perf_counter()
+        self.lane_graph = LaneGraph(self.lane_nodes)
+        build_time = (time.perf_counter() - build_start) * 1000.0
+
         Logger.instance().log_debug("map loaded")
         Logger.instance().log_debug(
             f"  sentry spawnpoints: {len(self.sentry_spawn_points)}"
@@ -104,6 +113,10 @@ class MapManager:
         Logger.instance().log_debug(f"  bot spawnpoints: {len(self.bot_spawn_points)}")
         Logger.instance().log_debug(f"  lane count: {self.lane_count}")
         Logger.instance().log_debug(f"  lane nodes: {len(self.lane_nodes)}")
+        Logger.instance().log_debug(
+            f"  lane graph: {self.lane_graph.segment_count} segments, "
+            f"{self.lane_graph.cell_count} cells, built in {build_time:.2f}ms"
+        )
 
     def get_bot_spawn_points(self, team, lane):
         return [
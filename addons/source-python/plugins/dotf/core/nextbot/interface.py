@@ -33,6 +33,8 @@ from mathlib import Vector, QAngle
 
 # dotf
 from ..log import Logger
+from ..helpers.functiontable import FunctionTable
+from ..helpers.hookdispatcher import HookDispatcher
 
 # =============================================================================
 # >> GLOBAL VARIABLES
@@ -47,49 +49,26 @@ INB_VIRTUALS = (
     },
 )
 
+INB_FUNCTIONS = FunctionTable("INB", INB_VIRTUALS)
+INB_UPDATE_HOOK = HookDispatcher("INB Update")
+
 
 class NextBotInterface(Pointer):
     def __init__(self, pointer, update_cb) -> None:
         # Logger.instance().log_debug("iNB __init__")
         super().__init__(pointer)
-        self.virtuals = []
+        self.functions = INB_FUNCTIONS.get(self)
         self.update_cb = update_cb
-        self.get_virtual("Update").add_pre_hook(self.pre_update)
+        INB_UPDATE_HOOK.add(self.get_virtual("Update"), self.address, self.pre_update)
 
     def get_virtual(self, name):
-        # Already created?
-        for virtual in self.virtuals:
-            if virtual["name"] == name:
-                return virtual["func"]
-
-        # Create
-        for virtual in INB_VIRTUALS:
-            if virtual["name"] == name:
-                # Logger.instance().log_debug(f"iNB create virtual {name}")
-                func = self.make_virtual_function(
-                    virtual["index"],
-                    virtual["convention"],
-                    virtual["args"],
-                    virtual["return"],
-                )
-                self.virtuals.append(
-                    {
-                        "name": name,
-                        "func": func,
-                    }
-                )
-                return func
-
-        # Invalid
-        return None
+        return self.functions.get(name)
 
     def remove_hooks(self):
-        self.get_virtual("Update").remove_pre_hook(self.pre_update)
+        INB_UPDATE_HOOK.remove(self.address)
 
     # =============================================================================
     # >> VIRTUALS
     # =============================================================================
     def pre_update(self, stack_data):
-        if stack_data[0].address != self.address:
-            return
-        self.update_cb()
+        return self.update_cb()
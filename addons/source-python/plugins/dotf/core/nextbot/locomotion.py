@@ -33,6 +33,8 @@ from mathlib import Vector, QAngle
 
 # dotf
 from ..log import Logger
+from ..helpers.functiontable import FunctionTable
+from ..helpers.hookdispatcher import HookDispatcher
 
 # =============================================================================
 # >> GLOBAL VARIABLES
@@ -136,50 +138,27 @@ LOCO_VIRTUALS = (
     },
 )
 
+LOCO_FUNCTIONS = FunctionTable("LOCO", LOCO_VIRTUALS)
+LOCO_UPDATE_HOOK = HookDispatcher("LOCO Update")
+
 
 class BaseBossLocomotion(Pointer):
     def __init__(self, pointer) -> None:
         # Logger.instance().log_debug("LOCO __init__")
         super().__init__(pointer)
-        self.virtuals = []
-        self.get_virtual("Update").add_pre_hook(self.pre_update)
+        self.functions = LOCO_FUNCTIONS.get(self)
+        LOCO_UPDATE_HOOK.add(self.get_virtual("Update"), self.address, self.pre_update)
 
     def get_virtual(self, name):
-        # Already created?
-        for virtual in self.virtuals:
-            if virtual["name"] == name:
-                return virtual["func"]
-
-        # Create
-        for virtual in LOCO_VIRTUALS:
-            if virtual["name"] == name:
-                # Logger.instance().log_debug(f"LOCO create virtual {name}")
-                func = self.make_virtual_function(
-                    virtual["index"],
-                    virtual["convention"],
-                    virtual["args"],
-                    virtual["return"],
-                )
-                self.virtuals.append(
-                    {
-                        "name": name,
-                        "func": func,
-                    }
-                )
-                return func
-
-        # Invalid
-        return None
+        return self.functions.get(name)
 
     def remove_hooks(self):
-        self.get_virtual("Update").remove_pre_hook(self.pre_update)
+        LOCO_UPDATE_HOOK.remove(self.address)
 
     # =============================================================================
     # >> VIRTUALS
     # =============================================================================
     def pre_update(self, stack_data):
-        if stack_data[0].address != self.address:
-            return
         # Logger.instance().log_debug(f"LOCO pre_update")
         foo = 1  # pass cancels function call
 
@@ -12,9 +12,6 @@
 # =============================================================================
 # >> IMPORTS
 # =============================================================================
-# Python
-from configobj import ConfigObj
-
 # Source.Python
 from inspect import stack
 from pprint import pprint
@@ -42,20 +39,33 @@ from filters.players import PlayerIter
 from .locomotion import BaseBossLocomotion
 from .interface import NextBotInterface
 from ..log import Logger
-from ..helpers import get_closest_lane, closest_point_on_line_segment, Team, BotType
-from ..constants import CFG_PATH
+from ..helpers import closest_point_on_line_segment, Team, BotType
+from ..map.mapmanager import MapManager
+from ..map.lanecursor import LaneCursor
+from ..targeting.targetmanager import TargetManager
+from ..helpers.functiontable import FunctionTable
+from ..helpers.membertable import MemberTable
+from ..helpers.hookdispatcher import HookDispatcher
+from ..config import ConfigManager
 
 
 # =============================================================================
 # >> GLOBAL VARIABLES
 # =============================================================================
-bot_config = ConfigObj(CFG_PATH + "/bot_settings.ini")
 
 NBCC_CLASSNAME = "base_boss"
 NBCC_SERVER_CLASS = "CTFBaseBoss"
 BA_SERVER_CLASS = "CBaseAnimating"
 ENTITY_IS_NBCC = lambda entity: entity.classname == NBCC_CLASSNAME
 
+# m_takedamage
+DAMAGE_NO = 0
+DAMAGE_YES = 2
+# m_Collision.m_nSolidType
+SOLID_NONE = 0
+# m_fEffects
+EF_NODRAW = 0x020
+
 NBCC_VIRTUALS = (
     {
         "name": "GetBaseEntity",
@@ -186,55 +196,109 @@ NBCC_VIRTUALS = (
         ),
         "return": DataType.FLOAT,
     },
+    {
+        "name": "SetPoseParameterIndex",
+        "signature": ""
+        if PLATFORM == "windows"
+        else "_ZN14CBaseAnimating16SetPoseParameterEP10CStudioHdrif",
+        "convention": Convention.THISCALL,
+        "args": (
+            DataType.POINTER,
+            DataType.POINTER,
+            DataType.INT,
+            DataType.FLOAT,
+        ),
+        "return": DataType.FLOAT,
+    },
 )
 
+NBCC_FUNCTIONS = FunctionTable("NBCC", NBCC_VIRTUALS)
+
 # Non-networked members relative to a CNetworkVar pointer
 NBCC_MEMBERS = (
     {
         "name": "m_speed",
+        "type": "float",
         "relative": "m_lastHealthPercentage",
         "offset": 8,
     },
     {
         "name": "m_startDisabled",
+        "type": "bool",
         "relative": "m_lastHealthPercentage",
         "offset": 12,
     },
     {
         "name": "m_isEnabled",
+        "type": "bool",
         "relative": "m_lastHealthPercentage",
         "offset": 16,
     },
     {
         "name": "m_damagePoseParameter",
+        "type": "int",
         "relative": "m_lastHealthPercentage",
         "offset": 20,
     },
     {
         "name": "m_currencyValue",
+        "type": "int",
         "relative": "m_lastHealthPercentage",
         "offset": 24,
     },
     {
         "name": "m_bResolvePlayerCollisions",
+        "type": "bool",
         "relative": "m_lastHealthPercentage",
         "offset": 28,
     },
     {
         "name": "m_locomotor",
+        "type": "pointer",
         "relative": "m_lastHealthPercentage",
         "offset": 32,
     },
     {
         "name": "m_pStudioHdr",
+        "type": "pointer",
         "relative": "m_flFadeScale",
         "offset": 28,
         "server_class": BA_SERVER_CLASS,
     },
 )
 
+NBCC_MEMBER_TABLE = MemberTable(NBCC_SERVER_CLASS, NBCC_MEMBERS)
+NBCC_KILLED_HOOK = HookDispatcher("NBCC Event_Killed")
+
+# Pose parameters set in think
+NBCC_POSE_PARAMS = ("move_x", "move_y", "move_scale")
+
+# Indices only depend on the model, shared by all bots using it.
+# Only found ones are cached, the model might not have been ready.
+# model -> name -> pose parameter index
+model_pose_params = {}
+# (model, anim) -> sequence
+model_sequences = {}
+
 
 class NextBotCombatCharacter(Entity):
+    m_speed = NBCC_MEMBER_TABLE.property("m_speed")
+    m_locomotor = NBCC_MEMBER_TABLE.property("m_locomotor")
+    m_pStudioHdr = NBCC_MEMBER_TABLE.property("m_pStudioHdr")
+
+    # Spawned at least once, Spawn and hooks are only done the first time
+    spawned = False
+    # Spawned and not parked
+    active = False
+    # Called with the bot when killed, before the engine removes it
+    on_killed = None
+
+    @staticmethod
+    def clear_model_cache():
+        """Forget pose parameters and sequences, models can change with the map."""
+        model_pose_params.clear()
+        model_sequences.clear()
+
     @staticmethod
     def create():
         # Logger.instance().log_debug("NBCC create")
@@ -244,74 +308,21 @@ class NextBotCombatCharacter(Entity):
     def __init__(self, index, caching=False):
         # Logger.instance().log_debug("NBCC __init__")
         super().__init__(index, caching)
-        self.virtuals = []
-        self.locomotor = BaseBossLocomotion(
-            self.get_member_pointer("m_locomotor").get_pointer()
-        )
+        self.functions = NBCC_FUNCTIONS.get(get_object_pointer(self))
+        NBCC_MEMBER_TABLE.resolve(self)
+        self.locomotor = BaseBossLocomotion(self.m_locomotor)
         self.interface = NextBotInterface(
             self.get_virtual("MyNextBotPointer").__call__(self), self.update
         )
 
     def get_member_pointer(self, name):
-        for member in NBCC_MEMBERS:
-            if member["name"] == name:
-                sc = NBCC_SERVER_CLASS
-                if "server_class" in member:
-                    sc = member["server_class"]
-                for networked in self.server_class.find_server_class(sc).table:
-                    if networked.name == member["relative"]:
-                        return Pointer(
-                            self.pointer + networked.offset + member["offset"]
-                        )
-
-        return None
+        return NBCC_MEMBER_TABLE.get_pointer(self, name)
 
     def get_virtual(self, name):
-        # Already created?
-        for virtual in self.virtuals:
-            if virtual["name"] == name:
-                return virtual["func"]
-
-        # Create
-        for virtual in NBCC_VIRTUALS:
-            if virtual["name"] == name:
-                if "index" in virtual:
-                    # Logger.instance().log_debug(f"NBCC create virtual function {name}")
-                    func = get_object_pointer(self).make_virtual_function(
-                        virtual["index"],
-                        virtual["convention"],
-                        virtual["args"],
-                        virtual["return"],
-                    )
-                    self.virtuals.append(
-                        {
-                            "name": name,
-                            "func": func,
-                        }
-                    )
-                    return func
-                elif "signature" in virtual:
-                    # Logger.instance().log_debug(
-                    #     f"NBCC create non-virtual function {name}"
-                    # )
-                    binary = find_binary("server_srv", False)
-                    address = binary.find_address(virtual["signature"])
-                    func = address.make_function(
-                        virtual["convention"],
-                        virtual["args"],
-                        virtual["return"],
-                    )
-                    self.virtuals.append(
-                        {
-                            "name": name,
-                            "func": func,
-                        }
-                    )
-                    return func
-
-        # Invalid
-        Logger.instance().log_debug(f"NBCC function {name} not found")
-        return None
+        func = self.functions.get(name)
+        if func is None:
+            Logger.instance().log_debug(f"NBCC function {name} not found")
+        return func
 
     # =============================================================================
     # >> VIRTUALS
@@ -325,62 +336,156 @@ class NextBotCombatCharacter(Entity):
         self.target_pos = origin
         # Logger.instance().log_debug("NBCC spawn")
 
-        self.config = (
-            bot_config["bot_melee"]
-            if self.bot_type == BotType.MELEE
-            else bot_config["bot_ranged"]
+        self.config = ConfigManager.instance().config.bots[self.bot_type]
+
+        self.lane_cursor = LaneCursor(
+            1 if self.team == Team.BLU else -1,
+            self.config.lane_cursor_range,
         )
 
-        self.model = Model(self.config["model"], True, False)
-        self.set_property_float("m_flModelScale", self.config.as_float("model_scale"))
+        self.model = Model(self.config.model, True, False)
+        self.set_property_float("m_flModelScale", self.config.model_scale)
         self.set_property_bool("m_bClientSideAnimation", True)
         self.set_property_int("m_iTeamNum", self.team)
         self.set_property_int(
             "m_nSkin",
-            self.config.as_int("model_skin_blu")
+            self.config.model_skin_blu
             if self.team == Team.BLU
-            else self.config.as_int("model_skin_red"),
+            else self.config.model_skin_red,
         )
 
-        # Spawn!
-        self.get_virtual("Spawn").__call__(self)
+        if not self.spawned:
+            # Spawn!
+            self.get_virtual("Spawn").__call__(self)
+
+            # Setup hooks
+            NBCC_KILLED_HOOK.add(
+                self.get_virtual("Event_Killed"),
+                get_object_pointer(self).address,
+                self.pre_killed,
+            )
+            # self.get_virtual("OnTakeDamage").add_pre_hook(self.pre_take_damage)
+            self.spawned = True
+        else:
+            self.unpark()
 
         # health gets reset in Spawn
-        self.max_health = self.config.as_int("health")
-        self.health = self.config.as_int("health")
+        self.max_health = self.config.health
+        self.health = self.config.health
+
+        self.pose_params = self.lookup_pose_params()
+        self.pose_values = {}
+        self.pose_epsilon = self.config.pose_param_epsilon
+
+        self.set_animation(self.config.model_anim_move)
+        self.active = True
+
+    def park(self):
+        """Hide and disable the bot until it's needed,
+        spawn() brings it back."""
+        self.active = False
+        self.target_pos = self.origin
+        self.set_property_int("m_iTeamNum", 0)
+        self.set_property_int(
+            "m_fEffects", self.get_property_int("m_fEffects") | EF_NODRAW
+        )
+        self.parked_solid_type = self.get_property_uchar("m_Collision.m_nSolidType")
+        self.set_property_uchar("m_Collision.m_nSolidType", SOLID_NONE)
+        self.set_datamap_property_uchar("m_takedamage", DAMAGE_NO)
+        # Could come back as a different bot type
+        TargetManager.instance().on_entity_deleted(self.index)
+
+    def unpark(self):
+        self.set_property_int(
+            "m_fEffects", self.get_property_int("m_fEffects") & ~EF_NODRAW
+        )
+        self.set_property_uchar("m_Collision.m_nSolidType", self.parked_solid_type)
+        self.set_datamap_property_uchar("m_takedamage", DAMAGE_YES)
+
+    def apply_config(self, config):
+        """Switch to a new bot profile while alive, keeping the health fraction."""
+        previous = self.config
+        self.config = config
+
+        self.lane_cursor.max_distance = config.lane_cursor_range
+        self.pose_epsilon = config.pose_param_epsilon
+
+        if config.model != previous.model:
+            self.model = Model(config.model, True, False)
+            self.pose_params = self.lookup_pose_params()
+            self.pose_values = {}
+        if (
+            config.model != previous.model
+            or config.model_anim_move != previous.model_anim_move
+        ):
+            self.set_animation(config.model_anim_move)
+
+        self.set_property_float("m_flModelScale", config.model_scale)
+        self.set_property_int(
+            "m_nSkin",
+            config.model_skin_blu if self.team == Team.BLU else config.model_skin_red,
+        )
+
+        if self.max_health > 0 and self.health > 0:
+            self.health = max(1, self.health * config.health // self.max_health)
+        self.max_health = config.health
 
-        self.set_animation(self.config["model_anim_move"])
+    def lookup_pose_params(self):
+        """Get pose parameter indices of our model by name, -1 if not found."""
+        cached = model_pose_params.setdefault(self.config.model, {})
+        if len(cached) == len(NBCC_POSE_PARAMS):
+            return cached
 
-        # Setup hooks
-        self.get_virtual("Event_Killed").add_pre_hook(self.pre_killed)
-        # self.get_virtual("OnTakeDamage").add_pre_hook(self.pre_take_damage)
+        pose_params = dict(cached)
+        model_ptr = self.get_studio_model_ptr()
+        lookup = self.get_virtual("LookupPoseParameter")
+        for name in NBCC_POSE_PARAMS:
+            if name not in cached:
+                index = pose_params[name] = lookup.__call__(self, model_ptr, name)
+                if index >= 0:
+                    cached[name] = index
+        return pose_params
+
+    def lookup_sequence(self, anim):
+        key = (self.config.model, anim)
+        seq = model_sequences.get(key)
+        if seq is None:
+            seq = self.get_virtual("LookupSequence").__call__(self, anim)
+            if seq >= 0:
+                model_sequences[key] = seq
+        return seq
 
     def set_animation(self, anim):
-        seq = self.get_virtual("LookupSequence").__call__(self, anim)
+        seq = self.lookup_sequence(anim)
         self.get_virtual("ResetSequence").__call__(self, seq)
 
     def get_studio_model_ptr(self):
-        studio_model = self.get_member_pointer("m_pStudioHdr")
-        if studio_model is None:
-            Logger.instance().log_debug(f"No studio model")
-            return
-
-        return studio_model.get_pointer()
+        return self.m_pStudioHdr
 
     def set_pose_param(self, param, value):
+        index = self.pose_params.get(param, -1)
+        if index < 0:
+            # Not in NBCC_POSE_PARAMS or the model doesn't have it
+            return None
+
+        # Skip tiny changes
+        previous = self.pose_values.get(index)
+        if previous is not None and abs(value - previous) < self.pose_epsilon:
+            return None
+
         model_ptr = self.get_studio_model_ptr()
         if model_ptr is None:
             return None
 
-        return self.get_virtual("SetPoseParameter").__call__(
-            self, model_ptr, param, value
+        self.pose_values[index] = value
+        return self.get_virtual("SetPoseParameterIndex").__call__(
+            self, model_ptr, index, value
         )
 
     def pre_killed(self, stack_data):
-        if stack_data[0].address != get_object_pointer(self).address:
-            return
-
         # Logger.instance().log_debug(f"NBCC pre_killed")
+        if self.on_killed is not None:
+            self.on_killed(self)
         self.remove_hooks()
 
     # def pre_take_damage(self, stack_data):
@@ -390,31 +495,33 @@ class NextBotCombatCharacter(Entity):
     #     Logger.instance().log_debug(f"NBCC pre_take_damage")
     #     pprint(make_object(TakeDamageInfo, stack_data[1]))
 
-    def update(self):
-        # Called right before INextBot::Update from interface.py.
+    def think(self):
+        # Called from the BotScheduler, once every few ticks.
+        # Anything that doesn't need to run every NextBot update goes here.
+        if self.locomotor is None or not self.active:
+            # Killed, waiting for removal, or parked
+            return
 
         # If no aggro, navigate along lane, or back to the lane if not on it
-        start, end = get_closest_lane(self.origin, self.team)
-        line = end - start
-
-        closest_point = closest_point_on_line_segment(start, end, self.origin)
-        margin = 32.0
-
-        # At least margin away from the lane, just move to closest point
-        if closest_point.get_distance(self.origin) > margin:
-            self.target_pos = closest_point
-        # We are on the lane, move towards end
-        else:
-            self.target_pos = end + line.normalized() * 10.0
-
-        self.locomotor.set_desired_speed(self.config.as_float("move_speed"))
-        self.get_member_pointer("m_speed").set_float(self.config.as_float("move_speed"))
-        self.locomotor.stuck_monitor()
-        self.locomotor.approach(self.target_pos, 0.1)
-        self.locomotor.face_towards(self.target_pos)
+        origin = self.origin
+        if self.lane_cursor.update(
+            MapManager.instance().lane_graph, origin.x, origin.y, origin.z
+        ):
+            start, end = self.lane_cursor.segment_nodes()
+            line = end - start
+
+            closest_point = closest_point_on_line_segment(start, end, origin)
+            margin = 32.0
+
+            # At least margin away from the lane, just move to closest point
+            if closest_point.get_distance(origin) > margin:
+                self.target_pos = closest_point
+            # We are on the lane, move towards end
+            else:
+                self.target_pos = end + line.normalized() * 10.0
 
         # anim params
-        expected_speed = float(self.config.as_float("move_speed"))
+        expected_speed = self.config.move_speed
         if expected_speed != 0:
             movement = self.locomotor.get_ground_motion_vector()
             forward = Vector()
@@ -435,9 +542,25 @@ class NextBotCombatCharacter(Entity):
             self.set_property_float("m_flPlaybackRate", frac)
             # self.set_property_float("m_flPlaybackRate", max(1.0, frac))
 
+    def update(self):
+        # Called right before INextBot::Update from interface.py.
+        # Keep this cheap, heavier work is done in think.
+        if not self.active:
+            # Parked, skip the engine's NextBot update too
+            return False
+        self.locomotor.set_desired_speed(self.config.move_speed)
+        self.m_speed = self.config.move_speed
+        self.locomotor.stuck_monitor()
+        self.locomotor.approach(self.target_pos, 0.1)
+        self.locomotor.face_towards(self.target_pos)
+
         self.get_virtual("StudioFrameAdvance").__call__(self)
         self.get_virtual("DispatchAnimEvents").__call__(self, self)
 
+    def get_lane_progress(self):
+        """Fraction of the lane walked so far, from 0.0 to 1.0."""
+        return self.lane_cursor.progress()
+
     def remove_hooks(self):
         # Logger.instance().log_debug(f"NBCC remove_hooks")
         if self.locomotor is not None:
@@ -446,5 +569,7 @@ class NextBotCombatCharacter(Entity):
         if self.interface is not None:
             self.interface.remove_hooks()
             self.interface = None
-        self.get_virtual("Event_Killed").remove_pre_hook(self.pre_killed)
+        if self.spawned:
+            NBCC_KILLED_HOOK.remove(get_object_pointer(self).address)
+            self.spawned = False
         # self.get_virtual("OnTakeDamage").remove_pre_hook(self.pre_take_damage)
@@ -0,0 +1,311 @@
+"""
+================================================================
+    * core/perf.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Timings of tick stages, hooks and bot updates,
+    and stack profiles of the ticks after a slow one
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import os
+import sys
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from functools import wraps
+
+# Source.Python
+from cvars import ConVar
+
+# dotf
+from .constants.paths import LOG_PATH
+from .helpers.hookdispatcher import hook_dispatchers
+from .log import Logger
+
+# =============================================================================
+# >> CVARS
+# =============================================================================
+dotf_perf_enabled = ConVar(
+    "dotf_perf_enabled", "1", "Time dotf subsystems for the dotf_perf command"
+)
+dotf_perf_slow_tick_ms = ConVar(
+    "dotf_perf_slow_tick_ms",
+    "50",
+    "Profile the ticks after a dotf tick slower than this, 0 to disable",
+)
+dotf_perf_profile_ticks = ConVar(
+    "dotf_perf_profile_ticks", "5", "Ticks profiled after a slow tick"
+)
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Latest timings kept per subsystem, about 8 seconds of ticks
+SAMPLE_COUNT = 512
+
+# Ticks after a profile before a slow tick starts another one
+PROFILE_COOLDOWN_TICKS = 2000
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class Timings:
+    """Call count and a ring buffer of the latest call times in ns."""
+
+    __slots__ = ("name", "samples", "next", "calls", "total_ns")
+
+    def __init__(self, name, size=SAMPLE_COUNT):
+        self.name = name
+        self.samples = array("q", [0]) * size
+        self.next = 0
+        self.calls = 0
+        self.total_ns = 0
+
+    def add(self, ns):
+        self.samples[self.next] = ns
+        self.next += 1
+        if self.next == len(self.samples):
+            self.next = 0
+        self.calls += 1
+        self.total_ns += ns
+
+    def reset(self):
+        self.next = 0
+        self.calls = 0
+        self.total_ns = 0
+
+    def get_stats(self):
+        """p50, p95 and max in ms of the buffered samples, and call count."""
+        samples = sorted(self.samples[: min(self.calls, len(self.samples))])
+        if not samples:
+            return {"calls": 0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        last = len(samples) - 1
+        return {
+            "calls": self.calls,
+            "p50": samples[last * 50 // 100] / 1e6,
+            "p95": samples[last * 95 // 100] / 1e6,
+            "max": samples[last] / 1e6,
+        }
+
+
+class StackProfiler:
+    """Profiles Python on the game thread with sys.setprofile,
+    adding up the time spent in each call stack.
+
+    Frames already running when it's started are left out, the
+    stacks start from whatever the engine calls next."""
+
+    def __init__(self):
+        # [stack, start ns, ns spent in calls] of the frames running
+        self.frames = []
+        # stack -> ns spent in the innermost frame itself
+        self.stacks = defaultdict(int)
+        # code -> frame name
+        self.names = {}
+        self.running = False
+
+    def start(self):
+        self.frames.clear()
+        self.stacks.clear()
+        self.running = True
+        sys.setprofile(self.profile)
+
+    def stop(self):
+        sys.setprofile(None)
+        self.running = False
+        now = time.perf_counter_ns()
+        while self.frames:
+            self.return_frame(now)
+
+    def profile(self, frame, event, arg):
+        if event == "call":
+            code = frame.f_code
+            name = self.names.get(code)
+            if name is None:
+                name = self.names[code] = (
+                    f"{code.co_name} "
+                    f"({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+            if self.frames:
+                name = f"{self.frames[-1][0]};{name}"
+            self.frames.append([name, time.perf_counter_ns(), 0])
+        elif event == "return" and self.frames:
+            self.return_frame(time.perf_counter_ns())
+
+    def return_frame(self, now):
+        stack, start, children = self.frames.pop()
+        elapsed = now - start
+        self.stacks[stack] += elapsed - children
+        if self.frames:
+            self.frames[-1][2] += elapsed
+
+    def write(self, path):
+        """Write collapsed stacks with their time in microseconds,
+        the input format of flamegraph.pl and speedscope."""
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, ns in sorted(self.stacks.items()):
+                file.write(f"{stack} {max(1, ns // 1000)}\n")
+
+
+class Profiler:
+    """Timings by subsystem name.
+
+    on_tick times its stages with begin_tick, lap and end_tick,
+    hooks are wrapped with timed and HookDispatchers time their
+    callbacks while they have a Timings. dotf_perf_enabled is checked
+    once per tick, with it off timed only checks enabled.
+
+    A tick slower than dotf_perf_slow_tick_ms starts a StackProfiler
+    for the next dotf_perf_profile_ticks ticks, written to LOG_PATH.
+    Nothing is timed while it runs, its overhead skews the timings."""
+
+    __instance = None
+
+    def instance():
+        """Singleton instance"""
+        if Profiler.__instance is None:
+            Profiler()
+        return Profiler.__instance
+
+    def __init__(self):
+        if Profiler.__instance is not None:
+            raise Exception("This class is a singleton, use .instance() access method.")
+
+        # name -> Timings, in the order they were first used
+        self.timings = {}
+        self.enabled = False
+        self.tick_start = 0
+        self.lap_start = 0
+        self.tick_count = 0
+        self.stack_profiler = StackProfiler()
+        self.profile_ticks_left = 0
+        self.next_profile_tick = 0
+        self.slow_tick_ms = 0.0
+
+        Profiler.__instance = self
+
+    def get_timings(self, name):
+        timings = self.timings.get(name)
+        if timings is None:
+            timings = self.timings[name] = Timings(name)
+        return timings
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.stop_profile()
+        self.set_dispatcher_timings(enabled)
+
+    def set_dispatcher_timings(self, enabled):
+        for dispatcher in hook_dispatchers:
+            if enabled:
+                dispatcher.timings = self.get_timings(f"dispatch {dispatcher.name}")
+            else:
+                dispatcher.timings = None
+
+    def reset(self):
+        for timings in self.timings.values():
+            timings.reset()
+
+    def begin_tick(self):
+        enabled = dotf_perf_enabled.get_bool()
+        if enabled != self.enabled:
+            self.set_enabled(enabled)
+        if enabled:
+            self.tick_start = self.lap_start = time.perf_counter_ns()
+
+    def lap(self, name):
+        """Time since the last lap or begin_tick, as stage name."""
+        if not self.enabled or self.profile_ticks_left > 0:
+            return
+        now = time.perf_counter_ns()
+        self.get_timings(name).add(now - self.lap_start)
+        self.lap_start = now
+
+    def end_tick(self):
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter_ns() - self.tick_start
+        self.tick_count += 1
+
+        if self.profile_ticks_left > 0:
+            self.profile_ticks_left -= 1
+            if self.profile_ticks_left == 0:
+                self.stop_profile()
+            return
+
+        self.get_timings("tick").add(elapsed)
+        slow_tick_ms = dotf_perf_slow_tick_ms.get_float()
+        if (
+            slow_tick_ms > 0.0
+            and elapsed > slow_tick_ms * 1e6
+            and self.tick_count >= self.next_profile_tick
+        ):
+            self.start_profile(elapsed / 1e6)
+
+    def start_profile(self, tick_ms):
+        self.slow_tick_ms = tick_ms
+        self.profile_ticks_left = max(1, dotf_perf_profile_ticks.get_int())
+        Logger.instance().log_warning(
+            f"slow tick {tick_ms:.1f}ms, profiling the next "
+            f"{self.profile_ticks_left} ticks"
+        )
+        self.set_dispatcher_timings(False)
+        self.stack_profiler.start()
+
+    def stop_profile(self):
+        """Stop a running profile and write it to LOG_PATH."""
+        if not self.stack_profiler.running:
+            return
+        self.stack_profiler.stop()
+        self.profile_ticks_left = 0
+        self.set_dispatcher_timings(self.enabled)
+        self.next_profile_tick = self.tick_count + PROFILE_COOLDOWN_TICKS
+
+        path = LOG_PATH / datetime.now().strftime("dotf-slowtick-%Y%m%d_%H%M%S.folded")
+        try:
+            os.makedirs(LOG_PATH, exist_ok=True)
+            self.stack_profiler.write(path)
+        except OSError as e:
+            Logger.instance().log_warning(f"couldn't write profile to {path}: {e}")
+            return
+        Logger.instance().log_info(
+            f"profile of slow tick ({self.slow_tick_ms:.1f}ms) written to {path}"
+        )
+
+    def get_stats(self):
+        return {name: timings.get_stats() for name, timings in self.timings.items()}
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def timed(name):
+    """Decorator timing each call as subsystem name while profiling is enabled,
+    except during a stack profile."""
+    profiler = Profiler.instance()
+    timings = profiler.get_timings(name)
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled or profiler.profile_ticks_left > 0:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings.add(time.perf_counter_ns() - start)
+
+        return wrapper
+
+    return decorator
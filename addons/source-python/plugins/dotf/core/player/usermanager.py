@@ -23,7 +23,7 @@ from ..log import Logger
 class UserManager:
     __instance = None
 
-    users = []
+    users = {}
 
     def instance():
         """Singleton instance"""
@@ -35,21 +35,31 @@ class UserManager:
         if UserManager.__instance is not None:
             raise Exception("This class is a singleton, use .instance() access method.")
 
-        self.users = []
+        # index -> user, in the order they were added
+        self.users = {}
+        self.user_handles = {}
 
         UserManager.__instance = self
 
     def add_user(self, user):
-        Logger.instance().log_debug(f"Register user {user.player.steamid}")
-        self.users.append(user)
+        Logger.instance().log_debug("Register user %s", user.player.steamid)
+        self.users[user.player.index] = user
+        self.user_handles[user.player.inthandle] = user
 
     def remove_user(self, user):
-        Logger.instance().log_debug(f"Unregister user {user.player.steamid}")
-        self.users.remove(user)
+        Logger.instance().log_debug("Unregister user %s", user.player.steamid)
+        self.remove_user_index(user.player.index)
+
+    def remove_user_index(self, index):
+        user = self.users.pop(index, None)
+        if user is None:
+            return
+        self.user_handles.pop(user.player.inthandle, None)
 
     def clear(self):
         Logger.instance().log_debug("Clear users")
         self.users.clear()
+        self.user_handles.clear()
 
     def add_all(self):
         for p in PlayerIter.iterator():
@@ -59,11 +69,15 @@ class UserManager:
                 if not p.dead and not p.is_observer():
                     user.apply_class_settings()
 
+    def apply_config(self, config):
+        for user in self.users.values():
+            user.apply_config(config)
+
     def user_from_index(self, index):
-        for user in self.users:
-            if user.player.index == index:
-                return user
-        return None
+        return self.users.get(index)
+
+    def user_from_inthandle(self, inthandle):
+        return self.user_handles.get(inthandle)
 
     def on_spawn(self, index):
         user = self.user_from_index(index)
@@ -71,5 +85,5 @@ class UserManager:
             user.on_spawn()
 
     def tick(self):
-        for user in self.users:
+        for user in self.users.values():
             user.tick()
@@ -0,0 +1,132 @@
+"""
+================================================================
+    * core/sounds.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Sound block and replace rules compiled from the dotf configs.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import re
+from collections import OrderedDict
+
+# Source.Python
+from engines.sound import engine_sound
+
+# dotf
+from .config import ConfigManager
+from .log import Logger
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Sound files with a cached decision
+SOUND_CACHE_SIZE = 1024
+
+_MISSING = object()
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class SoundFilter:
+    """The sound rules of the config compiled into one regex,
+    the first rule matching the start of a sound file applies.
+
+    Decisions are cached per sound file, least recently used
+    ones dropped first, so sounds played over and over by bots
+    and sentries cost a dict lookup."""
+
+    __instance = None
+
+    def instance():
+        """Singleton instance"""
+        if SoundFilter.__instance is None:
+            SoundFilter()
+        return SoundFilter.__instance
+
+    def __init__(self):
+        if SoundFilter.__instance is not None:
+            raise Exception("This class is a singleton, use .instance() access method.")
+
+        self.rules = ()
+        # Rules as groups r0, r1, ... in order, None without rules
+        self.matcher = None
+        # sound file -> SoundRule or None, least recently used first
+        self.decisions = OrderedDict()
+        # rule name -> sounds blocked or replaced
+        self.hits = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        SoundFilter.__instance = self
+
+        self.load()
+
+    def load(self):
+        """Compile rules from the current config and precache replacements."""
+        rules = ConfigManager.instance().config.sound_rules
+        self.decisions.clear()
+        self.hits = {rule.name: self.hits.get(rule.name, 0) for rule in rules}
+
+        try:
+            self.matcher = re.compile(
+                "|".join(f"(?P<r{i}>{rule.pattern})" for i, rule in enumerate(rules))
+            )
+        except re.error as e:
+            # Patterns are valid alone, but can clash as one, i.e. group names
+            Logger.instance().log_warning("Sound rules not loaded: %s", e)
+            rules = ()
+        self.rules = rules
+        if not rules:
+            self.matcher = None
+
+        for rule in rules:
+            if rule.replacement is not None:
+                engine_sound.precache_sound(rule.replacement)
+
+    def get_rule(self, sound_file):
+        """SoundRule applying to sound_file, None to play it as is."""
+        rule = self.decisions.get(sound_file, _MISSING)
+        if rule is _MISSING:
+            self.cache_misses += 1
+            rule = self._match(sound_file)
+            self.decisions[sound_file] = rule
+            if len(self.decisions) > SOUND_CACHE_SIZE:
+                self.decisions.popitem(last=False)
+        else:
+            self.cache_hits += 1
+            self.decisions.move_to_end(sound_file)
+
+        if rule is not None:
+            self.hits[rule.name] += 1
+        return rule
+
+    def reset(self):
+        self.hits = dict.fromkeys(self.hits, 0)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def get_stats(self):
+        return {
+            "rules": len(self.rules),
+            "cached": len(self.decisions),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "hits": dict(self.hits),
+        }
+
+    def _match(self, sound_file):
+        if self.matcher is None:
+            return None
+        match = self.matcher.match(sound_file)
+        if match is None:
+            return None
+        # The rule's group closes after any groups of its own pattern
+        return self.rules[int(match.lastgroup[1:])]
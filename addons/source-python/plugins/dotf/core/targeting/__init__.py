@@ -0,0 +1 @@
+from .targetmanager import TargetManager
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+================================================================
+    * core/targeting/loscache.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Line of sight results cached per (source, target) pair.
+================================================================
+"""
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class LineOfSightCache:
+    """Remembers trace results for ttl ticks.
+
+    Expiry of each pair is offset by a value derived from the pair,
+    so pairs that were first traced on the same tick get revalidated
+    on different ticks instead of all at once. At most trace_budget
+    traces are done per tick (0 for unlimited), over budget checks use
+    the stale result, or report no sight if the pair was never traced."""
+
+    __slots__ = ("ttl", "trace_budget", "entries", "tick", "traces", "hits", "misses")
+
+    def __init__(self, ttl=4, trace_budget=0):
+        self.ttl = max(1, ttl)
+        self.trace_budget = trace_budget
+        # (source, target) -> (visible, expire tick)
+        self.entries = {}
+        self.tick = 0
+        # Counters for the current tick
+        self.traces = 0
+        self.hits = 0
+        self.misses = 0
+
+    def start_tick(self, tick):
+        self.tick = tick
+        self.traces = 0
+        self.hits = 0
+        self.misses = 0
+
+    def check(self, source, target, trace):
+        """Get cached sight from source to target, calling
+        trace(source, target) -> bool when the result is stale."""
+        key = (source, target)
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] > self.tick:
+            self.hits += 1
+            return entry[0]
+
+        if self.trace_budget > 0 and self.traces >= self.trace_budget:
+            self.misses += 1
+            return entry[0] if entry is not None else False
+
+        self.traces += 1
+        visible = trace(source, target)
+        stagger = (source * 31 + target) % self.ttl
+        self.entries[key] = (visible, self.tick + self.ttl + stagger)
+        return visible
+
+    def forget(self, index):
+        """Drop all pairs with index, i.e. when the entity is deleted."""
+        for key in [key for key in self.entries if index in key]:
+            del self.entries[key]
+
+    def prune(self):
+        """Drop expired pairs so the cache doesn't grow forever."""
+        tick = self.tick
+        for key in [key for key, entry in self.entries.items() if entry[1] <= tick]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
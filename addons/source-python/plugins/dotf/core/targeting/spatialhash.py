@@ -0,0 +1,81 @@
+"""
+================================================================
+    * core/targeting/spatialhash.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Uniform XY grid of combat units, rebuilt every tick.
+================================================================
+"""
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Around the largest aggro range, so most queries only touch 4 cells
+SPATIAL_HASH_CELL_SIZE = 512.0
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class SpatialHash:
+    """Units bucketed by XY cell. Units are (index, team, x, y, z) tuples,
+    z is only used for distances."""
+
+    __slots__ = ("cell_size", "cells", "units")
+
+    def __init__(self, cell_size=SPATIAL_HASH_CELL_SIZE):
+        self.cell_size = cell_size
+        # (cell x, cell y) -> [unit, ...]
+        self.cells = {}
+        # index -> unit
+        self.units = {}
+
+    def clear(self):
+        self.cells.clear()
+        self.units.clear()
+
+    def insert(self, index, team, x, y, z):
+        unit = (index, team, x, y, z)
+        self.units[index] = unit
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [unit]
+        else:
+            cell.append(unit)
+
+    def get(self, index):
+        """Get the unit with index, None if it wasn't inserted this tick."""
+        return self.units.get(index)
+
+    def query(self, x, y, z, radius, exclude_team=None):
+        """Get [(dist_sq, index), ...] of units within radius of x, y, z,
+        closest first. Units of exclude_team are skipped."""
+        size = self.cell_size
+        min_x = int((x - radius) // size)
+        max_x = int((x + radius) // size)
+        min_y = int((y - radius) // size)
+        max_y = int((y + radius) // size)
+        radius_sq = radius * radius
+
+        found = []
+        cells = self.cells
+        for cx in range(min_x, max_x + 1):
+            for cy in range(min_y, max_y + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    continue
+                for index, team, ux, uy, uz in cell:
+                    if team == exclude_team:
+                        continue
+                    dx = ux - x
+                    dy = uy - y
+                    dz = uz - z
+                    dist_sq = dx * dx + dy * dy + dz * dz
+                    if dist_sq <= radius_sq:
+                        found.append((dist_sq, index))
+
+        found.sort()
+        return found
@@ -0,0 +1,213 @@
+"""
+================================================================
+    * core/targeting/targetmanager.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Shared enemy lookups for bots and sentries
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Source.Python
+from engines.trace import engine_trace, Ray, ContentMasks, TraceFilterSimple, GameTrace
+from mathlib import Vector
+
+# dotf
+from .spatialhash import SpatialHash
+from .loscache import LineOfSightCache
+from .visionmap import VisionMap
+from ..config import ConfigManager
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Drop expired line of sight results every N ticks
+LOS_PRUNE_INTERVAL = 66
+
+# Fraction of the hull height traces are done from and to
+EYE_HEIGHT_FRAC = 0.75
+
+# Only the world blocks sight, units don't
+TRACE_MASK = ContentMasks.PLAYER_SOLID_BRUSH_ONLY
+TRACE_FILTER = TraceFilterSimple()
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class TargetManager:
+    """Spatial hash of all combat units, rebuilt on the first query
+    of a tick, and the enemies each team can see, updated every few ticks
+    while anything asks for them."""
+
+    __instance = None
+
+    def instance():
+        """Singleton instance"""
+        if TargetManager.__instance is None:
+            TargetManager()
+        return TargetManager.__instance
+
+    def __init__(self):
+        if TargetManager.__instance is not None:
+            raise Exception("This class is a singleton, use .instance() access method.")
+
+        config = ConfigManager.instance().config.targeting
+        self.spatial_hash = SpatialHash(config.cell_size)
+        self.los_cache = LineOfSightCache(config.los_ttl, config.trace_budget)
+        self.vision_map = VisionMap()
+        self.vision_range = config.vision_range
+        self.vision_interval = max(1, config.vision_interval)
+        # index -> height of traces above origin
+        self.heights = {}
+        self.tick_count = 0
+        self.queries = 0
+        # (users, bots, sentries) of this tick, read when the hash is built
+        self.units = ((), (), ())
+        self.built_tick = -1
+        self.pruned_tick = 0
+        # Vision was asked for since the last update
+        self.vision_queried = False
+        self.game_trace = GameTrace()
+
+        TargetManager.__instance = self
+
+    def apply_config(self, config):
+        if config.targeting.cell_size != self.spatial_hash.cell_size:
+            # Rebuilt with the new cells next tick
+            self.spatial_hash = SpatialHash(config.targeting.cell_size)
+        self.los_cache.ttl = max(1, config.targeting.los_ttl)
+        self.los_cache.trace_budget = config.targeting.trace_budget
+        self.vision_range = config.targeting.vision_range
+        self.vision_interval = max(1, config.targeting.vision_interval)
+
+    def tick(self, users, bots, sentries):
+        """Start a tick and update team vision, called once per tick
+        before anything queries them. users, bots and sentries are
+        iterated again whenever the spatial hash is built this tick."""
+        self.tick_count += 1
+        self.queries = 0
+        self.units = (users, bots, sentries)
+
+        if self.tick_count % self.vision_interval == 0:
+            if self.vision_queried:
+                self.vision_queried = False
+                self.vision_map.update(
+                    self.get_spatial_hash(), self.vision_range, self.can_see
+                )
+            else:
+                # Nobody looked, don't trace until someone does
+                self.vision_map.clear()
+
+    def get_spatial_hash(self):
+        """Spatial hash of the living units this tick."""
+        if self.built_tick != self.tick_count:
+            self.build()
+        return self.spatial_hash
+
+    def build(self):
+        self.built_tick = self.tick_count
+        self.los_cache.start_tick(self.tick_count)
+        if self.tick_count - self.pruned_tick >= LOS_PRUNE_INTERVAL:
+            self.pruned_tick = self.tick_count
+            self.los_cache.prune()
+
+        users, bots, sentries = self.units
+        self.spatial_hash.clear()
+        for user in users:
+            player = user.player
+            if not player.dead and not player.is_observer():
+                self.insert(player)
+        for bot in bots:
+            # Killed bots have no locomotor, waiting for removal
+            if bot.locomotor is not None:
+                self.insert(bot)
+        for sentry in sentries:
+            self.insert(sentry)
+
+    def insert(self, entity):
+        index = entity.index
+        if index not in self.heights:
+            self.heights[index] = (
+                entity.get_property_vector("m_Collision.m_vecMaxs").z * EYE_HEIGHT_FRAC
+            )
+        origin = entity.origin
+        self.spatial_hash.insert(index, entity.team, origin.x, origin.y, origin.z)
+
+    def get_position(self, index):
+        """Get the origin of a unit this tick, None if it isn't one."""
+        unit = self.get_spatial_hash().get(index)
+        if unit is None:
+            return None
+        return Vector(unit[2], unit[3], unit[4])
+
+    def find_enemies(self, team, origin, radius):
+        """Get indices of enemy units within radius, closest first."""
+        self.queries += 1
+        return [
+            index
+            for _, index in self.get_spatial_hash().query(
+                origin.x, origin.y, origin.z, radius, team
+            )
+        ]
+
+    def find_target(self, team, origin, radius):
+        """Get the closest enemy within radius that team can see, None if none."""
+        self.vision_queried = True
+        is_visible = self.vision_map.is_visible
+        for target in self.find_enemies(team, origin, radius):
+            if is_visible(team, target):
+                return target
+        return None
+
+    def is_visible(self, team, index):
+        """Can any unit of team see the unit with index."""
+        self.vision_queried = True
+        return self.vision_map.is_visible(team, index)
+
+    def can_see(self, source, target):
+        return self.los_cache.check(source, target, self.trace)
+
+    def trace(self, source, target):
+        """Line of sight between two units, for the cache."""
+        unit = self.spatial_hash.get(source)
+        start = Vector(unit[2], unit[3], unit[4] + self.heights.get(source, 0.0))
+        unit = self.spatial_hash.get(target)
+        end = Vector(unit[2], unit[3], unit[4] + self.heights.get(target, 0.0))
+        engine_trace.trace_ray(
+            Ray(start, end), TRACE_MASK, TRACE_FILTER, self.game_trace
+        )
+        # Same as the old bot aggro, only the world blocks
+        return not (self.game_trace.did_hit() and self.game_trace.entity.index == 0)
+
+    def on_entity_deleted(self, index):
+        if self.heights.pop(index, None) is not None:
+            self.los_cache.forget(index)
+
+    def clear(self):
+        self.built_tick = -1
+        self.vision_queried = False
+        self.spatial_hash.clear()
+        self.los_cache.clear()
+        self.vision_map.clear()
+        self.heights.clear()
+
+    def get_stats(self):
+        return {
+            "units": len(self.spatial_hash.units),
+            "cells": len(self.spatial_hash.cells),
+            "queries": self.queries,
+            "traces": self.los_cache.traces,
+            "cache_hits": self.los_cache.hits,
+            "budget_misses": self.los_cache.misses,
+            "cached_pairs": len(self.los_cache.entries),
+            "vision_checks": self.vision_map.checks,
+            "visible": {
+                team: self.vision_map.get_visible_count(team)
+                for team in self.vision_map.teams
+            },
+        }
@@ -0,0 +1,68 @@
+"""
+================================================================
+    * core/targeting/visionmap.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Units seen by each team, shared by all units of the team.
+================================================================
+"""
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Closest enemy units checked for sight to each unit
+VISION_MAX_CHECKS = 4
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class VisionMap:
+    """Per-team set of seen entity indices, stored as an int bitset.
+
+    update() checks sight to each unit from at most max_checks closest
+    units of other teams, so the number of checks grows linearly with
+    the number of units."""
+
+    __slots__ = ("max_checks", "teams", "checks")
+
+    def __init__(self, max_checks=VISION_MAX_CHECKS):
+        self.max_checks = max_checks
+        # team -> bitset of indices
+        self.teams = {}
+        # Sight checks in the last update
+        self.checks = 0
+
+    def update(self, spatial_hash, sight_range, can_see):
+        """Rebuild from the units in spatial_hash.
+        can_see(viewer, target) -> bool checks sight between two units."""
+        teams = {}
+        checks = 0
+        units = spatial_hash.units
+        for index, team, x, y, z in units.values():
+            bit = 1 << index
+            viewers = spatial_hash.query(x, y, z, sight_range, team)
+            for _, viewer in viewers[: self.max_checks]:
+                viewer_team = units[viewer][1]
+                seen = teams.get(viewer_team, 0)
+                if seen & bit:
+                    # Another unit of the team already sees it
+                    continue
+                checks += 1
+                if can_see(viewer, index):
+                    teams[viewer_team] = seen | bit
+
+        self.teams = teams
+        self.checks = checks
+
+    def is_visible(self, team, index):
+        return (self.teams.get(team, 0) >> index) & 1 == 1
+
+    def get_visible_count(self, team):
+        return bin(self.teams.get(team, 0)).count("1")
+
+    def clear(self):
+        self.teams = {}
+        self.checks = 0
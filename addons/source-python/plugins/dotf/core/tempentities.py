@@ -0,0 +1,156 @@
+"""
+================================================================
+    * core/tempentities.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Blocking, rate limiting and culling of temp entities.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+from collections import Counter
+
+# Source.Python
+from effects.base import TempEntity
+from engines.server import server
+
+# dotf
+from .config import ConfigManager
+from .player.usermanager import UserManager
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class TempEntityGovernor:
+    """Decides which temp entities are sent, from the temp entity
+    settings of the config.
+
+    The engine has one static object per temp entity type, so names
+    are looked up once per address. Blocked names and rate limits only
+    need the name, cosmetic effects are also dropped when no living
+    human player is within cull_range of their origin."""
+
+    __instance = None
+
+    def instance():
+        """Singleton instance"""
+        if TempEntityGovernor.__instance is None:
+            TempEntityGovernor()
+        return TempEntityGovernor.__instance
+
+    def __init__(self):
+        if TempEntityGovernor.__instance is not None:
+            raise Exception("This class is a singleton, use .instance() access method.")
+
+        self.settings = None
+        self.cull_range_sqr = 0.0
+        # temp entity address -> name
+        self.names = {}
+        # Names without an origin to cull by
+        self.no_origin = set()
+        self.tick = -1
+        # name -> sent this tick
+        self.tick_counts = {}
+        # (x, y, z) of living human players this tick, None until needed
+        self.human_origins = None
+
+        # name -> count
+        self.sent = Counter()
+        self.blocked = Counter()
+        self.rate_limited = Counter()
+        self.culled = Counter()
+
+        TempEntityGovernor.__instance = self
+
+        self.load()
+
+    def load(self):
+        """Use the settings of the current config."""
+        self.settings = ConfigManager.instance().config.temp_entities
+        self.cull_range_sqr = self.settings.cull_range**2
+
+    def allow(self, sender):
+        """False if the temp entity at pointer sender shouldn't be sent."""
+        name = self.names.get(sender.address)
+        if name is None:
+            name = self.names[sender.address] = TempEntity(sender).name
+
+        settings = self.settings
+        if name in settings.blocked:
+            self.blocked[name] += 1
+            return False
+
+        if server.tick != self.tick:
+            self.tick = server.tick
+            self.tick_counts.clear()
+            self.human_origins = None
+
+        limit = settings.rate_limits.get(name)
+        count = self.tick_counts.get(name, 0)
+        if limit is not None and count >= limit:
+            self.rate_limited[name] += 1
+            return False
+
+        if (
+            name in settings.cosmetic
+            and self.cull_range_sqr > 0.0
+            and name not in self.no_origin
+            and not self._is_near_human(sender, name)
+        ):
+            self.culled[name] += 1
+            return False
+
+        self.tick_counts[name] = count + 1
+        self.sent[name] += 1
+        return True
+
+    def reset(self):
+        self.sent.clear()
+        self.blocked.clear()
+        self.rate_limited.clear()
+        self.culled.clear()
+
+    def get_stats(self):
+        """name -> (sent, blocked, rate limited, culled)"""
+        names = self.sent | self.blocked | self.rate_limited | self.culled
+        return {
+            name: (
+                self.sent[name],
+                self.blocked[name],
+                self.rate_limited[name],
+                self.culled[name],
+            )
+            for name in sorted(names)
+        }
+
+    def _is_near_human(self, sender, name):
+        try:
+            origin = TempEntity(sender).origin
+        except (AttributeError, NameError):
+            origin = None
+        if origin is None:
+            # Not a positioned effect, don't try again
+            self.no_origin.add(name)
+            return True
+
+        if self.human_origins is None:
+            self.human_origins = [
+                (o.x, o.y, o.z)
+                for o in (
+                    user.player.origin
+                    for user in UserManager.instance().users.values()
+                    if not user.player.dead
+                )
+            ]
+
+        x, y, z = origin.x, origin.y, origin.z
+        for hx, hy, hz in self.human_origins:
+            if (hx - x) ** 2 + (hy - y) ** 2 + (hz - z) ** 2 <= self.cull_range_sqr:
+                return True
+        return False
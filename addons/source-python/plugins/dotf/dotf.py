@@ -19,12 +19,17 @@ from cvars import cvar
 # dotf
 from .core.hooks import *
 from .core.commands.commands import register_commands
+from .core.commands.servercommands import *
 from .core.player.usermanager import UserManager
 from .core.bot.botmanager import BotManager
 from .core.map.mapmanager import MapManager
 from .core.buildings.buildingmanager import BuildingManager
 from .core.game import GameManager
+from .core.config import ConfigManager
+from .core.helpers.functiontable import load_function_tables
+from .core.helpers.hookdispatcher import remove_hook_dispatchers
 from .core.log import Logger
+from .core.perf import Profiler
 
 # =============================================================================
 # >> GLOBAL VARIABLES
@@ -45,11 +50,17 @@ def load():
     cvar.find_var("nb_update_framelimit").set_float(15)
     cvar.find_var("tf_base_boss_max_turn_rate").set_float(200)
 
+    load_function_tables()
     register_commands()
     GameManager.instance().load()
+    ConfigManager.instance().start_watching()
 
 
 def unload():
     """Called when Source.Python unloads the plugin."""
     Logger.instance().log_info("PLUGIN UNLOAD")
+    ConfigManager.instance().stop_watching()
+    Profiler.instance().stop_profile()
     GameManager.instance().reset()
+    remove_hook_dispatchers()
+    Logger.instance().close()
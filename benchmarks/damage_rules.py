@@ -0,0 +1,115 @@
+"""
+================================================================
+    * benchmarks/damage_rules.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Checks damage and heals between players, bots and sentries
+    on the sim against the numbers of the config, computed like
+    the original per-hit pre_take_damage and player_healed hooks.
+
+    Usage: python benchmarks/damage_rules.py
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import sys
+
+# dotf sim
+import sim
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+HIT_DAMAGE = 100.0
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def get_health(world, index):
+    return world.get_edict(index).properties["m_iHealth"]
+
+
+def hit(world, attacker, victim):
+    """Health victim lost to a HIT_DAMAGE hit from attacker."""
+    before = get_health(world, victim)
+    world.damage(victim, HIT_DAMAGE, attacker)
+    return before - get_health(world, victim)
+
+
+def main():
+    world = sim.install(sim.ROOT)
+    world.load_map(sim.FlatMap(lanes=1))
+    dotf = sim.load_plugin()
+    from dotf.core.bot.botmanager import BotManager
+    from dotf.core.buildings.buildingmanager import BuildingManager
+    from dotf.core.config import ConfigManager
+    from dotf.core.damage import DamageManager
+    from dotf.core.game import GameManager
+
+    world.activate()
+    player = world.add_player("player", team=2, player_class=1)
+    GameManager.instance().start_game()
+    world.tick(10)
+
+    config = ConfigManager.instance().config
+    settings = config.classes[1]
+    bot = next(iter(BotManager.instance().bots.values()))
+    sentry = next(iter(BuildingManager.instance().sentries.values()))
+    bot_damage = config.bots[bot.bot_type].damage
+    sentry_damage = config.sentry_tiers[sentry.tier].damage
+
+    # name -> (attacker, victim, expected health lost)
+    hits = {
+        "player -> bot": (player, bot.index, HIT_DAMAGE * settings.damage_deal_mult),
+        "player -> sentry": (
+            player,
+            sentry.index,
+            HIT_DAMAGE * settings.damage_deal_mult,
+        ),
+        "sentry -> bot": (sentry.index, bot.index, sentry_damage),
+        "bot -> sentry": (bot.index, sentry.index, bot_damage),
+        "bot -> player": (bot.index, player, bot_damage * settings.damage_take_mult),
+        "world -> bot": (0, bot.index, HIT_DAMAGE * 0.2),
+    }
+
+    failed = 0
+    for name, (attacker, victim, expected) in hits.items():
+        lost = hit(world, attacker, victim)
+        ok = abs(lost - expected) < 1.0
+        failed += not ok
+        print(
+            f"  {name:18} {lost:7.1f} (expected {expected:7.1f}) "
+            f"{'' if ok else 'FAIL'}"
+        )
+
+    # name -> (healer, patient, expected multiplier)
+    heals = {
+        "bot -> player": (bot.index, player, settings.heal_take_mult),
+        "player -> player": (
+            player,
+            player,
+            settings.heal_deal_mult * settings.heal_take_mult,
+        ),
+    }
+    for name, (healer, patient, expected) in heals.items():
+        multiplier = DamageManager.instance().get_heal_multiplier(healer, patient)
+        ok = abs(multiplier - expected) < 1e-6
+        failed += not ok
+        print(
+            f"  heal {name:16} {multiplier:7.2f} (expected {expected:7.2f}) "
+            f"{'' if ok else 'FAIL'}"
+        )
+
+    dotf.unload()
+    if failed:
+        sys.exit(f"{failed} damage rules differ from the config")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+================================================================
+    * benchmarks/hook_dispatch.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Cost of one NextBot Update frame for all bots, with a pre-hook
+    per bot that checks its own address vs. a single HookDispatcher.
+
+    Usage: python benchmarks/hook_dispatch.py [frames]
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import sys
+import time
+
+# dotf benchmarks
+from pluginloader import load_plugin_module
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+BOT_COUNTS = (10, 30, 60, 120)
+
+
+hookdispatcher = load_plugin_module("hookdispatcher", "core/helpers/hookdispatcher.py")
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class Pointer:
+    """Minimal stand-in for memory.Pointer."""
+
+    __slots__ = ("address",)
+
+    def __init__(self, address):
+        self.address = address
+
+
+class Function(Pointer):
+    """Stand-in for a hooked memory.Function, calling pre-hooks in order."""
+
+    __slots__ = ("pre_hooks",)
+
+    def __init__(self, address):
+        super().__init__(address)
+        self.pre_hooks = []
+
+    def add_pre_hook(self, callback):
+        self.pre_hooks.append(callback)
+
+    def remove_pre_hook(self, callback):
+        self.pre_hooks.remove(callback)
+
+    def __call__(self, this):
+        stack_data = (this,)
+        for callback in self.pre_hooks:
+            callback(stack_data)
+
+
+class LegacyInterface(Pointer):
+    """NextBotInterface with its own hook."""
+
+    __slots__ = ("updates",)
+
+    def __init__(self, address, update):
+        super().__init__(address)
+        self.updates = 0
+        update.add_pre_hook(self.pre_update)
+
+    def pre_update(self, stack_data):
+        if stack_data[0].address != self.address:
+            return
+        self.updates += 1
+
+
+class DispatchedInterface(Pointer):
+    """NextBotInterface registered in a HookDispatcher."""
+
+    __slots__ = ("updates",)
+
+    def __init__(self, address, update, dispatcher):
+        super().__init__(address)
+        self.updates = 0
+        dispatcher.add(update, self.address, self.pre_update)
+
+    def pre_update(self, stack_data):
+        self.updates += 1
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def time_frames(update, bots, frames):
+    """ms per frame of every bot running Update once."""
+    start = time.perf_counter()
+    for _ in range(frames):
+        for bot in bots:
+            update(bot)
+    return (time.perf_counter() - start) * 1000.0 / frames
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    print(f"frames: {frames}")
+    for count in BOT_COUNTS:
+        update = Function(0x1000)
+        legacy = [LegacyInterface(0x10000 + i * 0x100, update) for i in range(count)]
+        legacy_ms = time_frames(update, legacy, frames)
+
+        update = Function(0x1000)
+        dispatcher = hookdispatcher.HookDispatcher("INB Update")
+        bots = [
+            DispatchedInterface(0x10000 + i * 0x100, update, dispatcher)
+            for i in range(count)
+        ]
+        dispatch_ms = time_frames(update, bots, frames)
+
+        assert all(bot.updates == frames for bot in legacy + bots)
+        print(
+            f"  {count:4} bots: per-bot hooks {legacy_ms:8.3f} ms/frame, "
+            f"dispatcher {dispatch_ms:8.3f} ms/frame, {legacy_ms / dispatch_ms:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
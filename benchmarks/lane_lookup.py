@@ -0,0 +1,206 @@
+"""
+================================================================
+    * benchmarks/lane_lookup.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Compare the old per-node get_closest_lane search against
+    LaneGraph.closest_segment and LaneCursor on synthetic maps.
+
+    Usage: python benchmarks/lane_lookup.py [lanes] [nodes per lane] [queries]
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import math
+import random
+import sys
+import time
+
+# dotf benchmarks
+from pluginloader import load_plugin_module
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+lanegraph = load_plugin_module("lanegraph", "core/map/lanegraph.py")
+lanecursor = load_plugin_module("lanecursor", "core/map/lanecursor.py")
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class Vector:
+    """Minimal stand-in for mathlib.Vector."""
+
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def get_distance(self, other):
+        return math.sqrt(
+            (self.x - other.x) ** 2 + (self.y - other.y) ** 2 + (self.z - other.z) ** 2
+        )
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def legacy_get_closest_lane(lane_nodes, lane_count, origin, direction):
+    """get_closest_lane before the lane graph, MapManager lookups inlined."""
+    closest_nodes = []
+    closest_node = None
+    closest_dist = float("inf")
+    for x in range(lane_count):
+        nodes = [node for node in lane_nodes if node["lane"] == x]
+        for node in nodes:
+            dist = origin.get_distance(node["origin"])
+            if dist < closest_dist:
+                closest_dist = dist
+                closest_nodes = nodes
+                closest_node = node
+
+    next_node = None
+    prev_node = None
+    if (
+        len(nodes) > closest_node["index"] + direction
+        and closest_node["index"] + direction >= 0
+    ):
+        next_node = closest_nodes[closest_node["index"] + direction]
+    if (
+        len(nodes) > closest_node["index"] - direction
+        and closest_node["index"] - direction >= 0
+    ):
+        prev_node = closest_nodes[closest_node["index"] - direction]
+
+    if next_node == None:
+        second_node = prev_node
+    elif prev_node == None:
+        second_node = next_node
+    else:
+        dir_next = next_node["origin"] - closest_node["origin"]
+        dir_to_closest = closest_node["origin"] - origin
+        if dir_next.dot(dir_to_closest) < 0:
+            second_node = next_node
+        else:
+            second_node = prev_node
+
+    if (closest_node["index"] < second_node["index"] and direction < 0) or (
+        closest_node["index"] > second_node["index"] and direction > 0
+    ):
+        return second_node["origin"], closest_node["origin"]
+    return closest_node["origin"], second_node["origin"]
+
+
+def make_map(lane_count, nodes_per_lane, rng):
+    """Random walk lanes across a roughly 16k x 16k map."""
+    lane_nodes = []
+    step = 16384.0 / nodes_per_lane
+    for lane in range(lane_count):
+        x = -8192.0
+        y = -8192.0 + 16384.0 * (lane + 0.5) / lane_count
+        for index in range(nodes_per_lane):
+            lane_nodes.append(
+                {
+                    "origin": Vector(x, y, rng.uniform(-8, 8)),
+                    "lane": lane,
+                    "index": index,
+                }
+            )
+            x += step
+            y += rng.uniform(-step, step) * 0.5
+    lane_nodes.sort(key=lambda node: node["index"])
+    return lane_nodes
+
+
+def time_per_call(func, queries):
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    lane_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    nodes_per_lane = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    query_count = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    rng = random.Random(1)
+    lane_nodes = make_map(lane_count, nodes_per_lane, rng)
+    # Bots are nearly always on or close to a lane, but also
+    # measure the worst case of points anywhere on the map.
+    lane_queries = []
+    for _ in range(query_count):
+        origin = rng.choice(lane_nodes)["origin"]
+        lane_queries.append(
+            Vector(
+                origin.x + rng.uniform(-64, 64), origin.y + rng.uniform(-64, 64), 0.0
+            )
+        )
+    map_queries = [
+        Vector(rng.uniform(-8192, 8192), rng.uniform(-8192, 8192), 0.0)
+        for _ in range(query_count)
+    ]
+
+    build_start = time.perf_counter()
+    graph = lanegraph.LaneGraph(lane_nodes)
+    build_time = (time.perf_counter() - build_start) * 1000.0
+
+    print(f"lanes: {lane_count}, nodes per lane: {nodes_per_lane}")
+    print(
+        f"graph: {graph.segment_count} segments, {graph.cell_count} cells, "
+        f"built in {build_time:.2f}ms"
+    )
+    for name, queries in (("near lanes", lane_queries), ("anywhere", map_queries)):
+        legacy_us = time_per_call(
+            lambda origin: legacy_get_closest_lane(lane_nodes, lane_count, origin, 1),
+            queries[: max(1, query_count // 10)],
+        )
+        graph_us = time_per_call(
+            lambda origin: graph.closest_segment(origin.x, origin.y, origin.z),
+            queries,
+        )
+        print(f"queries {name}:")
+        print(f"  legacy get_closest_lane:    {legacy_us:10.2f} us/call")
+        print(f"  LaneGraph.closest_segment:  {graph_us:10.2f} us/call")
+        print(f"  speedup: {legacy_us / graph_us:.1f}x")
+
+    # A bot walking lane 0 from start to end
+    walk = []
+    origins = graph.lanes[0]
+    for i in range(len(origins) - 1):
+        start = origins[i]
+        end = origins[i + 1]
+        for step in range(4):
+            frac = step / 4
+            walk.append(
+                Vector(
+                    start.x + (end.x - start.x) * frac + rng.uniform(-16, 16),
+                    start.y + (end.y - start.y) * frac + rng.uniform(-16, 16),
+                    start.z + (end.z - start.z) * frac,
+                )
+            )
+    cursor = lanecursor.LaneCursor(1, 128.0)
+    cursor_us = time_per_call(
+        lambda origin: cursor.update(graph, origin.x, origin.y, origin.z), walk
+    )
+    print(f"walking lane 0 ({len(walk)} updates):")
+    print(f"  LaneCursor.update:          {cursor_us:10.2f} us/call")
+    print(f"  full searches: {cursor.searches}, progress: {cursor.progress():.2f}")
+
+
+if __name__ == "__main__":
+    main()
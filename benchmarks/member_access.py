@@ -0,0 +1,141 @@
+"""
+================================================================
+    * benchmarks/member_access.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Compare the old get_member_pointer send table walk against
+    MemberTable properties. memory.Pointer and the entity's
+    server class are stand-ins backed by a bytearray.
+
+    Usage: python benchmarks/member_access.py [iterations]
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import struct
+import sys
+import time
+import types
+
+# dotf benchmarks
+from pluginloader import load_plugin_module
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+MEMORY = bytearray(4096)
+
+# Props in a send table before the one members are relative to
+TABLE_SIZE = 60
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class Pointer:
+    """Stand-in for memory.Pointer over MEMORY."""
+
+    def __init__(self, address=0):
+        self.address = int(address)
+
+    def __int__(self):
+        return self.address
+
+    def __add__(self, other):
+        return Pointer(self.address + int(other))
+
+    def get_float(self, offset=0):
+        return struct.unpack_from("<f", MEMORY, self.address + offset)[0]
+
+    def set_float(self, value, offset=0):
+        struct.pack_into("<f", MEMORY, self.address + offset, value)
+
+
+class SendProp:
+    def __init__(self, name, offset):
+        self.name = name
+        self.offset = offset
+
+
+class ServerClass:
+    def __init__(self):
+        self.table = [SendProp(f"m_prop{i}", i * 4) for i in range(TABLE_SIZE)]
+        self.table.append(SendProp("m_lastHealthPercentage", TABLE_SIZE * 4))
+
+    def find_server_class(self, name):
+        return self
+
+
+# Must exist before membertable is imported
+sys.modules["memory"] = types.SimpleNamespace(Pointer=Pointer)
+
+membertable = load_plugin_module("membertable", "core/helpers/membertable.py")
+
+MEMBERS = (
+    {
+        "name": "m_speed",
+        "type": "float",
+        "relative": "m_lastHealthPercentage",
+        "offset": 8,
+    },
+)
+
+MEMBER_TABLE = membertable.MemberTable("CTFBaseBoss", MEMBERS)
+
+
+class Entity:
+    m_speed = MEMBER_TABLE.property("m_speed")
+
+    def __init__(self):
+        self.pointer = Pointer(64)
+        self.server_class = ServerClass()
+        MEMBER_TABLE.resolve(self)
+
+    def get_member_pointer(self, name):
+        """get_member_pointer before MemberTable."""
+        for member in MEMBERS:
+            if member["name"] == name:
+                sc = "CTFBaseBoss"
+                if "server_class" in member:
+                    sc = member["server_class"]
+                for networked in self.server_class.find_server_class(sc).table:
+                    if networked.name == member["relative"]:
+                        return Pointer(
+                            self.pointer + networked.offset + member["offset"]
+                        )
+
+        return None
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    entity = Entity()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        entity.get_member_pointer("m_speed").set_float(110.0)
+    legacy_ns = (time.perf_counter() - start) / iterations * 1e9
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        entity.m_speed = 110.0
+    property_ns = (time.perf_counter() - start) / iterations * 1e9
+
+    assert entity.m_speed == entity.get_member_pointer("m_speed").get_float()
+
+    print(f"send table props: {TABLE_SIZE + 1}, iterations: {iterations}")
+    print(f"get_member_pointer().set_float: {legacy_ns:10.1f} ns/call")
+    print(f"MemberTable property set:       {property_ns:10.1f} ns/call")
+    print(f"speedup: {legacy_ns / property_ns:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+================================================================
+    * benchmarks/pluginloader.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Paths of the repository and the plugin for the benchmarks,
+    and loading plugin modules that don't need Source.Python.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import importlib.util
+from pathlib import Path
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+ROOT = Path(__file__).resolve().parent.parent
+PLUGIN_PATH = ROOT / "addons" / "source-python" / "plugins" / "dotf"
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def load_plugin_module(name, relative_path):
+    """Load a Source.Python independent plugin module by path."""
+    spec = importlib.util.spec_from_file_location(name, PLUGIN_PATH / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
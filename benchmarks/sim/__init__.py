@@ -0,0 +1,59 @@
+"""
+================================================================
+    * benchmarks/sim/__init__.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Headless simulation of the parts of Source.Python and the
+    engine dotf uses, to run the plugin in plain Python.
+
+    world = sim.install(sim.ROOT)
+    world.load_map(sim.FlatMap(lanes=3))
+    dotf = sim.load_plugin()
+    world.activate()
+    world.add_player("player", team=2, player_class=1)
+    world.say(1, "!start")
+    world.tick(1000)
+
+    Entities, memory and native functions are simulated only as far
+    as the plugin needs; NextBots walk straight toward their goal,
+    sentries never find targets and traces only hit the ground and
+    walls between lanes. Configs and translations are read from the
+    repository with the real configobj.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import importlib
+import sys
+
+# dotf benchmarks
+from pluginloader import PLUGIN_PATH, ROOT
+
+# dotf sim
+from .engine import World
+from .flatmap import FlatMap
+from .modules import install
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+PLUGINS_PATH = str(PLUGIN_PATH.parent)
+
+__all__ = ("FlatMap", "ROOT", "World", "install", "load_plugin")
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def load_plugin():
+    """Import and load dotf into the installed World, returns the plugin module."""
+    if PLUGINS_PATH not in sys.path:
+        sys.path.insert(0, PLUGINS_PATH)
+    plugin = importlib.import_module("dotf.dotf")
+    plugin.load()
+    return plugin
@@ -0,0 +1,817 @@
+"""
+================================================================
+    * benchmarks/sim/engine.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    The simulated server: entities, ticks, listeners, events,
+    commands and a flat world to trace against.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import heapq
+import logging
+import os
+import time
+from collections import Counter, defaultdict, deque
+
+# dotf sim
+from . import memory, natives
+from .mathlib import Vector, QAngle
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# The World the stand-in modules talk to, set by World()
+world = None
+
+PLATFORM = "linux"
+
+# Engine cvars the plugin reads or sets
+DEFAULT_CVARS = {
+    "mp_waitingforplayers_cancel": "0",
+    "nb_update_frequency": ".1",
+    "nb_update_framelimit": "15",
+    "tf_base_boss_max_turn_rate": "25",
+    "tf_dropped_weapon_lifetime": "30",
+}
+
+# Bits of the serial number in an inthandle
+ENTITY_INDEX_BITS = 12
+ENTITY_INDEX_MASK = (1 << ENTITY_INDEX_BITS) - 1
+
+# Source.Python log levels, messages above the level cvar are dropped
+LOG_LEVELS = {
+    "critical": (0, logging.CRITICAL),
+    "exception": (1, logging.ERROR),
+    "warning": (2, logging.WARNING),
+    "info": (3, logging.INFO),
+    "debug": (4, logging.DEBUG),
+    "message": (5, logging.INFO),
+}
+LOG_AREA_CONSOLE = 1
+LOG_AREA_FILES = 4 | 8
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class Server:
+    def __init__(self, tick_interval):
+        self.tick = 0
+        self.tick_interval = tick_interval
+
+    @property
+    def time(self):
+        return self.tick * self.tick_interval
+
+
+class Edict:
+    """State of one entity, shared by every wrapper of its index."""
+
+    __slots__ = (
+        "index",
+        "serial",
+        "classname",
+        "address",
+        "native",
+        "properties",
+        "datamaps",
+        "removed",
+    )
+
+    def __init__(self, index, serial, classname, native_class):
+        self.index = index
+        self.serial = serial
+        self.classname = classname
+        self.address = native_class.new()
+        self.native = None
+        self.properties = {
+            "m_iName": "",
+            "m_iTeamNum": 0,
+            "m_iHealth": 0,
+            "m_iMaxHealth": 0,
+            "m_vecOrigin": Vector(),
+            "m_angRotation": QAngle(),
+            "m_hOwnerEntity": -1,
+        }
+        self.datamaps = {}
+        self.removed = False
+
+    @property
+    def inthandle(self):
+        return self.serial << ENTITY_INDEX_BITS | self.index
+
+
+class EventAction:
+    CONTINUE = 0
+    STOP_BROADCAST = 1
+    BLOCK = 2
+
+
+class CommandReturn:
+    CONTINUE = 0
+    BLOCK = 1
+
+
+class SayCommand(list):
+    """Tokens of a say command, with the text after "say" as arg_string."""
+
+    def __init__(self, text):
+        super().__init__(["say", text])
+        self.arg_string = f'"{text}"'
+
+
+class GameEvent:
+    def __init__(self, name, fields):
+        self.name = name
+        self.variables = dict(fields)
+
+    def __getitem__(self, key):
+        return self.variables[key]
+
+    def __setitem__(self, key, value):
+        self.variables[key] = value
+
+    def get_int(self, key):
+        return int(self.variables.get(key, 0))
+
+    def get_string(self, key):
+        return str(self.variables.get(key, ""))
+
+
+class World:
+    """Everything the stand-in modules need from a running server.
+
+    Entities live in edicts by index, index 0 being the world.
+    Ticks run queued commands and delays, OnTick listeners, NextBot
+    updates and sentry thinks, then delete entities removed during
+    the tick, in roughly the order the engine does."""
+
+    def __init__(self, root, log_path, max_players=24, tick_interval=0.015, echo=False):
+        global world
+        world = self
+
+        self.root = root
+        self.log_path = log_path
+        self.max_players = max_players
+        self.server = Server(tick_interval)
+        self.echo = echo
+        self.console = deque(maxlen=1000)
+        self.cvars = dict(DEFAULT_CVARS)
+
+        self.edicts = {}
+        # entity and component address -> native
+        self.natives = {}
+        self.addresses = {}
+        self.free_indices = []
+        self.next_index = max_players + 1
+        self.serials = Counter()
+        self.pending_removals = []
+        self.userids = {}
+        self.next_userid = 2
+        # NextBots in update order, updated like NextBotManager
+        self.nextbots = []
+        self.sentries = []
+
+        self.listeners = defaultdict(list)
+        self.events = defaultdict(list)
+        self.pre_events = defaultdict(list)
+        self.server_commands = {}
+        self.say_filters = []
+        self.user_message_hooks = defaultdict(list)
+        self.entity_hooks = []
+        self.commands = deque()
+        self.delays = []
+        self.delay_count = 0
+
+        self.walls = []
+        self.map_name = None
+
+        # name -> count, delivered and blocked by hooks
+        self.user_messages = Counter()
+        self.blocked_user_messages = Counter()
+        self.last_user_messages = deque(maxlen=100)
+        self.sounds = Counter()
+        self.blocked_sounds = Counter()
+        self.temp_entities = Counter()
+        self.blocked_temp_entities = Counter()
+        # name -> pointer, the engine has one static object per temp entity
+        self.temp_entity_pointers = {}
+
+        self.create_entity("worldspawn", index=0)
+
+    # =========================================================================
+    # >> ENTITIES
+    # =========================================================================
+    def create_entity(self, classname, index=None):
+        if index is None:
+            if self.free_indices:
+                index = heapq.heappop(self.free_indices)
+            else:
+                index = self.next_index
+                self.next_index += 1
+        self.serials[index] += 1
+        native_class = natives.get_native_class(classname)
+        edict = Edict(index, self.serials[index], classname, native_class)
+        self.edicts[index] = edict
+        self.addresses[edict.address] = edict
+        edict.native = natives.create_native(edict)
+        self.apply_entity_hooks(edict)
+        return edict
+
+    def remove_entity(self, index):
+        """Mark for deletion at the end of the tick, like UTIL_Remove."""
+        edict = self.edicts.get(index)
+        if edict is None or edict.removed or index == 0:
+            return
+        edict.removed = True
+        self.pending_removals.append(edict)
+
+    def flush_removals(self):
+        from .entities import Entity
+
+        while self.pending_removals:
+            edict = self.pending_removals.pop(0)
+            self.fire_listeners("OnEntityDeleted", Entity(edict.index))
+            if edict.native is not None:
+                edict.native.on_removed()
+            del self.edicts[edict.index]
+            self.addresses.pop(edict.address, None)
+            self.natives.pop(edict.address, None)
+            if edict.index > self.max_players:
+                heapq.heappush(self.free_indices, edict.index)
+
+    def get_edict(self, index):
+        edict = self.edicts.get(index)
+        if edict is None:
+            raise ValueError(f'Conversion from "Index" ({index}) failed.')
+        return edict
+
+    def edict_from_inthandle(self, inthandle):
+        if inthandle < 0:
+            raise ValueError(f'Conversion from "IntHandle" ({inthandle}) failed.')
+        edict = self.edicts.get(inthandle & ENTITY_INDEX_MASK)
+        if edict is None or edict.serial != inthandle >> ENTITY_INDEX_BITS:
+            raise ValueError(f'Conversion from "IntHandle" ({inthandle}) failed.')
+        return edict
+
+    def find_entities(self, classname=None):
+        """Edicts not marked for removal, optionally only of classname."""
+        return [
+            edict
+            for edict in list(self.edicts.values())
+            if not edict.removed and (classname is None or edict.classname == classname)
+        ]
+
+    def players(self):
+        return [
+            edict
+            for index, edict in sorted(self.edicts.items())
+            if 0 < index <= self.max_players and not edict.removed
+        ]
+
+    def apply_entity_hooks(self, edict):
+        """Hook functions of a new entity for EntityPreHooks whose condition matches."""
+        if not self.entity_hooks:
+            return
+        from .entities import Entity
+
+        entity = Entity(edict.index)
+        for hook in self.entity_hooks:
+            hook.apply(entity)
+
+    # =========================================================================
+    # >> GAME
+    # =========================================================================
+    def load_map(self, flat_map):
+        """Replace all entities with the map's, firing level change listeners."""
+        if self.map_name is not None:
+            self.fire_listeners("OnLevelEnd")
+            for edict in self.find_entities():
+                self.remove_entity(edict.index)
+            self.flush_removals()
+
+        self.map_name = flat_map.name
+        self.walls = list(flat_map.walls())
+        for target_name, origin, angles in flat_map.targets():
+            edict = self.create_entity("info_target")
+            edict.properties["m_iName"] = target_name
+            edict.properties["m_vecOrigin"] = origin
+            edict.properties["m_angRotation"] = angles
+        self.fire_listeners("OnLevelInit", self.map_name)
+
+    def activate(self):
+        self.fire_listeners(
+            "OnServerActivate", None, len(self.edicts), self.max_players
+        )
+
+    def add_player(
+        self, name, team=0, player_class=0, origin=None, fake=False, spawn=True
+    ):
+        """Connect a player, returns its index."""
+        index = next(
+            (i for i in range(1, self.max_players + 1) if i not in self.edicts), None
+        )
+        if index is None:
+            raise ValueError("Server is full")
+        edict = self.create_entity("player", index=index)
+        native = edict.native
+        native.name = name
+        native.fake = fake
+        native.userid = self.next_userid
+        self.next_userid += 1
+        self.userids[native.userid] = index
+        edict.properties["m_iTeamNum"] = team
+        edict.properties["m_PlayerClass.m_iClass"] = player_class
+        edict.properties["m_Shared.m_iDesiredPlayerClass"] = player_class
+        if origin is not None:
+            edict.properties["m_vecOrigin"] = origin.copy()
+
+        self.fire_listeners("OnClientActive", index)
+        if spawn and team > 1:
+            self.spawn_player(index)
+        return index
+
+    def remove_player(self, index):
+        edict = self.get_edict(index)
+        self.fire_listeners("OnClientDisconnect", index)
+        self.userids.pop(edict.native.userid, None)
+        self.remove_entity(index)
+        self.flush_removals()
+
+    def spawn_player(self, index):
+        edict = self.get_edict(index)
+        edict.native.spawn()
+        self.fire_event("player_spawn", userid=edict.native.userid)
+
+    def damage(self, victim, amount, attacker=0, inflictor=0):
+        """Deal damage through OnTakeDamage, like an attack would."""
+        from .entities import TakeDamageInfo
+
+        edict = self.get_edict(victim)
+        function = natives.get_native_class(edict.classname).function_by_name(
+            "OnTakeDamage"
+        )
+        info = TakeDamageInfo()
+        info.attacker = attacker
+        info.inflictor = inflictor
+        info.damage = info.base_damage = float(amount)
+        pointer = memory.store_object(info)
+        try:
+            function(memory.Pointer(edict.address), pointer)
+        finally:
+            memory.free_object(pointer)
+
+    def kill(self, index):
+        edict = self.get_edict(index)
+        self.damage(index, edict.properties["m_iHealth"] * 100 + 1000)
+
+    def say(self, index, text):
+        """Chat from a player. Say filters can block it, like with
+        Source.Python, otherwise like Host_Say, SayText2 is sent
+        to each recipient separately."""
+        from .messages import RecipientFilter
+
+        command = SayCommand(text)
+        for callback in tuple(self.say_filters):
+            if callback(command, index, False) == CommandReturn.BLOCK:
+                return
+
+        sender = self.get_edict(index)
+        for player in self.players():
+            self.send_user_message(
+                "SayText2",
+                RecipientFilter(player.index),
+                {
+                    "index": index,
+                    "chat": True,
+                    "message": "TF_Chat_All",
+                    "param1": sender.native.name,
+                    "param2": text,
+                    "param3": "",
+                    "param4": "",
+                },
+            )
+        self.fire_event("player_say", userid=sender.native.userid, text=text)
+
+    def emit_sound(self, sample, index=0, origin=None):
+        from .messages import RecipientFilter
+
+        function = natives.ENGINE_SOUND.get_virtual_function("EmitSound")
+        result = function(
+            natives.ENGINE_SOUND,
+            RecipientFilter(),
+            index,
+            0,
+            sample,
+            1.0,
+            75,
+            0,
+            100,
+            0,
+            origin,
+            None,
+            None,
+            True,
+            0.0,
+            -1,
+        )
+        if result is not None:
+            self.blocked_sounds[sample] += 1
+
+    def playback_temp_entity(self, name, origin=None):
+        from .messages import RecipientFilter
+
+        function = natives.ENGINE_SERVER.get_virtual_function("PlaybackTempEntity")
+        pointer = self.temp_entity_pointers.get(name)
+        if pointer is None:
+            pointer = memory.store_object(natives.TempEntityData(name))
+            self.temp_entity_pointers[name] = pointer
+        memory.objects[pointer.address].origin = origin
+        result = function(natives.ENGINE_SERVER, RecipientFilter(), 0.0, pointer)
+        if result is not None:
+            self.blocked_temp_entities[name] += 1
+
+    # =========================================================================
+    # >> TICKS
+    # =========================================================================
+    def tick(self, count=1):
+        for _ in range(count):
+            self.server.tick += 1
+            self.run_commands()
+            self.run_delays()
+            self.fire_listeners("OnTick")
+            self.update_nextbots()
+            self.think_sentries()
+            self.flush_removals()
+
+    def update_nextbots(self):
+        """Update bots that haven't been for nb_update_frequency,
+        oldest first, until nb_update_framelimit ms is used."""
+        frequency = float(self.cvars["nb_update_frequency"])
+        limit = float(self.cvars["nb_update_framelimit"]) / 1000.0
+        now = self.server.time
+        start = time.perf_counter()
+        self.nextbots.sort(key=lambda native: native.last_update)
+        for native in list(self.nextbots):
+            if now - native.last_update < frequency:
+                break
+            if limit > 0.0 and time.perf_counter() - start > limit:
+                break
+            native.update(now)
+
+    def think_sentries(self):
+        now = self.server.time
+        for native in list(self.sentries):
+            native.think(now)
+
+    def delay(self, seconds, callback, args=(), kwargs=None):
+        self.delay_count += 1
+        heapq.heappush(
+            self.delays,
+            (
+                self.server.time + seconds,
+                self.delay_count,
+                callback,
+                tuple(args),
+                kwargs or {},
+            ),
+        )
+
+    def run_delays(self):
+        now = self.server.time
+        while self.delays and self.delays[0][0] <= now:
+            _, _, callback, args, kwargs = heapq.heappop(self.delays)
+            callback(*args, **kwargs)
+
+    # =========================================================================
+    # >> CALLBACKS
+    # =========================================================================
+    def fire_listeners(self, name, *args):
+        for callback in tuple(self.listeners[name]):
+            callback(*args)
+
+    def fire_event(self, name, **fields):
+        """Run pre-event hooks then event listeners, returns the EventAction."""
+        event = GameEvent(name, fields)
+        action = EventAction.CONTINUE
+        for callback in tuple(self.pre_events[name]):
+            result = callback(event)
+            if result is not None and result > action:
+                action = result
+        if action == EventAction.BLOCK:
+            return action
+        for callback in tuple(self.events[name]):
+            callback(event)
+        return action
+
+    def send_user_message(self, name, recipients, data):
+        """Run user message hooks, then deliver to whoever is left."""
+        for callback in tuple(self.user_message_hooks[name]):
+            callback(recipients, data)
+        if len(recipients) == 0:
+            self.blocked_user_messages[name] += 1
+            return
+        self.user_messages[name] += 1
+        self.last_user_messages.append((name, tuple(recipients), dict(data)))
+
+    def queue_command(self, command):
+        self.commands.append(command)
+
+    def run_commands(self):
+        while self.commands:
+            self.run_command(self.commands.popleft())
+
+    def run_command(self, command):
+        for line in command.split(";"):
+            args = line.split()
+            if not args:
+                continue
+            if args[0] in self.server_commands:
+                self.server_commands[args[0]](args)
+            elif args[0] == "exec" and len(args) > 1:
+                self.exec_config(args[1])
+            elif args[0] == "nb_delete_all":
+                for edict in self.find_entities("base_boss"):
+                    self.remove_entity(edict.index)
+            elif args[0] in self.cvars and len(args) > 1:
+                self.cvars[args[0]] = args[1]
+
+    def exec_config(self, name):
+        path = os.path.join(self.root, "cfg", f"{name}.cfg")
+        if not os.path.isfile(path):
+            self.echo_console(f"exec: couldn't exec {name}")
+            return
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                self.run_command(line.split("//")[0])
+
+    def echo_console(self, text):
+        self.console.append(text)
+        if self.echo:
+            print(text)
+
+    # =========================================================================
+    # >> TRACES
+    # =========================================================================
+    def trace(self, start, end):
+        """Fraction of start -> end until the ground at z = 0 or a wall is hit."""
+        fraction = 1.0
+        dx = end.x - start.x
+        dy = end.y - start.y
+        dz = end.z - start.z
+        if dz < 0.0 and start.z >= 0.0 and end.z < 0.0:
+            fraction = start.z / -dz
+
+        for mins, maxs in self.walls:
+            enter = 0.0
+            leave = fraction
+            for origin, delta, low, high in (
+                (start.x, dx, mins.x, maxs.x),
+                (start.y, dy, mins.y, maxs.y),
+                (start.z, dz, mins.z, maxs.z),
+            ):
+                if delta == 0.0:
+                    if origin < low or origin > high:
+                        break
+                    continue
+                t0 = (low - origin) / delta
+                t1 = (high - origin) / delta
+                if t0 > t1:
+                    t0, t1 = t1, t0
+                enter = max(enter, t0)
+                leave = min(leave, t1)
+                if enter > leave:
+                    break
+            else:
+                fraction = min(fraction, enter)
+
+        return fraction
+
+
+# =============================================================================
+# >> STAND-INS
+# =============================================================================
+class ConVar:
+    def __init__(self, name, value="0", description="", flags=0, *args):
+        self.name = name
+        world.cvars.setdefault(name, str(value))
+
+    def get_string(self):
+        return world.cvars[self.name]
+
+    def get_int(self):
+        return int(float(world.cvars[self.name]))
+
+    def get_float(self):
+        return float(world.cvars[self.name])
+
+    def get_bool(self):
+        return self.get_int() != 0
+
+    def set_string(self, value):
+        world.cvars[self.name] = str(value)
+
+    def set_int(self, value):
+        world.cvars[self.name] = str(int(value))
+
+    def set_float(self, value):
+        world.cvars[self.name] = str(float(value))
+
+    def set_bool(self, value):
+        world.cvars[self.name] = "1" if value else "0"
+
+
+class _CvarInterface:
+    def find_var(self, name):
+        if name not in world.cvars:
+            return None
+        return ConVar(name)
+
+
+cvar = _CvarInterface()
+
+
+class LogManager:
+    """Writes to LOG_PATH/<filepath>.log and the console, depending on the cvars."""
+
+    def __init__(
+        self, name, level, areas, filepath=None, log_format=None, date_format=None
+    ):
+        self.level = level
+        self.areas = areas
+        self.logger = logging.getLogger(f"sim.{name}.{filepath}")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        if filepath is not None:
+            handler = logging.FileHandler(
+                os.path.join(world.log_path, f"{filepath}.log"),
+                encoding="utf-8",
+                delay=True,
+            )
+            handler.setFormatter(logging.Formatter(log_format, date_format))
+            self.logger.addHandler(handler)
+
+    def _log(self, level, msg, *args, **kwargs):
+        sp_level, logging_level = LOG_LEVELS[level]
+        if sp_level > self.level.get_int():
+            return
+        areas = self.areas.get_int()
+        if areas & LOG_AREA_CONSOLE:
+            world.echo_console(msg)
+        if areas & LOG_AREA_FILES:
+            self.logger.log(logging_level, msg)
+
+    def log_critical(self, msg, *args, **kwargs):
+        self._log("critical", msg)
+
+    def log_exception(self, msg, *args, **kwargs):
+        self._log("exception", msg)
+
+    def log_warning(self, msg, *args, **kwargs):
+        self._log("warning", msg)
+
+    def log_info(self, msg, *args, **kwargs):
+        self._log("info", msg)
+
+    def log_debug(self, msg, *args, **kwargs):
+        self._log("debug", msg)
+
+    def log_message(self, msg, *args, **kwargs):
+        self._log("message", msg)
+
+
+class Ray:
+    def __init__(self, start, end, mins=None, maxs=None):
+        self.start = start.copy()
+        self.end = end.copy()
+
+
+class ContentMasks:
+    ALL = 0xFFFFFFFF
+    SOLID = 0x200400B
+    SOLID_BRUSH_ONLY = 0x400B
+    PLAYER_SOLID = 0x201400B
+    PLAYER_SOLID_BRUSH_ONLY = 0x1400B
+    NPC_SOLID = 0x202400B
+    NPC_SOLID_BRUSH_ONLY = 0x2400B
+
+
+class TraceFilterSimple:
+    """Only the world is traced against, so nothing to filter."""
+
+    def __init__(self, ignore=(), trace_type=0):
+        self.ignore = ignore
+
+
+class GameTrace:
+    def __init__(self):
+        self.fraction = 1.0
+        self.start_position = Vector()
+        self.end_position = Vector()
+        self.entity = None
+
+    def did_hit(self):
+        return self.fraction < 1.0
+
+    def is_valid(self):
+        return self.did_hit()
+
+
+class _EngineTrace:
+    def __init__(self):
+        self.traces = 0
+
+    def trace_ray(self, ray, mask, trace_filter, trace):
+        from .entities import Entity
+
+        self.traces += 1
+        fraction = world.trace(ray.start, ray.end)
+        trace.fraction = fraction
+        trace.start_position = ray.start.copy()
+        trace.end_position = ray.start + (ray.end - ray.start) * fraction
+        trace.entity = Entity(0) if fraction < 1.0 else None
+
+
+engine_trace = _EngineTrace()
+
+
+class Model:
+    def __init__(self, path, preload=False, download=False):
+        self.path = path
+
+
+def echo_console(text):
+    world.echo_console(text)
+
+
+def get_interface(library, interface):
+    return memory.Pointer(memory.symbol_address(f"{library}:{interface}"))
+
+
+def queue_command_string(command):
+    world.queue_command(command)
+
+
+def _listener(name):
+    def decorator(callback):
+        world.listeners[name].append(callback)
+        return callback
+
+    decorator.__name__ = name
+    return decorator
+
+
+OnClientActive = _listener("OnClientActive")
+OnClientDisconnect = _listener("OnClientDisconnect")
+OnEntityDeleted = _listener("OnEntityDeleted")
+OnEntitySpawned = _listener("OnEntitySpawned")
+OnLevelEnd = _listener("OnLevelEnd")
+OnLevelInit = _listener("OnLevelInit")
+OnNetworkedEntitySpawned = _listener("OnNetworkedEntitySpawned")
+OnServerActivate = _listener("OnServerActivate")
+OnTick = _listener("OnTick")
+
+
+def Event(*names):
+    def decorator(callback):
+        for name in names:
+            world.events[name].append(callback)
+        return callback
+
+    return decorator
+
+
+def PreEvent(*names):
+    def decorator(callback):
+        for name in names:
+            world.pre_events[name].append(callback)
+        return callback
+
+    return decorator
+
+
+def SayFilter(callback):
+    world.say_filters.append(callback)
+    return callback
+
+
+def ServerCommand(names, description="", flags=0):
+    if isinstance(names, str):
+        names = [names]
+
+    def decorator(callback):
+        for name in names:
+            world.server_commands[name] = callback
+        return callback
+
+    return decorator
@@ -0,0 +1,512 @@
+"""
+================================================================
+    * benchmarks/sim/entities.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Stand-ins for Source.Python entities, players, filters and
+    entity hooks, wrapping edicts of the simulated World.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# dotf sim
+from . import engine, natives
+from .mathlib import Vector, QAngle
+from .memory import Pointer
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class ServerClass:
+    def __init__(self, name):
+        self.name = name
+        self.table = [
+            SendProp(prop, offset)
+            for prop, offset in natives.SERVER_CLASSES.get(name, {}).items()
+        ]
+
+    def find_server_class(self, name):
+        return ServerClass(name)
+
+
+class SendProp:
+    __slots__ = ("name", "offset")
+
+    def __init__(self, name, offset):
+        self.name = name
+        self.offset = offset
+
+
+def _entity_property(name):
+    def fget(entity):
+        value = entity._edict.properties[name]
+        if isinstance(value, (Vector, QAngle)):
+            return value.copy()
+        return value
+
+    def fset(entity, value):
+        if isinstance(value, (Vector, QAngle)):
+            value = value.copy()
+        entity._edict.properties[name] = value
+
+    return property(fget, fset)
+
+
+class Entity:
+    """Wraps an edict, any number of wrappers can share one."""
+
+    def __init__(self, index, caching=None):
+        self._edict = engine.world.get_edict(index)
+
+    origin = _entity_property("m_vecOrigin")
+    angles = rotation = _entity_property("m_angRotation")
+    team = _entity_property("m_iTeamNum")
+    health = _entity_property("m_iHealth")
+    max_health = _entity_property("m_iMaxHealth")
+    target_name = _entity_property("m_iName")
+    owner_handle = _entity_property("m_hOwnerEntity")
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.index})"
+
+    def __eq__(self, other):
+        return isinstance(other, Entity) and self._edict is other._edict
+
+    def __hash__(self):
+        return self._edict.index
+
+    @classmethod
+    def create(cls, classname):
+        return cls(engine.world.create_entity(classname).index)
+
+    @classmethod
+    def from_inthandle(cls, inthandle, caching=None):
+        return cls(engine.world.edict_from_inthandle(inthandle).index)
+
+    @classmethod
+    def _from_address(cls, address):
+        return cls(engine.world.addresses[address].index)
+
+    @property
+    def index(self):
+        return self._edict.index
+
+    @property
+    def inthandle(self):
+        return self._edict.inthandle
+
+    @property
+    def classname(self):
+        return self._edict.classname
+
+    @property
+    def pointer(self):
+        return Pointer(self._edict.address)
+
+    @property
+    def server_class(self):
+        return ServerClass(type(self._edict.native).native_class.name)
+
+    @property
+    def model(self):
+        return engine.Model(self._edict.properties.get("m_ModelName", ""))
+
+    @model.setter
+    def model(self, model):
+        self._edict.properties["m_ModelName"] = model.path
+
+    @property
+    def on_take_damage(self):
+        native_class = type(self._edict.native).native_class
+        return native_class.function_by_name("OnTakeDamage")
+
+    def is_player(self):
+        return self._edict.classname == "player"
+
+    def get_property(self, name, default=0):
+        value = self._edict.properties.get(name, default)
+        if isinstance(value, (Vector, QAngle)):
+            return value.copy()
+        return value
+
+    def set_property(self, name, value):
+        if isinstance(value, (Vector, QAngle)):
+            value = value.copy()
+        self._edict.properties[name] = value
+
+    def get_property_int(self, name):
+        return self.get_property(name, 0)
+
+    def get_property_float(self, name):
+        return self.get_property(name, 0.0)
+
+    def get_property_bool(self, name):
+        return self.get_property(name, False)
+
+    def get_property_string(self, name):
+        return self.get_property(name, "")
+
+    def get_property_vector(self, name):
+        return self.get_property(name, Vector())
+
+    def get_property_quangle(self, name):
+        return self.get_property(name, QAngle())
+
+    get_property_uchar = get_property_ushort = get_property_short = get_property_int
+    get_property_char = get_property_uint = get_property_int
+
+    def set_property_int(self, name, value):
+        self.set_property(name, int(value))
+
+    def set_property_float(self, name, value):
+        self.set_property(name, float(value))
+
+    def set_property_bool(self, name, value):
+        self.set_property(name, bool(value))
+
+    set_property_uchar = set_property_ushort = set_property_short = set_property_int
+    set_property_char = set_property_uint = set_property_int
+    set_property_string = set_property_vector = set_property_quangle = set_property
+
+    def get_datamap_property_int(self, name):
+        return self._edict.datamaps.get(name, 0)
+
+    def set_datamap_property_int(self, name, value):
+        self._edict.datamaps[name] = int(value)
+
+    get_datamap_property_uchar = get_datamap_property_int
+    set_datamap_property_uchar = set_datamap_property_int
+
+    def call_input(self, name, *args):
+        if not self._edict.removed:
+            self._edict.native.input(name, args)
+
+    def take_damage(self, damage, damage_type=0, attacker_index=0, **kwargs):
+        engine.world.damage(self.index, damage, attacker_index)
+
+    def remove(self):
+        engine.world.remove_entity(self.index)
+
+    def delay(self, delay, callback, args=(), kwargs=None, cancel_on_level_end=False):
+        engine.world.delay(delay, callback, args, kwargs)
+
+
+class BaseEntity(Entity):
+    pass
+
+
+class Player(Entity):
+    @classmethod
+    def from_userid(cls, userid, caching=None):
+        index = engine.world.userids.get(userid)
+        if index is None:
+            raise ValueError(f'Conversion from "Userid" ({userid}) failed.')
+        return cls(index)
+
+    @property
+    def userid(self):
+        return self._edict.native.userid
+
+    @property
+    def steamid(self):
+        if self._edict.native.fake:
+            return "BOT"
+        return f"[U:1:{self._edict.native.userid}]"
+
+    @property
+    def name(self):
+        return self._edict.native.name
+
+    @name.setter
+    def name(self, value):
+        self._edict.native.name = value
+
+    @property
+    def language(self):
+        return "en"
+
+    @property
+    def dead(self):
+        return self._edict.properties["m_lifeState"] != natives.LIFE_ALIVE
+
+    @property
+    def view_offset(self):
+        return Vector(0.0, 0.0, 68.0)
+
+    @property
+    def eye_angle(self):
+        return self.angles
+
+    @property
+    def view_vector(self):
+        forward = Vector()
+        self.angles.get_angle_vectors(forward)
+        return forward
+
+    def get_eye_location(self):
+        return self.origin + self.view_offset
+
+    def is_bot(self):
+        return self._edict.native.fake
+
+    def is_fake_client(self):
+        return self._edict.native.fake
+
+    def is_observer(self):
+        return (
+            self._edict.properties["m_iTeamNum"] < 2
+            or self._edict.properties["m_iObserverMode"] != 0
+        )
+
+    def spawn(self, force=False):
+        engine.world.spawn_player(self.index)
+
+    def teleport(self, origin=None, angles=None, velocity=None):
+        if origin is not None:
+            self.origin = origin
+        if angles is not None:
+            self.angles = angles
+
+    def set_noblock(self, value):
+        self.set_property_int("m_CollisionGroup", 2 if value else 5)
+
+    def weapons(self, *args, **kwargs):
+        return iter(())
+
+    def weapon_indexes(self, *args, **kwargs):
+        return iter(())
+
+    def kick(self, message=""):
+        engine.world.remove_player(self.index)
+
+
+class Weapon(Entity):
+    @property
+    def weapon_name(self):
+        return self.classname
+
+
+class PlayerInfo:
+    def __init__(self, player):
+        self.userid = player.userid
+        self.name = player.name
+        self.steamid = player.steamid
+        self.fake = player.is_fake_client()
+
+    def is_fake_client(self):
+        return self.fake
+
+    def is_hltv(self):
+        return False
+
+
+class TakeDamageInfo:
+    def __init__(self):
+        self.attacker = 0
+        self.inflictor = 0
+        self.weapon = 0
+        self.damage = 0.0
+        self.base_damage = 0.0
+        self.type = 0
+
+
+class EntityCondition:
+    @staticmethod
+    def is_player(entity):
+        return entity.is_player()
+
+    @staticmethod
+    def is_not_player(entity):
+        return not entity.is_player()
+
+    @staticmethod
+    def is_bot_player(entity):
+        return entity.is_player() and Player(entity.index).is_bot()
+
+    @staticmethod
+    def is_human_player(entity):
+        return entity.is_player() and not Player(entity.index).is_bot()
+
+    @staticmethod
+    def equals_entity_classname(*classnames):
+        return lambda entity: entity.classname in classnames
+
+
+class EntityPreHook:
+    """Pre-hooks function of entities matching test_function as they're created.
+
+    function is the name of a Function attribute of the entity
+    or a callable returning the Function for an entity."""
+
+    def __init__(self, test_function, function):
+        self.test_function = test_function
+        self.function = function
+        self.callback = None
+
+    def __call__(self, callback):
+        self.callback = callback
+        engine.world.entity_hooks.append(self)
+        for edict in list(engine.world.edicts.values()):
+            self.apply(Entity(edict.index))
+        return callback
+
+    def apply(self, entity):
+        if not self.test_function(entity):
+            return
+        if isinstance(self.function, str):
+            function = getattr(entity, self.function)
+        else:
+            function = self.function(entity)
+        if self.callback not in function.pre_hooks:
+            self.add_hook(function)
+
+    def add_hook(self, function):
+        function.add_pre_hook(self.callback)
+
+
+class EntityPostHook(EntityPreHook):
+    """Post-hooks aren't simulated, the callback is never called."""
+
+    def add_hook(self, function):
+        pass
+
+
+class EntityIter:
+    def __init__(self, classname=None, exact_match=True):
+        self.classname = classname
+
+    def __iter__(self):
+        for edict in engine.world.find_entities(self.classname):
+            yield Entity(edict.index)
+
+
+class PlayerIter:
+    """Players matching all is_filters and none of not_filters."""
+
+    FILTERS = {
+        "all": lambda player: True,
+        "bot": lambda player: player.is_bot(),
+        "human": lambda player: not player.is_bot(),
+        "alive": lambda player: not player.dead,
+        "dead": lambda player: player.dead,
+        "red": lambda player: player.team == 2,
+        "blue": lambda player: player.team == 3,
+        "spec": lambda player: player.team == 1,
+        "un": lambda player: player.team == 0,
+    }
+
+    def __init__(self, is_filters=(), not_filters=()):
+        if isinstance(is_filters, str):
+            is_filters = [is_filters]
+        if isinstance(not_filters, str):
+            not_filters = [not_filters]
+        self.is_filters = [self.FILTERS[name] for name in is_filters]
+        self.not_filters = [self.FILTERS[name] for name in not_filters]
+
+    def __iter__(self):
+        for player in PlayerIter.iterator():
+            if all(test(player) for test in self.is_filters) and not any(
+                test(player) for test in self.not_filters
+            ):
+                yield player
+
+    @staticmethod
+    def iterator():
+        for edict in engine.world.players():
+            yield Player(edict.index)
+
+
+class BotCmd:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.command_number = 0
+        self.tick_count = 0
+        self.view_angles = QAngle()
+        self.forward_move = 0.0
+        self.side_move = 0.0
+        self.up_move = 0.0
+        self.buttons = 0
+        self.impulse = 0
+        self.weaponselect = 0
+        self.weaponsubtype = 0
+        self.random_seed = 0
+        self.mousedx = 0
+        self.mousedy = 0
+        self.has_been_predicted = False
+
+
+class BotController:
+    def __init__(self, index):
+        self.index = index
+
+    def run_player_move(self, command):
+        pass
+
+
+class BotEdict:
+    def __init__(self, index):
+        self.index = index
+
+
+class _BotManager:
+    def create_bot(self, name):
+        return BotEdict(engine.world.add_player(name, fake=True, spawn=False))
+
+    def get_bot_controller(self, edict):
+        return BotController(edict.index)
+
+
+bot_manager = _BotManager()
+
+
+class PlayerButtons:
+    ATTACK = 1 << 0
+    JUMP = 1 << 1
+    DUCK = 1 << 2
+    FORWARD = 1 << 3
+    BACK = 1 << 4
+    USE = 1 << 5
+    ATTACK2 = 1 << 11
+    RELOAD = 1 << 13
+
+
+class CollisionGroup:
+    NONE = 0
+    DEBRIS = 1
+    DEBRIS_TRIGGER = 2
+    PLAYER = 5
+
+
+class SteamID:
+    def __init__(self, account_id=0):
+        self.account_id = account_id
+
+    @staticmethod
+    def parse(steamid):
+        return SteamID(int(str(steamid).rstrip("]").split(":")[-1]))
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def baseentity_from_index(index):
+    return BaseEntity(index)
+
+
+def index_from_edict(edict):
+    return edict.index
+
+
+def playerinfo_from_index(index):
+    return PlayerInfo(Player(index))
+
+
+def userid_from_index(index):
+    return Player(index).userid
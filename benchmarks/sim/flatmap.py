@@ -0,0 +1,110 @@
+"""
+================================================================
+    * benchmarks/sim/flatmap.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    A flat test map with straight, parallel lanes.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# dotf sim
+from .mathlib import Vector, QAngle
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+TEAM_RED = 2
+TEAM_BLU = 3
+
+# Distance of the first spawn point and sentry from the end of a lane
+SPAWN_MARGIN = 256.0
+SPAWN_SPACING = 64.0
+WALL_HEIGHT = 512.0
+# Sentry tiers in building_settings.ini
+SENTRY_TIERS = 3
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class FlatMap:
+    """Lanes run along x, lane_spacing apart on y, on the ground at z = 0.
+
+    BLU spawns at the start of each lane, RED at the end. Each team
+    has bots_per_lane spawn points per lane, so that many bots per
+    wave, and sentries_per_lane sentries spread over its half,
+    tiers going up toward its spawn.
+    With walls, lanes are separated by walls blocking sight."""
+
+    def __init__(
+        self,
+        lanes=3,
+        nodes_per_lane=8,
+        lane_length=6144.0,
+        lane_spacing=1536.0,
+        bots_per_lane=4,
+        sentries_per_lane=2,
+        walls=True,
+        name="dotf_sim_flat",
+    ):
+        self.lanes = lanes
+        self.nodes_per_lane = max(2, nodes_per_lane)
+        self.lane_length = lane_length
+        self.lane_spacing = lane_spacing
+        self.bots_per_lane = bots_per_lane
+        self.sentries_per_lane = sentries_per_lane
+        self.has_walls = walls
+        self.name = name
+
+    def lane_y(self, lane):
+        return (lane - (self.lanes - 1) / 2.0) * self.lane_spacing
+
+    def walls(self):
+        """(mins, maxs) boxes halfway between adjacent lanes."""
+        if not self.has_walls:
+            return
+        for lane in range(self.lanes - 1):
+            y = (self.lane_y(lane) + self.lane_y(lane + 1)) / 2.0
+            yield (
+                Vector(SPAWN_MARGIN, y - 32.0, 0.0),
+                Vector(self.lane_length - SPAWN_MARGIN, y + 32.0, WALL_HEIGHT),
+            )
+
+    def targets(self):
+        """(target name, origin, angles) of every info_target."""
+        for lane in range(self.lanes):
+            y = self.lane_y(lane)
+            step = self.lane_length / (self.nodes_per_lane - 1)
+            for index in range(self.nodes_per_lane):
+                yield (
+                    f"dotf_bot_lane_node_{lane}_{index}",
+                    Vector(index * step, y, 0.0),
+                    QAngle(),
+                )
+
+            for team, x, direction, yaw in (
+                (TEAM_BLU, 0.0, 1.0, 0.0),
+                (TEAM_RED, self.lane_length, -1.0, 180.0),
+            ):
+                for bot in range(self.bots_per_lane):
+                    offset = (bot - (self.bots_per_lane - 1) / 2.0) * SPAWN_SPACING
+                    yield (
+                        f"dotf_bot_spawn_point_{team}_{lane}_{bot % 2}",
+                        Vector(x + direction * SPAWN_MARGIN, y + offset, 0.0),
+                        QAngle(0.0, yaw, 0.0),
+                    )
+
+                half = self.lane_length / 2.0 - SPAWN_MARGIN
+                for sentry in range(self.sentries_per_lane):
+                    distance = half - sentry * half / self.sentries_per_lane
+                    tier = min(sentry, SENTRY_TIERS - 1)
+                    yield (
+                        f"dotf_sentry_spawn_point_{team}_{lane}_{tier}",
+                        Vector(x + direction * distance, y + 128.0, 0.0),
+                        QAngle(0.0, yaw, 0.0),
+                    )
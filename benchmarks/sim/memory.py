@@ -0,0 +1,296 @@
+"""
+================================================================
+    * benchmarks/sim/memory.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Stand-in for Source.Python memory.
+
+    Memory is a dict of address -> value instead of bytes, every
+    simulated object starts with the address of its class vtable.
+    Virtual and signature functions are Python callables that can
+    be pre-hooked like the real ones.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import itertools
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Room for members of one object
+OBJECT_SIZE = 0x4000
+
+# address -> value
+heap = {}
+# address -> Python object living there, i.e. a Vector or TakeDamageInfo
+objects = {}
+# vtable address -> SimClass
+vtables = {}
+# signature or symbol -> address
+symbol_addresses = {}
+# address -> Function
+symbols = {}
+
+_next_address = itertools.count(0x10000000, OBJECT_SIZE)
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class Convention:
+    CDECL = 0
+    STDCALL = 1
+    THISCALL = 2
+
+
+class DataType:
+    VOID = 0
+    BOOL = 1
+    CHAR = 2
+    UCHAR = 3
+    SHORT = 4
+    USHORT = 5
+    INT = 6
+    UINT = 7
+    LONG = 8
+    ULONG = 9
+    FLOAT = 10
+    DOUBLE = 11
+    POINTER = 12
+    STRING = 13
+
+
+class Pointer:
+    __slots__ = ("address",)
+
+    def __init__(self, address=0):
+        self.address = address.address if isinstance(address, Pointer) else address
+
+    def __repr__(self):
+        return f"Pointer({self.address:#x})"
+
+    def __bool__(self):
+        return self.address != 0
+
+    def __eq__(self, other):
+        return isinstance(other, Pointer) and self.address == other.address
+
+    def __hash__(self):
+        return hash(self.address)
+
+    def __int__(self):
+        return self.address
+
+    def __add__(self, offset):
+        return Pointer(self.address + int(offset))
+
+    def __sub__(self, offset):
+        return Pointer(self.address - int(offset))
+
+    def get_pointer(self, offset=0):
+        return Pointer(heap.get(self.address + offset, 0))
+
+    def set_pointer(self, value, offset=0):
+        heap[self.address + offset] = Pointer(value).address
+
+    def get_float(self, offset=0):
+        return heap.get(self.address + offset, 0.0)
+
+    def set_float(self, value, offset=0):
+        heap[self.address + offset] = float(value)
+
+    def get_int(self, offset=0):
+        return heap.get(self.address + offset, 0)
+
+    def set_int(self, value, offset=0):
+        heap[self.address + offset] = int(value)
+
+    get_uint = get_uchar = get_ushort = get_short = get_char = get_int
+    set_uint = set_uchar = set_ushort = set_short = set_char = set_int
+
+    def get_bool(self, offset=0):
+        return heap.get(self.address + offset, False)
+
+    def set_bool(self, value, offset=0):
+        heap[self.address + offset] = bool(value)
+
+    def get_string_pointer(self, offset=0):
+        return heap.get(self.address + offset, "")
+
+    def set_string_pointer(self, value, offset=0):
+        heap[self.address + offset] = value
+
+    def make_virtual_function(self, index, convention, args, return_type):
+        sim_class = vtables.get(heap.get(self.address))
+        if sim_class is None:
+            raise ValueError(f"No vtable at {self.address:#x}")
+        return sim_class.function(index)
+
+    def make_function(self, convention, args, return_type):
+        function = symbols.get(self.address)
+        if function is None:
+            function = Function(self.address, None)
+            symbols[self.address] = function
+        return function
+
+
+class Function(Pointer):
+    """Python implementation of a native function, None for one that does nothing.
+
+    Pre-hooks get [this pointer, *args] and can return a value
+    to skip the implementation or change the args."""
+
+    __slots__ = ("name", "implementation", "pre_hooks", "calls")
+
+    def __init__(self, address, implementation, name=""):
+        super().__init__(address)
+        self.name = name
+        self.implementation = implementation
+        self.pre_hooks = []
+        self.calls = 0
+
+    def __repr__(self):
+        return f"Function({self.name or self.address})"
+
+    def add_pre_hook(self, callback):
+        self.pre_hooks.append(callback)
+
+    def remove_pre_hook(self, callback):
+        self.pre_hooks.remove(callback)
+
+    @property
+    def is_hooked(self):
+        return bool(self.pre_hooks)
+
+    def __call__(self, *args):
+        self.calls += 1
+        if self.pre_hooks:
+            stack_data = [get_object_pointer(args[0]), *args[1:]] if args else []
+            for callback in tuple(self.pre_hooks):
+                result = callback(stack_data)
+                if result is not None:
+                    return result
+            if args:
+                args = (args[0], *stack_data[1:])
+        if self.implementation is not None:
+            return self.implementation(*args)
+        return None
+
+    def call_trampoline(self, *args):
+        if self.implementation is not None:
+            return self.implementation(*args)
+        return None
+
+
+class SimClass:
+    """A native class, virtual functions by vtable index."""
+
+    def __init__(self, name, virtuals):
+        self.name = name
+        # index -> (name, implementation)
+        self.virtuals = dict(virtuals)
+        self.vtable = allocate()
+        self.functions = {}
+        self.names = {name: index for index, (name, _) in self.virtuals.items()}
+        vtables[self.vtable] = self
+
+    def __repr__(self):
+        return f"SimClass({self.name})"
+
+    def function(self, index):
+        """One Function for all instances, hooks are shared like in the engine."""
+        function = self.functions.get(index)
+        if function is None:
+            name, implementation = self.virtuals.get(index, (f"virtual {index}", None))
+            function = Function(self.vtable + index * 4, implementation, name)
+            self.functions[index] = function
+        return function
+
+    def function_by_name(self, name):
+        return self.function(self.names[name])
+
+    def new(self):
+        """Allocate an instance, returns its address."""
+        address = allocate()
+        heap[address] = self.vtable
+        return address
+
+
+class Binary:
+    def __init__(self, path):
+        self.path = path
+
+    def find_address(self, identifier):
+        return Pointer(symbol_address(identifier))
+
+    def __getitem__(self, identifier):
+        return self.find_address(identifier)
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def allocate():
+    return next(_next_address)
+
+
+def symbol_address(identifier):
+    """Address of a signature or symbol, the same every time."""
+    if isinstance(identifier, bytes):
+        identifier = identifier.hex()
+    address = symbol_addresses.get(identifier)
+    if address is None:
+        address = allocate()
+        symbol_addresses[identifier] = address
+    return address
+
+
+def define_symbol(identifier, implementation):
+    """Give a symbol a Python implementation, returns its Function."""
+    address = symbol_address(identifier)
+    function = symbols.get(address)
+    if function is None:
+        function = Function(address, implementation, str(identifier))
+        symbols[address] = function
+    else:
+        function.implementation = implementation
+    return function
+
+
+def find_binary(path, srv_check=True, check_extension=True):
+    return Binary(path)
+
+
+def get_object_pointer(obj):
+    if isinstance(obj, Pointer):
+        return Pointer(obj.address)
+    return obj.pointer
+
+
+def get_virtual_function(obj, name):
+    return obj.get_virtual_function(name)
+
+
+def make_object(cls, pointer):
+    address = Pointer(pointer).address
+    from_address = getattr(cls, "_from_address", None)
+    if from_address is not None:
+        return from_address(address)
+    return objects[address]
+
+
+def store_object(obj):
+    """Give a Python object an address, i.e. for passing to functions."""
+    address = allocate()
+    objects[address] = obj
+    return Pointer(address)
+
+
+def free_object(pointer):
+    objects.pop(Pointer(pointer).address, None)
@@ -0,0 +1,201 @@
+"""
+================================================================
+    * benchmarks/sim/messages.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Stand-ins for Source.Python user messages, recipient filters,
+    translations and temp entities.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+from configobj import ConfigObj
+
+# dotf sim
+from . import engine, memory
+from .entities import Player
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# messages.colors.saytext2
+BLUE = "\x0799CCFF"
+BRIGHT_GREEN = "\x0701FF01"
+DARK_BLUE = "\x070000FF"
+DULL_RED = "\x07FF3F3F"
+GRAY = "\x07CCCCCC"
+GREEN = "\x073EFF3E"
+LIGHT_BLUE = "\x0799FFFF"
+ORANGE = "\x07FFA500"
+PALE_GREEN = "\x0799FF99"
+PALE_RED = "\x07FF9999"
+PINK = "\x07FF00FF"
+RED = "\x07FF0000"
+WHITE = "\x07FFFFFF"
+YELLOW = "\x07FFFF00"
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class RecipientFilter:
+    """Player indexes to send to, all players if none are given."""
+
+    def __init__(self, *indexes):
+        self.recipients = []
+        if indexes:
+            self.update(*indexes)
+        else:
+            self.add_all_players()
+
+    def __iter__(self):
+        return iter(list(self.recipients))
+
+    def __len__(self):
+        return len(self.recipients)
+
+    def __contains__(self, index):
+        return index in self.recipients
+
+    def __repr__(self):
+        return f"RecipientFilter({self.recipients})"
+
+    def update(self, *indexes):
+        """Replace the recipients with indexes, players or iterables of them."""
+        self.recipients.clear()
+        for index in indexes:
+            if isinstance(index, int) or hasattr(index, "index"):
+                index = [index]
+            for sub_index in index:
+                self.add_recipient(getattr(sub_index, "index", sub_index))
+
+    def add_recipient(self, index):
+        if index not in self.recipients:
+            self.recipients.append(index)
+
+    def remove_recipient(self, index):
+        if index in self.recipients:
+            self.recipients.remove(index)
+
+    def add_all_players(self):
+        for edict in engine.world.players():
+            self.add_recipient(edict.index)
+
+    def remove_all_players(self):
+        self.recipients.clear()
+
+
+class TranslationStrings(dict):
+    """Language -> string of one message."""
+
+    def get_string(self, language="en", **tokens):
+        message = self.get(language, self.get("en", ""))
+        for key, value in tokens.items():
+            message = message.replace("{" + key + "}", str(value))
+        return message
+
+
+class LangStrings(dict):
+    """Messages of a translations file, path without the .ini extension."""
+
+    def __init__(self, path):
+        super().__init__()
+        config = ConfigObj(str(path) + ".ini", encoding="utf-8")
+        for key, languages in config.items():
+            self[key] = TranslationStrings(languages)
+
+
+class UserMessage:
+    name = None
+
+    def _data(self, player, tokens):
+        raise NotImplementedError
+
+    def send(self, *indexes, **tokens):
+        """Send to each player separately in their language."""
+        if indexes:
+            recipients = RecipientFilter(*indexes)
+        else:
+            recipients = RecipientFilter()
+        for index in recipients:
+            engine.world.send_user_message(
+                self.name,
+                RecipientFilter(index),
+                self._data(Player(index), tokens),
+            )
+
+    def _translate(self, value, player, tokens):
+        if isinstance(value, TranslationStrings):
+            return value.get_string(player.language, **tokens)
+        return str(value)
+
+
+class SayText2(UserMessage):
+    name = "SayText2"
+
+    def __init__(
+        self,
+        message="",
+        index=0,
+        chat=False,
+        param1="",
+        param2="",
+        param3="",
+        param4="",
+    ):
+        self.message = message
+        self.index = index
+        self.chat = chat
+        self.param1 = param1
+        self.param2 = param2
+        self.param3 = param3
+        self.param4 = param4
+
+    def _data(self, player, tokens):
+        return {
+            "index": self.index,
+            "chat": self.chat,
+            "message": self._translate(self.message, player, tokens),
+            "param1": self.param1,
+            "param2": self.param2,
+            "param3": self.param3,
+            "param4": self.param4,
+        }
+
+
+class HintText(UserMessage):
+    name = "HintText"
+
+    def __init__(self, message=""):
+        self.message = message
+
+    def _data(self, player, tokens):
+        return {"message": self._translate(self.message, player, tokens)}
+
+
+class HookUserMessage:
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, callback):
+        engine.world.user_message_hooks[self.name].append(callback)
+        return callback
+
+
+class TempEntity:
+    def __init__(self, name):
+        if isinstance(name, str):
+            self.data = None
+            self.name = name
+        else:
+            self.data = memory.objects[memory.Pointer(name).address]
+            self.name = self.data.name
+
+    @property
+    def origin(self):
+        return self.data.origin if self.data is not None else None
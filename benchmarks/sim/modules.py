@@ -0,0 +1,225 @@
+"""
+================================================================
+    * benchmarks/sim/modules.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Registers the stand-ins as the Source.Python modules
+    the plugin imports.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import os
+import sys
+import tempfile
+import types
+
+# dotf sim
+from . import engine, entities, mathlib, memory, messages, natives
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+PLUGIN_NAME = "dotf"
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class SimPath(str):
+    """String path joinable with /, like the path.py Path of Source.Python."""
+
+    def __truediv__(self, other):
+        return SimPath(os.path.join(self, str(other)))
+
+
+class PluginInfo:
+    def __init__(self, name):
+        self.name = name
+
+
+class PluginManager:
+    def get_plugin_info(self, name):
+        return PluginInfo(PLUGIN_NAME)
+
+
+class PreHook:
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, callback):
+        self.function.add_pre_hook(callback)
+        return callback
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+
+def install(root, log_path=None, max_players=24, tick_interval=0.015, echo=False):
+    """Create the World and register stand-in modules, returns the World.
+
+    root is the repository root holding cfg/ and resource/,
+    logs go to log_path or a temporary directory."""
+    if log_path is None:
+        log_path = tempfile.mkdtemp(prefix="dotf_sim_")
+    os.makedirs(os.path.join(log_path, PLUGIN_NAME), exist_ok=True)
+
+    world = engine.World(
+        str(root),
+        str(log_path),
+        max_players=max_players,
+        tick_interval=tick_interval,
+        echo=echo,
+    )
+
+    listeners = {
+        name: getattr(engine, name)
+        for name in (
+            "OnClientActive",
+            "OnClientDisconnect",
+            "OnEntityDeleted",
+            "OnEntitySpawned",
+            "OnLevelEnd",
+            "OnLevelInit",
+            "OnNetworkedEntitySpawned",
+            "OnServerActivate",
+            "OnTick",
+        )
+    }
+    colors = {
+        name: getattr(messages, name)
+        for name in (
+            "BLUE",
+            "BRIGHT_GREEN",
+            "DARK_BLUE",
+            "DULL_RED",
+            "GRAY",
+            "GREEN",
+            "LIGHT_BLUE",
+            "ORANGE",
+            "PALE_GREEN",
+            "PALE_RED",
+            "PINK",
+            "RED",
+            "WHITE",
+            "YELLOW",
+        )
+    }
+
+    _module("commands", CommandReturn=engine.CommandReturn)
+    _module("commands.say", SayFilter=engine.SayFilter)
+    _module("commands.server", ServerCommand=engine.ServerCommand)
+    _module(
+        "core",
+        PLATFORM=engine.PLATFORM,
+        echo_console=engine.echo_console,
+        get_interface=engine.get_interface,
+    )
+    _module("cvars", ConVar=engine.ConVar, cvar=engine.cvar)
+    _module("effects")
+    _module("effects.base", TempEntity=messages.TempEntity)
+    _module("engines")
+    _module("engines.precache", Model=engine.Model)
+    _module(
+        "engines.server",
+        engine_server=natives.ENGINE_SERVER,
+        queue_command_string=engine.queue_command_string,
+        server=world.server,
+    )
+    _module("engines.sound", engine_sound=natives.ENGINE_SOUND)
+    _module(
+        "engines.trace",
+        ContentMasks=engine.ContentMasks,
+        GameTrace=engine.GameTrace,
+        Ray=engine.Ray,
+        TraceFilterSimple=engine.TraceFilterSimple,
+        engine_trace=engine.engine_trace,
+    )
+    entity = _module(
+        "entities.entity",
+        BaseEntity=entities.BaseEntity,
+        Entity=entities.Entity,
+    )
+    _module("entities", TakeDamageInfo=entities.TakeDamageInfo, entity=entity)
+    _module("entities.constants", CollisionGroup=entities.CollisionGroup)
+    _module(
+        "entities.helpers",
+        baseentity_from_index=entities.baseentity_from_index,
+        index_from_edict=entities.index_from_edict,
+    )
+    _module(
+        "entities.hooks",
+        EntityCondition=entities.EntityCondition,
+        EntityPostHook=entities.EntityPostHook,
+        EntityPreHook=entities.EntityPreHook,
+    )
+    _module("events", Event=engine.Event)
+    _module("events.hooks", EventAction=engine.EventAction, PreEvent=engine.PreEvent)
+    _module("filters")
+    _module("filters.entities", EntityIter=entities.EntityIter)
+    _module("filters.players", PlayerIter=entities.PlayerIter)
+    _module("filters.recipients", RecipientFilter=messages.RecipientFilter)
+    _module("listeners", **listeners)
+    _module("loggers", LogManager=engine.LogManager)
+    _module(
+        "mathlib",
+        NULL_QANGLE=mathlib.NULL_QANGLE,
+        NULL_VECTOR=mathlib.NULL_VECTOR,
+        QAngle=mathlib.QAngle,
+        Vector=mathlib.Vector,
+    )
+    _module(
+        "memory",
+        Convention=memory.Convention,
+        DataType=memory.DataType,
+        Function=memory.Function,
+        Pointer=memory.Pointer,
+        find_binary=memory.find_binary,
+        get_object_pointer=memory.get_object_pointer,
+        get_virtual_function=memory.get_virtual_function,
+        make_object=memory.make_object,
+    )
+    _module("memory.hooks", PreHook=PreHook)
+    _module("messages", HintText=messages.HintText, SayText2=messages.SayText2)
+    _module("messages.base", SayText2=messages.SayText2)
+    _module("messages.colors")
+    _module("messages.colors.saytext2", **colors)
+    _module("messages.hooks", HookUserMessage=messages.HookUserMessage)
+    _module(
+        "paths",
+        CFG_PATH=SimPath(os.path.join(root, "cfg", "source-python")),
+        LOG_PATH=SimPath(log_path),
+        TRANSLATION_PATH=SimPath(
+            os.path.join(root, "resource", "source-python", "translations")
+        ),
+    )
+    _module("players")
+    _module("players.bots", BotCmd=entities.BotCmd, bot_manager=entities.bot_manager)
+    _module("players.constants", PlayerButtons=entities.PlayerButtons)
+    _module("players.entity", Player=entities.Player)
+    _module(
+        "players.helpers",
+        playerinfo_from_index=entities.playerinfo_from_index,
+        userid_from_index=entities.userid_from_index,
+    )
+    _module("plugins")
+    _module("plugins.manager", plugin_manager=PluginManager())
+    _module("steam", SteamID=entities.SteamID)
+    _module("translations")
+    _module("translations.strings", LangStrings=messages.LangStrings)
+    _module("weapons")
+    _module("weapons.entity", Weapon=entities.Weapon)
+
+    return world
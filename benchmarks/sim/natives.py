@@ -0,0 +1,530 @@
+"""
+================================================================
+    * benchmarks/sim/natives.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Engine side of simulated entities, what the plugin's virtual
+    and signature function calls end up doing.
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import math
+
+# dotf sim
+from . import engine, memory
+from .mathlib import Vector, QAngle
+from .memory import Pointer, SimClass
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Send table offsets the plugin's MemberTables are relative to
+SERVER_CLASSES = {
+    "CBaseAnimating": {"m_flFadeScale": 0x2F4},
+    "CTFBaseBoss": {"m_lastHealthPercentage": 0x4B8},
+    "CObjectSentrygun": {"m_bPlayerControlled": 0xA2C, "m_iHighestUpgradeLevel": 0x9E0},
+}
+# CTFBaseBoss::m_locomotor and CBaseAnimating::m_pStudioHdr
+LOCOMOTOR_OFFSET = 0x4B8 + 32
+STUDIO_HDR_OFFSET = 0x2F4 + 28
+
+# m_takedamage
+DAMAGE_NO = 0
+DAMAGE_YES = 2
+# m_Collision.m_nSolidType
+SOLID_BBOX = 2
+# m_lifeState
+LIFE_ALIVE = 0
+LIFE_DEAD = 2
+
+SENTRY_THINK_INTERVAL = 0.05
+
+# Base health by player class
+PLAYER_CLASS_HEALTH = {
+    1: 125,
+    2: 125,
+    3: 200,
+    4: 175,
+    5: 150,
+    6: 300,
+    7: 175,
+    8: 125,
+    9: 125,
+}
+
+POSE_PARAMETERS = ("move_x", "move_y", "move_scale", "body_pitch", "body_yaw")
+
+# Sequence name -> index, the same for every model
+sequences = {}
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def forward(method):
+    """Implementation calling method of the native owning the this pointer."""
+
+    def implementation(this, *args):
+        address = memory.get_object_pointer(this).address
+        return getattr(engine.world.natives[address], method)(*args)
+
+    implementation.__name__ = method
+    return implementation
+
+
+def get_native_class(classname):
+    return NATIVES.get(classname, EntityNative).native_class
+
+
+def create_native(edict):
+    return NATIVES.get(edict.classname, EntityNative)(edict)
+
+
+def emit_sound(this, recipients, index, channel, sample, *args):
+    engine.world.sounds[sample] += 1
+
+
+def playback_temp_entity(this, recipients, delay, sender, *args):
+    engine.world.temp_entities[memory.objects[sender.address].name] += 1
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class EntityNative:
+    """Default engine behaviour of an entity."""
+
+    hull_maxs = Vector(16.0, 16.0, 16.0)
+
+    def __init__(self, edict):
+        self.edict = edict
+        self.properties = edict.properties
+        engine.world.natives[edict.address] = self
+
+    @property
+    def pointer(self):
+        return Pointer(self.edict.address)
+
+    def call(self, name, *args):
+        """Call one of our virtual functions, hooks included."""
+        function = type(self).native_class.function_by_name(name)
+        return function(self.pointer, *args)
+
+    def spawn(self):
+        self.properties["m_Collision.m_vecMaxs"] = self.hull_maxs.copy()
+        self.properties["m_Collision.m_nSolidType"] = SOLID_BBOX
+        self.edict.datamaps["m_takedamage"] = DAMAGE_YES
+        from .entities import Entity
+
+        engine.world.fire_listeners("OnEntitySpawned", Entity(self.edict.index))
+
+    def set_model(self, model):
+        self.properties["m_ModelName"] = model
+
+    def input(self, name, args):
+        if name == "Kill":
+            engine.world.remove_entity(self.edict.index)
+        elif name == "SetHealth":
+            self.properties["m_iHealth"] = int(args[0])
+        elif name == "SetCustomModel":
+            self.properties["m_ModelName"] = args[0]
+
+    def on_take_damage(self, info_pointer):
+        if (
+            self.edict.removed
+            or self.edict.datamaps.get("m_takedamage", DAMAGE_NO) == DAMAGE_NO
+        ):
+            return
+        info = memory.objects[info_pointer.address]
+        health = self.properties["m_iHealth"] - int(info.damage)
+        self.properties["m_iHealth"] = health
+        if health <= 0:
+            self.call("Event_Killed", info_pointer)
+
+    def event_killed(self, info_pointer):
+        info = memory.objects[info_pointer.address]
+        engine.world.fire_event(
+            "entity_killed",
+            entindex_killed=self.edict.index,
+            entindex_attacker=info.attacker,
+            entindex_inflictor=info.inflictor,
+            damagebits=0,
+        )
+        engine.world.remove_entity(self.edict.index)
+
+    def on_removed(self):
+        pass
+
+
+class PlayerNative(EntityNative):
+    hull_maxs = Vector(24.0, 24.0, 82.0)
+
+    def __init__(self, edict):
+        super().__init__(edict)
+        self.name = ""
+        self.userid = 0
+        self.fake = False
+        self.properties["m_lifeState"] = LIFE_DEAD
+        self.properties["m_iObserverMode"] = 0
+
+    def spawn(self):
+        super().spawn()
+        self.properties["m_lifeState"] = LIFE_ALIVE
+        # Through the virtual so GetMaxHealth hooks apply
+        health = self.call("GetMaxHealth")
+        self.properties["m_iMaxHealth"] = health
+        self.properties["m_iHealth"] = health
+
+    def get_max_health(self):
+        return PLAYER_CLASS_HEALTH.get(self.properties["m_PlayerClass.m_iClass"], 125)
+
+    def event_killed(self, info_pointer):
+        info = memory.objects[info_pointer.address]
+        self.properties["m_lifeState"] = LIFE_DEAD
+        self.edict.datamaps["m_takedamage"] = DAMAGE_NO
+        attacker = engine.world.edicts.get(info.attacker)
+        engine.world.fire_event(
+            "player_death",
+            userid=self.userid,
+            attacker=(
+                attacker.native.userid
+                if attacker is not None and attacker.classname == "player"
+                else 0
+            ),
+        )
+
+
+class BaseBossNative(EntityNative):
+    """base_boss with its NextBot interface and locomotion.
+
+    Locomotion walks straight to the last Approach goal on the ground,
+    move_speed * time since the last NextBot update per update."""
+
+    hull_maxs = Vector(24.0, 24.0, 72.0)
+
+    def __init__(self, edict):
+        super().__init__(edict)
+        world = engine.world
+        self.interface = NEXTBOT_INTERFACE.new()
+        self.locomotor = LOCOMOTION.new()
+        world.natives[self.interface] = self
+        world.natives[self.locomotor] = self
+        memory.heap[edict.address + LOCOMOTOR_OFFSET] = self.locomotor
+        memory.heap[edict.address + STUDIO_HDR_OFFSET] = memory.allocate()
+
+        self.goal = None
+        self.desired_speed = 0.0
+        self.ground_speed = 0.0
+        self.motion = Vector()
+        self.motion_pointer = memory.store_object(self.motion)
+        self.feet = Vector()
+        self.feet_pointer = memory.store_object(self.feet)
+        self.last_update = 0.0
+        self.elapsed = 0.0
+
+    def spawn(self):
+        super().spawn()
+        self.properties["m_iHealth"] = 1000
+        self.properties["m_iMaxHealth"] = 1000
+        self.last_update = engine.world.server.time
+        if self not in engine.world.nextbots:
+            engine.world.nextbots.append(self)
+
+    def on_removed(self):
+        world = engine.world
+        if self in world.nextbots:
+            world.nextbots.remove(self)
+        world.natives.pop(self.interface, None)
+        world.natives.pop(self.locomotor, None)
+        memory.free_object(self.motion_pointer)
+        memory.free_object(self.feet_pointer)
+
+    # CBaseAnimating
+    def get_base_entity(self):
+        return self.pointer
+
+    def my_next_bot_pointer(self):
+        return Pointer(self.interface)
+
+    def studio_frame_advance(self):
+        pass
+
+    def dispatch_anim_events(self, entity):
+        pass
+
+    def lookup_sequence(self, name):
+        return sequences.setdefault(name, len(sequences))
+
+    def reset_sequence(self, sequence):
+        self.properties["m_nSequence"] = sequence
+
+    def set_sequence(self, sequence):
+        self.properties["m_nSequence"] = sequence
+
+    def lookup_pose_parameter(self, studio_hdr, name):
+        if name in POSE_PARAMETERS:
+            return POSE_PARAMETERS.index(name)
+        return -1
+
+    def set_pose_parameter(self, studio_hdr, name, value):
+        return self.set_pose_parameter_index(
+            studio_hdr, self.lookup_pose_parameter(studio_hdr, name), value
+        )
+
+    def set_pose_parameter_index(self, studio_hdr, index, value):
+        self.properties[f"m_flPoseParameter.{index:03}"] = value
+        return value
+
+    # INextBot
+    def update(self, now):
+        """Called by the NextBotManager."""
+        self.elapsed = now - self.last_update
+        self.last_update = now
+        NEXTBOT_INTERFACE.function_by_name("Update")(Pointer(self.interface))
+
+    def next_bot_update(self):
+        LOCOMOTION.function_by_name("Update")(Pointer(self.locomotor))
+
+    # ILocomotion
+    def locomotion_update(self):
+        goal = self.goal
+        self.goal = None
+        if goal is None or self.desired_speed <= 0.0 or self.elapsed <= 0.0:
+            self.ground_speed = 0.0
+            self.motion.x = self.motion.y = 0.0
+            return
+
+        origin = self.properties["m_vecOrigin"]
+        dx = goal.x - origin.x
+        dy = goal.y - origin.y
+        distance = math.sqrt(dx * dx + dy * dy)
+        if distance == 0.0:
+            self.ground_speed = 0.0
+            return
+        step = min(distance, self.desired_speed * self.elapsed)
+        self.properties["m_vecOrigin"] = Vector(
+            origin.x + dx / distance * step, origin.y + dy / distance * step, origin.z
+        )
+        self.ground_speed = step / self.elapsed
+        self.motion.x = dx / distance
+        self.motion.y = dy / distance
+
+    def approach(self, goal, weight=1.0):
+        self.goal = goal.copy()
+
+    def drive_to(self, goal):
+        self.goal = goal.copy()
+
+    def run(self):
+        pass
+
+    def set_desired_speed(self, speed):
+        self.desired_speed = speed
+
+    def get_ground_speed(self):
+        return self.ground_speed
+
+    def get_ground_motion_vector(self):
+        return self.motion_pointer
+
+    def face_towards(self, target):
+        origin = self.properties["m_vecOrigin"]
+        if target.x != origin.x or target.y != origin.y:
+            yaw = math.degrees(math.atan2(target.y - origin.y, target.x - origin.x))
+            self.properties["m_angRotation"] = QAngle(0.0, yaw, 0.0)
+
+    def get_feet(self):
+        origin = self.properties["m_vecOrigin"]
+        self.feet.x, self.feet.y, self.feet.z = origin.x, origin.y, origin.z
+        return self.feet_pointer
+
+    def is_potentially_traversable(self, start, end, when=0, fraction=None):
+        return True
+
+    def stuck_monitor(self):
+        pass
+
+
+class SentryNative(EntityNative):
+    """obj_sentrygun, thinks every SENTRY_THINK_INTERVAL and looks for
+    a target, but never finds or shoots one."""
+
+    hull_maxs = Vector(20.0, 20.0, 66.0)
+
+    def __init__(self, edict):
+        super().__init__(edict)
+        self.next_think = 0.0
+
+    def spawn(self):
+        super().spawn()
+        self.properties["m_iHealth"] = 150
+        self.properties["m_iMaxHealth"] = 150
+        self.next_think = engine.world.server.time
+        if self not in engine.world.sentries:
+            engine.world.sentries.append(self)
+
+    def on_removed(self):
+        if self in engine.world.sentries:
+            engine.world.sentries.remove(self)
+
+    def activate(self):
+        pass
+
+    def initialize_map_placed_object(self):
+        pass
+
+    def change_team(self, team):
+        self.properties["m_iTeamNum"] = team
+
+    def think(self, now):
+        if now < self.next_think:
+            return
+        self.next_think = now + SENTRY_THINK_INTERVAL
+        FIND_TARGET(self.pointer)
+
+    def find_target(self):
+        return False
+
+    def event_killed(self, info_pointer):
+        info = memory.objects[info_pointer.address]
+        engine.world.fire_event(
+            "object_destroyed",
+            userid=0,
+            attacker=info.attacker,
+            index=self.edict.index,
+            objecttype=2,
+            was_building=False,
+        )
+        super().event_killed(info_pointer)
+
+
+class TempEntityData:
+    __slots__ = ("name", "origin")
+
+    def __init__(self, name, origin=None):
+        self.name = name
+        self.origin = origin
+
+
+class EngineInterface:
+    """Engine interface whose virtual functions can be hooked."""
+
+    def __init__(self, native_class):
+        self.native_class = native_class
+        self.pointer = Pointer(native_class.new())
+
+    def get_virtual_function(self, name):
+        return self.native_class.function_by_name(name)
+
+
+class EngineSound(EngineInterface):
+    def precache_sound(self, sample, preload=False):
+        return 0
+
+
+# =============================================================================
+# >> NATIVE CLASSES
+# =============================================================================
+# Linux vtable indices, like the plugin looks up
+EntityNative.native_class = SimClass(
+    "CBaseEntity",
+    {
+        23: ("Spawn", forward("spawn")),
+        62: ("OnTakeDamage", forward("on_take_damage")),
+        67: ("Event_Killed", forward("event_killed")),
+    },
+)
+
+PlayerNative.native_class = SimClass(
+    "CTFPlayer",
+    {
+        23: ("Spawn", forward("spawn")),
+        62: ("OnTakeDamage", forward("on_take_damage")),
+        67: ("Event_Killed", forward("event_killed")),
+        118: ("GetMaxHealth", forward("get_max_health")),
+    },
+)
+
+BaseBossNative.native_class = SimClass(
+    "CTFBaseBoss",
+    {
+        6: ("GetBaseEntity", forward("get_base_entity")),
+        23: ("Spawn", forward("spawn")),
+        25: ("SetModel", forward("set_model")),
+        62: ("OnTakeDamage", forward("on_take_damage")),
+        67: ("Event_Killed", forward("event_killed")),
+        73: ("MyNextBotPointer", forward("my_next_bot_pointer")),
+        195: ("StudioFrameAdvance", forward("studio_frame_advance")),
+        196: ("SetSequence", forward("set_sequence")),
+        207: ("DispatchAnimEvents", forward("dispatch_anim_events")),
+    },
+)
+
+NEXTBOT_INTERFACE = SimClass("INextBot", {44: ("Update", forward("next_bot_update"))})
+
+LOCOMOTION = SimClass(
+    "CTFBaseBossLocomotion",
+    {
+        44: ("Update", forward("locomotion_update")),
+        47: ("Approach", forward("approach")),
+        48: ("DriveTo", forward("drive_to")),
+        56: ("Run", forward("run")),
+        60: ("SetDesiredSpeed", forward("set_desired_speed")),
+        67: ("GetGroundSpeed", forward("get_ground_speed")),
+        68: ("GetGroundMotionVector", forward("get_ground_motion_vector")),
+        74: ("FaceTowards", forward("face_towards")),
+        79: ("GetFeet", forward("get_feet")),
+        92: ("IsPotentiallyTraversable", forward("is_potentially_traversable")),
+        102: ("StuckMonitor", forward("stuck_monitor")),
+    },
+)
+
+SentryNative.native_class = SimClass(
+    "CObjectSentrygun",
+    {
+        23: ("Spawn", forward("spawn")),
+        34: ("Activate", forward("activate")),
+        62: ("OnTakeDamage", forward("on_take_damage")),
+        66: ("Event_Killed", forward("event_killed")),
+        91: ("ChangeTeam", forward("change_team")),
+        376: ("InitializeMapPlacedObject", forward("initialize_map_placed_object")),
+    },
+)
+
+NATIVES = {
+    "base_boss": BaseBossNative,
+    "obj_sentrygun": SentryNative,
+    "player": PlayerNative,
+}
+
+# Signature functions by their linux symbol
+FIND_TARGET = memory.define_symbol(
+    "_ZN16CObjectSentrygun10FindTargetEv", forward("find_target")
+)
+for symbol, method in (
+    ("_ZN14CBaseAnimating14LookupSequenceEPKc", "lookup_sequence"),
+    ("_ZN14CBaseAnimating13ResetSequenceEi", "reset_sequence"),
+    (
+        "_ZN14CBaseAnimating19LookupPoseParameterEP10CStudioHdrPKc",
+        "lookup_pose_parameter",
+    ),
+    ("_ZN14CBaseAnimating16SetPoseParameterEP10CStudioHdrPKcf", "set_pose_parameter"),
+    (
+        "_ZN14CBaseAnimating16SetPoseParameterEP10CStudioHdrif",
+        "set_pose_parameter_index",
+    ),
+):
+    memory.define_symbol(symbol, forward(method))
+
+ENGINE_SOUND = EngineSound(
+    SimClass("CEngineSoundServer", {5: ("EmitSound", emit_sound)})
+)
+ENGINE_SERVER = EngineInterface(
+    SimClass("CVEngineServer", {64: ("PlaybackTempEntity", playback_temp_entity)})
+)
@@ -0,0 +1,72 @@
+"""
+================================================================
+    * benchmarks/simulate.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Headless match on a flat test map, running the whole plugin
+    on the sim stand-ins for Source.Python.
+
+    Usage: python benchmarks/simulate.py [ticks] [lanes]
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import statistics
+import sys
+import time
+
+# dotf sim
+import sim
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    lanes = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    world = sim.install(sim.ROOT)
+    world.load_map(sim.FlatMap(lanes=lanes))
+    dotf = sim.load_plugin()
+    from dotf.core.bot.botmanager import BotManager
+    from dotf.core.buildings.buildingmanager import BuildingManager
+
+    world.activate()
+    player = world.add_player("player", team=2, player_class=1)
+    world.say(player, "!start")
+
+    times = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        world.tick()
+        times.append((time.perf_counter() - start) * 1000.0)
+
+        # Kill a bot now and then, so the pool gets used
+        if world.server.tick % 50 == 0 and BotManager.instance().bots:
+            world.kill(next(iter(BotManager.instance().bots)))
+
+    pool = BotManager.instance().get_pool_stats()
+    times.sort()
+    print(f"{ticks} ticks on {world.map_name}, {lanes} lanes")
+    print(
+        f"  tick: median {statistics.median(times):.3f}ms, "
+        f"p99 {times[int(len(times) * 0.99) - 1]:.3f}ms, max {times[-1]:.3f}ms"
+    )
+    print(
+        f"  bots: {pool['active']} active, {pool['parked']} parked, "
+        f"{pool['hits']} pool hits, {pool['misses']} misses"
+    )
+    print(f"  sentries: {len(BuildingManager.instance().sentries)}")
+    print(f"  user messages: {dict(world.user_messages)}")
+
+    dotf.unload()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+================================================================
+    * benchmarks/targeting.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Compare the old all-pairs aggro scan with a trace per enemy
+    in range against SpatialHash queries and team VisionMap updates
+    through LineOfSightCache, and show how vision traces scale with
+    unit count. Traces are counted, not done.
+
+    Usage: python benchmarks/targeting.py [units] [ticks] [aggro range]
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import math
+import random
+import sys
+import time
+
+# dotf benchmarks
+from pluginloader import load_plugin_module
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# Lanes are about this wide and long
+LANE_WIDTH = 1024.0
+LANE_LENGTH = 12000.0
+
+
+spatialhash = load_plugin_module("spatialhash", "core/targeting/spatialhash.py")
+loscache = load_plugin_module("loscache", "core/targeting/loscache.py")
+visionmap = load_plugin_module("visionmap", "core/targeting/visionmap.py")
+
+# Defaults from bot_settings.ini [targeting]
+VISION_RANGE = 600.0
+VISION_INTERVAL = 2
+LOS_TTL = 4
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def make_units(count, rng):
+    """(index, team, x, y, z) of units spread along a lane, teams meeting mid lane."""
+    units = []
+    for index in range(1, count + 1):
+        team = 2 + index % 2
+        center = LANE_LENGTH * 0.5 + (-1 if team == 2 else 1) * 400.0
+        x = rng.gauss(center, LANE_LENGTH * 0.1)
+        y = rng.uniform(-LANE_WIDTH * 0.5, LANE_WIDTH * 0.5)
+        units.append([index, team, x, y, 0.0])
+    return units
+
+
+def move_units(units, rng):
+    for unit in units:
+        unit[2] += rng.uniform(-4.0, 4.0)
+        unit[3] += rng.uniform(-4.0, 4.0)
+
+
+def legacy_tick(units, aggro_range, counter):
+    """Bot.get_action before the TargetManager: every unit scans every unit,
+    tracing to each enemy that is the closest so far and in range."""
+    targets = 0
+    for index, team, x, y, z in units:
+        closest = float("inf")
+        target = None
+        for other, other_team, ox, oy, oz in units:
+            if other_team == team:
+                continue
+            dist = math.sqrt((ox - x) ** 2 + (oy - y) ** 2 + (oz - z) ** 2)
+            if dist < closest:
+                closest = dist
+                if dist <= aggro_range:
+                    counter[0] += 1
+                    target = other
+        if target is not None:
+            targets += 1
+    return targets
+
+
+def hash_tick(units, aggro_range, grid, cache, vision, tick, counter):
+    """TargetManager.tick and a find_target per unit."""
+    cache.start_tick(tick)
+    grid.clear()
+    for unit in units:
+        grid.insert(*unit)
+
+    def trace(source, target):
+        counter[0] += 1
+        return True
+
+    def can_see(source, target):
+        return cache.check(source, target, trace)
+
+    if tick % VISION_INTERVAL == 0:
+        vision.update(grid, VISION_RANGE, can_see)
+
+    targets = 0
+    for index, team, x, y, z in units:
+        for _, other in grid.query(x, y, z, aggro_range, team):
+            if vision.is_visible(team, other):
+                targets += 1
+                break
+    return targets
+
+
+def run(name, units, aggro_range, ticks):
+    """Returns (ms per tick, traces per tick)."""
+    grid = spatialhash.SpatialHash()
+    cache = loscache.LineOfSightCache(LOS_TTL, 0)
+    vision = visionmap.VisionMap()
+    move_rng = random.Random(2)
+    tick_units = [list(unit) for unit in units]
+    counter = [0]
+    start = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        move_units(tick_units, move_rng)
+        if name == "legacy":
+            legacy_tick(tick_units, aggro_range, counter)
+        else:
+            hash_tick(tick_units, aggro_range, grid, cache, vision, tick, counter)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0 / ticks
+    return elapsed_ms, counter[0] / ticks
+
+
+def main():
+    unit_count = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 66
+    aggro_range = float(sys.argv[3]) if len(sys.argv) > 3 else 256.0
+
+    units = make_units(unit_count, random.Random(1))
+
+    print(f"units: {unit_count}, ticks: {ticks}, aggro range: {aggro_range}")
+    results = {}
+    for name in ("legacy", "hash"):
+        elapsed_ms, traces = run(name, units, aggro_range, ticks)
+        results[name] = elapsed_ms
+        print(f"  {name:8} {elapsed_ms:8.3f} ms/tick, {traces:8.1f} traces/tick")
+    print(f"  speedup: {results['legacy'] / results['hash']:.1f}x")
+
+    # Traces per unit should stay flat as units are added
+    print("vision traces by unit count:")
+    for count in (unit_count // 4, unit_count // 2, unit_count, unit_count * 2):
+        units = make_units(max(2, count), random.Random(1))
+        _, traces = run("hash", units, aggro_range, ticks)
+        print(
+            f"  {len(units):6} units {traces:8.1f} traces/tick, "
+            f"{traces / len(units):6.3f} per unit"
+        )
+
+
+if __name__ == "__main__":
+    main()
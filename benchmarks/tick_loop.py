@@ -0,0 +1,312 @@
+"""
+================================================================
+    * benchmarks/tick_loop.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Per-tick time and allocations of the whole plugin on the sim,
+    for scenarios of different map sizes, bot, sentry and player
+    counts. Each scenario runs in its own process so the plugin
+    singletons start fresh.
+
+    Time is measured for the whole tick, the plugin's OnTick
+    listener and the NextBot updates running the bot hooks.
+    Allocations are measured in a second pass with tracemalloc,
+    which slows the ticks down.
+
+    Usage: python benchmarks/tick_loop.py [--scenario NAME ...]
+           [--ticks N] [--output results.json] [--baseline old.json]
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import argparse
+import contextlib
+import datetime
+import gc
+import io
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# dotf sim
+import sim
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+# name -> lanes, nodes per lane, bots, sentries, players
+SCENARIOS = {
+    "small": (1, 8, 10, 2, 1),
+    "default": (3, 8, 60, 12, 4),
+    "bots_120": (3, 16, 120, 12, 8),
+    "bots_250": (3, 16, 250, 12, 8),
+    "bots_500": (3, 16, 500, 12, 8),
+    "lanes_6": (6, 16, 120, 24, 8),
+    "nodes_64": (3, 64, 60, 12, 4),
+    "sentries_36": (3, 16, 60, 36, 4),
+    "players_24": (3, 16, 60, 12, 24),
+}
+
+WARMUP_TICKS = 300
+TICKS = 1000
+ALLOC_TICKS = 200
+
+PERCENTILES = (50, 99)
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class StageTimer:
+    """Wraps a function, adding its time to the tick's total."""
+
+    def __init__(self, function):
+        self.function = function
+        self.ns = 0
+
+    def __call__(self, *args):
+        start = time.perf_counter_ns()
+        try:
+            return self.function(*args)
+        finally:
+            self.ns += time.perf_counter_ns() - start
+
+    def take(self):
+        ns = self.ns
+        self.ns = 0
+        return ns
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(len(values) * p / 100.0) - 1)]
+
+
+def summarize(values, scale=1.0):
+    values = sorted(value * scale for value in values)
+    summary = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+    summary["mean"] = sum(values) / len(values) if values else 0.0
+    summary["max"] = values[-1] if values else 0.0
+    return summary
+
+
+def setup(lanes, nodes, bots, sentries, players):
+    """Load the plugin on a flat map sized for the scenario and start a game."""
+    sides = lanes * 2
+    world = sim.install(sim.ROOT, max_players=max(24, players))
+    world.load_map(
+        sim.FlatMap(
+            lanes=lanes,
+            nodes_per_lane=nodes,
+            bots_per_lane=math.ceil(bots / sides),
+            sentries_per_lane=math.ceil(sentries / sides),
+        )
+    )
+    plugin = sim.load_plugin()
+    from dotf.core.bot.botmanager import BotManager
+    from dotf.core.game import GameManager
+    from dotf.core.map.mapmanager import MapManager
+
+    world.activate()
+    for i in range(players):
+        team = 2 + i % 2
+        lane = i // 2 % lanes
+        points = MapManager.instance().get_bot_spawn_points(team, lane)
+        world.add_player(
+            f"player{i}", team=team, player_class=1, origin=points[0]["origin"]
+        )
+
+    BotManager.instance().max_bots = bots
+    GameManager.instance().start_game()
+    return world, plugin
+
+
+def run_scenario(lanes, nodes, bots, sentries, players, warmup, ticks, alloc_ticks):
+    """Run one scenario in this process, returns the results."""
+    world, plugin = setup(lanes, nodes, bots, sentries, players)
+    from dotf.core.bot.botmanager import BotManager
+    from dotf.core.buildings.buildingmanager import BuildingManager
+    from dotf.core.player.usermanager import UserManager
+
+    world.tick(warmup)
+
+    on_tick = StageTimer(world.listeners["OnTick"][0])
+    world.listeners["OnTick"][0] = on_tick
+    nextbots = StageTimer(world.update_nextbots)
+    world.update_nextbots = nextbots
+
+    gc.collect()
+    tick_ns = []
+    on_tick_ns = []
+    nextbot_ns = []
+    for _ in range(ticks):
+        start = time.perf_counter_ns()
+        world.tick()
+        tick_ns.append(time.perf_counter_ns() - start)
+        on_tick_ns.append(on_tick.take())
+        nextbot_ns.append(nextbots.take())
+
+    gc.collect()
+    peak_bytes = []
+    blocks = []
+    tracemalloc.start()
+    for _ in range(alloc_ticks):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        start_blocks = sys.getallocatedblocks()
+        world.tick()
+        blocks.append(sys.getallocatedblocks() - start_blocks)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_bytes.append(peak - before)
+    tracemalloc.stop()
+
+    result = {
+        "tick_ms": summarize(tick_ns, 1e-6),
+        "on_tick_ms": summarize(on_tick_ns, 1e-6),
+        "nextbot_update_ms": summarize(nextbot_ns, 1e-6),
+        "alloc_peak_kib": summarize(peak_bytes, 1.0 / 1024.0),
+        "alloc_net_blocks": summarize(blocks),
+        "bots": len(BotManager.instance().bots),
+        "parked_bots": len(BotManager.instance().pool),
+        "sentries": len(BuildingManager.instance().sentries),
+        "players": len(UserManager.instance().users),
+    }
+    plugin.unload()
+    return result
+
+
+def run_in_process(name, parameters, args):
+    """Run a scenario in a new interpreter, returns its results."""
+    command = [
+        sys.executable,
+        __file__,
+        "--run",
+        json.dumps(parameters),
+        "--warmup",
+        str(args.warmup),
+        "--ticks",
+        str(args.ticks),
+        "--alloc-ticks",
+        str(args.alloc_ticks),
+    ]
+    output = subprocess.run(command, capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.splitlines()[-1])
+    lanes, nodes, bots, sentries, players = parameters
+    return {
+        "scenario": name,
+        "lanes": lanes,
+        "nodes_per_lane": nodes,
+        "max_bots": bots,
+        "max_sentries": sentries,
+        "max_players": players,
+        **result,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=sim.ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(result, baseline=None):
+    tick = result["tick_ms"]
+    line = (
+        f"  {result['scenario']:12} {result['bots']:4} bots {result['sentries']:3} "
+        f"sentries {result['players']:3} players: "
+        f"tick p50 {tick['p50']:7.3f}ms p99 {tick['p99']:7.3f}ms, "
+        f"on_tick p50 {result['on_tick_ms']['p50']:7.3f}ms, "
+        f"nextbots p50 {result['nextbot_update_ms']['p50']:7.3f}ms, "
+        f"alloc p50 {result['alloc_peak_kib']['p50']:8.1f}KiB"
+    )
+    if baseline is not None:
+        old = baseline["tick_ms"]
+        line += f" | vs. baseline p50 {tick['p50'] / old['p50']:5.2f}x"
+        line += f" p99 {tick['p99'] / old['p99']:5.2f}x"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--scenario", action="append", choices=SCENARIOS, help="default: all"
+    )
+    parser.add_argument(
+        "--custom",
+        metavar="LANES,NODES,BOTS,SENTRIES,PLAYERS",
+        help="run this scenario instead",
+    )
+    parser.add_argument("--warmup", type=int, default=WARMUP_TICKS)
+    parser.add_argument("--ticks", type=int, default=TICKS)
+    parser.add_argument("--alloc-ticks", type=int, default=ALLOC_TICKS)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="compare to the JSON of an earlier run")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        # Keep stdout for the result, in case anything prints
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_scenario(
+                *json.loads(args.run), args.warmup, args.ticks, args.alloc_ticks
+            )
+        print(json.dumps(result))
+        return
+
+    if args.custom is not None:
+        scenarios = {"custom": tuple(int(x) for x in args.custom.split(","))}
+    else:
+        scenarios = {name: SCENARIOS[name] for name in args.scenario or SCENARIOS}
+
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = {
+                result["scenario"]: result for result in json.load(file)["results"]
+            }
+
+    print(f"ticks: {args.ticks} after {args.warmup} warmup, {args.alloc_ticks} traced")
+    results = []
+    for name, parameters in scenarios.items():
+        result = run_in_process(name, parameters, args)
+        print_result(result, baseline.get(name))
+        results.append(result)
+
+    if args.output is not None:
+        report = {
+            "revision": git_revision(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "warmup": args.warmup,
+            "ticks": args.ticks,
+            "alloc_ticks": args.alloc_ticks,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
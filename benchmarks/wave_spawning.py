@@ -0,0 +1,110 @@
+"""
+================================================================
+    * benchmarks/wave_spawning.py
+    *
+    * Copyright (c) 2021 Lauri Räsänen
+    * ================================
+
+    Worst tick time when a bot wave fires, spawning the whole
+    wave at once vs. SpawnQueue with a per-tick cap. Spawning a
+    bot is simulated with a busy wait.
+
+    Usage: python benchmarks/wave_spawning.py [lanes] [bots per lane] [spawn ms]
+================================================================
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python
+import sys
+import time
+
+# dotf benchmarks
+from pluginloader import load_plugin_module
+
+# =============================================================================
+# >> GLOBAL VARIABLES
+# =============================================================================
+TICKS = 200
+WAVE_INTERVAL = 50
+# Everything else the server does in a tick
+BASE_TICK_MS = 1.0
+SPAWN_CAPS = (0, 8, 4, 2)
+
+
+spawnqueue = load_plugin_module("spawnqueue", "core/game/spawnqueue.py")
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def busy_wait(ms):
+    end = time.perf_counter() + ms / 1000.0
+    while time.perf_counter() < end:
+        pass
+
+
+def make_wave(lane_count, bots_per_lane):
+    """Spawn points per team per lane, like GameManager.spawn_bot_wave."""
+    return [
+        [[(lane, team, i) for i in range(bots_per_lane)] for team in ("blu", "red")]
+        for lane in range(lane_count)
+    ]
+
+
+def run(wave, spawn_ms, max_spawns):
+    """Returns (tick times in ms, spawn order)."""
+    queue = spawnqueue.SpawnQueue()
+    spawned = []
+
+    def spawn(point):
+        busy_wait(spawn_ms)
+        spawned.append(point)
+
+    tick_times = []
+    tick = 0
+    # Keep going until the last wave is out
+    while tick < TICKS or len(queue) > 0:
+        tick += 1
+        start = time.perf_counter()
+        busy_wait(BASE_TICK_MS)
+        if tick <= TICKS and tick % WAVE_INTERVAL == 0:
+            queue.add_wave(wave)
+        queue.tick(spawn, max_spawns)
+        tick_times.append((time.perf_counter() - start) * 1000.0)
+    return tick_times, spawned
+
+
+def main():
+    lane_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    bots_per_lane = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    spawn_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+
+    wave = make_wave(lane_count, bots_per_lane)
+    wave_size = lane_count * bots_per_lane * 2
+    print(
+        f"lanes: {lane_count}, bots per lane per team: {bots_per_lane}, "
+        f"wave: {wave_size} bots, spawn: {spawn_ms}ms, base tick: {BASE_TICK_MS}ms"
+    )
+
+    expected = None
+    for max_spawns in SPAWN_CAPS:
+        tick_times, spawned = run(wave, spawn_ms, max_spawns)
+        # Same bots every time, only spread differently
+        if expected is None:
+            expected = sorted(spawned)
+        assert sorted(spawned) == expected
+
+        tick_times.sort()
+        p50 = tick_times[len(tick_times) // 2]
+        name = "all at once" if max_spawns == 0 else f"{max_spawns} per tick"
+        ticks = -(-wave_size // max_spawns) if max_spawns > 0 else 1
+        print(
+            f"  {name:12} worst tick {tick_times[-1]:7.3f}ms, p50 {p50:6.3f}ms, "
+            f"wave spread over {ticks} ticks"
+        )
+
+
+if __name__ == "__main__":
+    main()